@@ -1,20 +1,29 @@
 import streamlit as st
-import os
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import plotly.express as px
-from PIL import Image, UnidentifiedImageError
-import re, unicodedata, random, html, io
+from PIL import UnidentifiedImageError
+import random, html, io, math
 from pathlib import Path
 from db import supabase
+from src.utils.auth import clear_profile, current_user_id
+from src.utils.images import load_screenshot, preview_image
+from src.utils.ratelimit import submission_limiter
+from src.utils.stats import challenges_for, user_stats
+from src.data.history import UserHistory
+from src.data.rollup import MAX_DAYS_AHEAD
+from src.data.submissions import (
+    SubmissionQueueFull, build_form_row, discard_failed, get_journal, needs_evidence, start_flusher,
+    valid_form_date,
+)
+from src.data.submissions import submit as submit_submission
+from src.data.seasons import check_season, get_active_season_start
 from streamlit.components.v1 import html as st_html
 
 # ------------------ PAGE CONFIG ------------------
 logo_path2 = Path(__file__).resolve().parent / "assets" / "logo3.png"
 st.set_page_config(page_title="🏃 Movember Step Tracker", layout="wide", page_icon=logo_path2)
 
-UPLOAD_FOLDER = "uploads"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5 MB
 
 # ------------------ LOGO ------------------
@@ -55,42 +64,30 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ------------------ HELPERS ------------------
-def secure_filename(filename):
-    if not filename: return "file"
-    filename = os.path.basename(filename)
-    filename = unicodedata.normalize("NFKD", filename).encode("utf-8", "ignore").decode("utf-8")
-    filename = re.sub(r"[^A-Za-z0-9.\-_]", "_", filename)
-    return filename[:255]
-
-def get_user_id(username):
-    try:
-        res = supabase.table("users").select("user_id").eq("user_name", username).execute()
-        if res.data: return res.data[0]["user_id"]
-    except Exception: pass
-    return None
+def get_screenshot(upload):
+    """(evidence image, preview) for an upload, decoded once and kept across reruns."""
+    cached = st.session_state.get("screenshot")
+    if cached and cached[0] == upload.file_id:
+        return cached[1], cached[2]
+    img = load_screenshot(upload.getvalue())
+    preview = preview_image(img)
+    st.session_state.screenshot = (upload.file_id, img, preview)
+    return img, preview
+
+def get_history(user_id):
+    history = st.session_state.get("history")
+    if history is None or history.user_id != user_id:
+        history = st.session_state.history = UserHistory(user_id)
+    return history
 
 def fetch_user_forms(user_id):
+    history = get_history(user_id)
     try:
-        res = supabase.table("forms").select("*").eq("user_id", user_id).execute()
-        return pd.DataFrame(res.data) if res.data else pd.DataFrame()
-    except Exception:
-        return pd.DataFrame()
-
-def get_last_submission_time(user_id):
-    try:
-        response = (
-            supabase.table("forms")
-            .select("form_created_at")
-            .eq("user_id", user_id)
-            .order("form_created_at", desc=True)
-            .limit(1)
-            .execute()
-        )
-        if response.data and len(response.data) == 1:
-            return datetime.fromisoformat(response.data[0]["form_created_at"])
+        history.refresh(supabase)
     except Exception:
         pass
-    return None
+    # Include submissions still waiting in the write-behind journal
+    return history.frame(extra=get_journal().pending_for_user(user_id))
 
 # ------------------ LOGIN ------------------
 if not st.session_state.get("logged_in"):
@@ -98,96 +95,139 @@ if not st.session_state.get("logged_in"):
     st.stop()
 
 username = st.session_state.get("username")
-user_id = get_user_id(username)
+try:
+    user_id = current_user_id(st.session_state, supabase)
+except Exception:
+    user_id = None
 if not user_id:
     st.error("User not found.")
     st.stop()
 
 safe_username = html.escape(username)
+start_flusher(supabase)
 st.sidebar.markdown(f"<h3 style='color:#603494;'>Welcome, {safe_username}!</h3>", unsafe_allow_html=True)
 if st.sidebar.button("Logout"):
-    st.session_state.logged_in = False
-    st.session_state.username = ""
+    clear_profile(st.session_state)
     st.rerun()
 
 # ------------------ TABS ------------------
 tab1, tab2 = st.tabs(["➕ Submit Steps", "📊 Daily Progress"])
 
 # ------------------ TAB 1: SUBMIT STEPS ------------------
-with tab1:
+# Each tab is a fragment, so interacting with one tab's widgets reruns only that
+# tab instead of the whole script (and the other tab's queries and chart).
+@st.fragment
+def submit_tab():
     st.header("➕ Submit Your Steps")
+    flash = st.session_state.pop("submit_flash", None)
+    if flash:
+        st.success(flash)
+        st.balloons()
+
     date_col, step_col = st.columns(2)
-    with date_col: step_date = st.date_input("Date")
+    season_start = get_active_season_start(supabase)
+    with date_col:
+        step_date = st.date_input("Date", min_value=season_start,
+                                  max_value=date.today() + timedelta(days=MAX_DAYS_AHEAD))
     with step_col: steps = st.number_input("Step Count", min_value=0, step=100)
     screenshot = st.file_uploader("Upload Screenshot (PNG/JPG)", type=["png", "jpg", "jpeg"])
 
     if screenshot:
         if screenshot.size > MAX_UPLOAD_SIZE:
-            st.error("File too large. Max 5 MB."); st.stop()
+            st.error("File too large. Max 5 MB."); return
         try:
-            img = Image.open(screenshot)
-            img.thumbnail((600, 600))
-            st.image(img, caption="Preview", width=300)
+            st.image(get_screenshot(screenshot)[1], caption="Preview", width=300)
         except UnidentifiedImageError:
-            st.error("Invalid image."); st.stop()
+            st.error("Invalid image."); return
 
     if st.button("Submit"):
-        now = datetime.now()
-        last_submission = st.session_state.get("last_submission_time") or get_last_submission_time(user_id)
-
-        # --- 1-minute cooldown check ---
-        if last_submission and now - last_submission < timedelta(seconds=60): # Brian wicks wanted this changed :)
-            remaining = timedelta(seconds=60) - (now - last_submission)
-            minutes, seconds = divmod(remaining.total_seconds(), 60)
-            st.warning(f"⏳ Please wait {int(seconds)}s before submitting again.")
+        # --- 1-minute cooldown, shared by all of the user's sessions ---
+        allowed, retry_after, rate_token = submission_limiter.try_acquire(user_id)
+        if not allowed:
+            st.warning(f"⏳ Please wait {math.ceil(retry_after)}s before submitting again.")
         elif steps <= 0 or steps > 100000:
+            submission_limiter.refund(user_id, rate_token)
             st.error("Enter a valid step count (1–100,000).")
+        elif not valid_form_date(step_date, season_start):
+            submission_limiter.refund(user_id, rate_token)
+            st.error("Pick a date in the current challenge, and not in the future.")
         elif not screenshot:
+            submission_limiter.refund(user_id, rate_token)
             st.error("Please upload a screenshot.")
         else:
             try:
-                img = Image.open(screenshot).convert("RGB")
-                filename = secure_filename(f"{safe_username}_{step_date}_{datetime.now().strftime('%H%M%S')}.jpg")
-                path = os.path.join(UPLOAD_FOLDER, filename)
-                img.save(path, format="JPEG", quality=85, optimize=True)
-                supabase.table("forms").insert({
-                    "form_filepath": filename,
-                    "form_stepcount": steps,
-                    "form_date": str(step_date),
-                    "user_id": user_id,
-                    "form_verified": False
-                }).execute()
-
-                # Delete the image if steps are under 10,000 (not required for verification)
-                if steps < 10000:
-                    try:
-                        os.remove(path)
-                    except FileNotFoundError:
-                        pass
-
-                # Record new submission time
-                st.session_state.last_submission_time = now
-
-                st.success("✅ Step count submitted successfully!")
-                st.balloons()
+                # Decide up front whether evidence is kept; low-step submissions never touch disk
+                img = get_screenshot(screenshot)[0] if needs_evidence(steps) else None
+                row = build_form_row(user_id, steps, step_date, season_id=check_season(supabase))
+
+                # Encode, store and journal on the worker pool; the page acknowledges now
+                st.session_state.pending_submission = submit_submission(row, img, user_name=username)
+                st.session_state.submission_rate_token = rate_token
+                st.session_state.pop("screenshot", None)
+                st.rerun()
+            except SubmissionQueueFull:
+                submission_limiter.refund(user_id, rate_token)
+                st.warning("⏳ The server is busy saving other submissions. Please try again in a moment.")
             except Exception as e:
+                submission_limiter.refund(user_id, rate_token)
                 st.error("Error processing upload.")
                 st.exception(e)
 
+    if st.session_state.get("pending_submission"):
+        submission_status()
+
+# Polls the pending submission once a second until the worker finishes
+@st.fragment(run_every=1)
+def submission_status():
+    handle = st.session_state.get("pending_submission")
+    if handle is None:
+        return
+    if not handle.done():
+        st.info(f"📨 Submission of {handle.steps:,} steps for {handle.form_date} received, saving…")
+        return
+    st.session_state.pending_submission = None
+    error = handle.error()
+    if error:
+        # Failed saves don't count towards the cooldown
+        submission_limiter.refund(user_id, st.session_state.pop("submission_rate_token", None))
+        st.error("Error saving your submission. Please try again.")
+        st.exception(error)
+        return
+    get_history(user_id).add_local(handle.row())
+    # Full rerun so Daily Progress picks up the new row
+    st.session_state.submit_flash = "✅ Step count submitted successfully!"
+    st.rerun()
+
+with tab1:
+    submit_tab()
+
 # ------------------ TAB 2: DAILY PROGRESS ------------------
-with tab2:
+@st.fragment
+def progress_tab():
     st.header("📊 Daily Progress")
+    # Submissions the database kept rejecting; they are not counted below
+    for entry in get_journal().failed_entries(user_id):
+        warn_col, dismiss_col = st.columns([5, 1])
+        warn_col.warning(
+            f"⚠️ Your submission of {entry['form_stepcount']:,} steps for {entry['form_date']} could not be saved. "
+            "Admins can see it too; you can dismiss it and submit again."
+        )
+        dismiss_col.button(
+            "Dismiss", key=f"dismiss_{entry['submission_id']}",
+            on_click=discard_failed, args=([entry["submission_id"]],),
+        )
     df = fetch_user_forms(user_id)
 
     if df.empty:
         st.info("No submissions yet.")
     else:
-        df["form_date"] = pd.to_datetime(df["form_date"]).dt.date
-        daily_steps = df.groupby("form_date")["form_stepcount"].sum().reset_index()
-        total_steps = int(df["form_stepcount"].sum())
-        today_steps = int(daily_steps[daily_steps["form_date"] == datetime.now().date()]["form_stepcount"].sum())
-        days_participated = len(daily_steps)
-        avg_steps = int(daily_steps["form_stepcount"].mean())
+        stats = user_stats(df["form_date"], df["form_stepcount"], datetime.now().date())
+        daily_steps = pd.DataFrame({"form_date": stats["days"], "form_stepcount": stats["daily_steps"]})
+        total_steps = stats["total_steps"]
+        today_steps = stats["today_steps"]
+        days_participated = stats["days_participated"]
+        avg_steps = stats["avg_steps"]
+        streak = stats["current_streak"]
         distance_km = round(total_steps * 0.0008, 2)
         calories = int(total_steps * 0.04)
 
@@ -214,48 +254,21 @@ with tab2:
         st.plotly_chart(fig, use_container_width=True, config={"staticPlot": True})
 
         # --- Streak ---
-        sorted_dates = sorted(daily_steps["form_date"])
-        streak = 0
-        if sorted_dates:
-            streak = 1
-            for i in range(len(sorted_dates) - 1, 0, -1):
-                if (sorted_dates[i] - sorted_dates[i - 1]) == timedelta(days=1):
-                    streak += 1
-                else:
-                    break
-            if sorted_dates[-1] != datetime.now().date():
-                streak = 0
         st.success(f"🔥 Current Streak: {streak} days" if streak else "No active streak.")
 
         # ------------------ EXPANDER: BADGES & ACHIEVEMENTS ------------------
         with st.expander("🏅 View Badges & Achievements", expanded=False):
-            def calculate_badges(total_steps, streak):
-                badges = []
-                if total_steps >= 10000: badges.append("10K Steps")
-                if total_steps >= 50000: badges.append("50K Steps")
-                if total_steps >= 100000: badges.append("100K Steps")
-                if streak >= 7: badges.append("7-Day Streak")
-                if total_steps >= 200000: badges.append("Mo’ Legend")
-                return badges
-
-            def get_user_level(total_steps):
-                if total_steps < 50000: return "🌱 Mo’ Rookie"
-                elif total_steps < 150000: return "💪 Mo’ Pro"
-                else: return "🏆 Mo’ Champion"
-
-            badges = calculate_badges(total_steps, streak)
-            level = get_user_level(total_steps)
+            badges = stats["badges"]
+            level = stats["level"]
 
             st.subheader("🎮 Your Rank")
             st.markdown(f"<h2 style='color:#603494;'>{level}</h2>", unsafe_allow_html=True)
 
             # Progress bar to next level
-            level_thresholds = {"Mo’ Rookie": 0, "Mo’ Pro": 50000, "Mo’ Champion": 150000}
-            next_level = "Mo’ Pro" if total_steps < 50000 else "Mo’ Champion" if total_steps < 150000 else None
-            if next_level:
-                progress = total_steps / level_thresholds[next_level]
-                st.progress(min(progress, 1.0))
-                st.info(f"🚀 {level_thresholds[next_level] - total_steps:,} steps to reach {next_level}!")
+            if stats["next_level"]:
+                next_level, threshold, progress = stats["next_level"]
+                st.progress(progress)
+                st.info(f"🚀 {threshold - total_steps:,} steps to reach {next_level}!")
             else:
                 st.success("🎉 You’re a Mo’ Champion! Keep inspiring others!")
 
@@ -268,19 +281,16 @@ with tab2:
                 st.info("No badges yet. Keep walking!")
 
             st.subheader("🔥 Challenges")
-            challenges = []
-            if today_steps < 10000:
-                challenges.append(f"Hit 10,000 steps today! You’re at {today_steps:,}.")
-            if streak < 7:
-                challenges.append(f"Build a 7-day streak! Current: {streak} days.")
-            if total_steps < 100000:
-                challenges.append("Reach 100,000 steps milestone!")
+            challenges = challenges_for(today_steps, streak, total_steps)
             if not challenges:
                 st.success("All challenges crushed! 🏆")
             else:
                 for c in challenges:
                     st.write(f"- {c}")
 
+with tab2:
+    progress_tab()
+
 # ------------------ FOOTER ------------------
 carousel_msgs = [
     "💡 Movember Tip: Walking meetings are great for adding steps!",
@@ -0,0 +1,62 @@
+"""Concurrent login latency: the old authenticate() against src/utils/passwords.py.
+
+Old: every attempt hashes a fresh decoy with bcrypt.gensalt() and then checks
+the password, both on the caller's thread. New: the decoy is made once and the
+check runs on the bounded bcrypt pool. Each login is one thread, all started
+together, to mimic the morning rush.
+
+Run from streamlit-app/:  python -m benchmarks.bench_login [rounds]
+(the default cost of 10 keeps the run short; the app's hashes use 12)
+"""
+
+import statistics
+import sys
+import threading
+import time
+
+import bcrypt
+
+from src.utils.passwords import BcryptPool
+
+PASSWORD = b"correct horse"
+
+
+def old_login(stored_hash, rounds):
+    bcrypt.hashpw(b"fakepassword", bcrypt.gensalt(rounds))  # paid on every attempt
+    return bcrypt.checkpw(PASSWORD, stored_hash)
+
+
+def run(login, concurrency):
+    latencies = [0.0] * concurrency
+    barrier = threading.Barrier(concurrency)
+
+    def worker(i):
+        barrier.wait()
+        start = time.perf_counter()
+        login()
+        latencies[i] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    wall = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - wall
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    return statistics.median(latencies) * 1000, p95 * 1000, latencies[-1] * 1000, concurrency / wall
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    stored_hash = bcrypt.hashpw(PASSWORD, bcrypt.gensalt(rounds))
+    print(f"bcrypt cost {rounds}")
+    print(f"{'logins':>6} {'':4} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'logins/s':>9} {'peak queue':>10}")
+    for concurrency in (50, 100, 200):
+        row = run(lambda: old_login(stored_hash, rounds), concurrency)
+        print(f"{concurrency:6} {'old':4} {row[0]:8.0f} {row[1]:8.0f} {row[2]:8.0f} {row[3]:9.1f}")
+        pool = BcryptPool()
+        row = run(lambda: pool.checkpw(PASSWORD, stored_hash), concurrency)
+        print(f"{concurrency:6} {'new':4} {row[0]:8.0f} {row[1]:8.0f} {row[2]:8.0f} {row[3]:9.1f} "
+              f"{pool.stats()['peak_queue_depth']:10}")
@@ -0,0 +1,65 @@
+"""Compare the old screenshot handling with src/utils/images.py.
+
+Old: decode for the preview, decode again on submit, save full resolution
+with optimize=True. New: decode once (JPEG draft scaling), cap to
+EVIDENCE_MAX_SIDE, reuse for preview and storage.
+
+Run from streamlit-app/:  python -m benchmarks.bench_screenshot
+"""
+
+import io
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from src.utils.images import encode_jpeg, load_screenshot, preview_image
+
+
+def make_upload(fmt, size, noise, seed=0):
+    """Synthetic phone upload: smooth gradient plus noise, roughly 3-5 MB."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    base = np.linspace(0, 255, w, dtype=np.float32)[None, :, None].repeat(h, 0).repeat(3, 2)
+    pixels = np.clip(base + rng.normal(0, noise, (h, w, 3)), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format=fmt, **({"quality": 95} if fmt == "JPEG" else {}))
+    return buf.getvalue()
+
+
+def old_pipeline(data):
+    img = Image.open(io.BytesIO(data))
+    img.thumbnail((600, 600))
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=85, optimize=True)
+    return buf.getvalue()
+
+
+def new_pipeline(data):
+    img = load_screenshot(data)
+    preview_image(img)
+    return encode_jpeg(img)
+
+
+def bench(fn, data, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(data)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, len(out)
+
+
+if __name__ == "__main__":
+    cases = [
+        ("JPEG photo 4032x3024", make_upload("JPEG", (4032, 3024), noise=6)),
+        ("PNG screenshot 1290x2796", make_upload("PNG", (1290, 2796), noise=2)),
+    ]
+    print(f"{'upload':28} {'MB':>5} {'old ms':>8} {'new ms':>8} {'old KB':>8} {'new KB':>8}")
+    for name, data in cases:
+        old_ms, old_len = bench(old_pipeline, data)
+        new_ms, new_len = bench(new_pipeline, data)
+        print(f"{name:28} {len(data) / 2**20:5.1f} {old_ms:8.0f} {new_ms:8.0f} "
+              f"{old_len / 1024:8.0f} {new_len / 1024:8.0f}")
@@ -1,15 +1,22 @@
 import streamlit as st
 import os
-import shutil
-import zipfile
-import io
 import pandas as pd
 import re
 import unicodedata
 import time
 from db import supabase
+from src.utils.auth import clear_profile, is_admin
+from src.utils.passwords import bcrypt_pool, check_password
+from src.data.evidence import get_evidence_store
+from src.data.exports import HISTORY_FORMATS, VERIFIED_FILTERS, evidence_zip, has_evidence, history_export
+from src.data.identity import get_directory
+from src.data.moderation import delete_forms, verify_forms
+from src.data.seasons import SeasonArchiveRunning, cached_seasons, current_job, get_active_season_id, start_new_season
+from src.data.review_queue import QUEUE_ORDERS, QUEUE_PAGE_SIZE, count_review_queue, fetch_review_page
+from src.data.submissions import EVIDENCE_MIN_STEPS, discard_failed, get_journal
+from src.data.rollup import fetch_daily_totals
+from src.utils.stats import all_user_stats
 import random
-import bcrypt
 from pathlib import Path
 from streamlit.components.v1 import html as st_html
 
@@ -96,8 +103,7 @@ if not st.session_state.get("logged_in"):
     st.stop()
 
 username = st.session_state.get("username", "")
-user_resp = supabase.table("users").select("user_admin").eq("user_name", username).limit(1).execute()
-if not user_resp.data or not user_resp.data[0].get("user_admin", False):
+if not is_admin(st.session_state, supabase):
     st.error("Access denied: Admins only.")
     st.stop()
 
@@ -115,49 +121,65 @@ def secure_filename(filename: str, max_length: int = 255) -> str:
 # ------------------ CONFIG & STATE ------------------
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+evidence_store = get_evidence_store()
 
 # replace old confirm state with a simpler pending_delete entry
 if "pending_delete" not in st.session_state:
     st.session_state["pending_delete"] = None
 if "confirm_clear" not in st.session_state:
     st.session_state["confirm_clear"] = False
+# form_id -> queue row, kept across queue pages
+if "queue_selected" not in st.session_state:
+    st.session_state["queue_selected"] = {}
 
 # ------------------ FETCH DATA FROM SUPABASE ------------------
+def fetch_queue_page(order, after):
+    """One page of the review queue, with names from the cached user directory."""
+    rows = fetch_review_page(supabase, order, after, QUEUE_PAGE_SIZE, EVIDENCE_MIN_STEPS)
+    if not rows:
+        return pd.DataFrame()
+    directory = get_directory(supabase)
+    for row in rows:
+        row["user_name"] = directory.user_name(row["user_id"]) or "unknown"
+    return pd.DataFrame(rows)
+
 def fetch_all_submissions():
     forms = supabase.table("forms") \
         .select("*") \
+        .eq("season_id", get_active_season_id(supabase)) \
         .eq("form_verified", False) \
-        .gt("form_stepcount", 9999) \
+        .gte("form_stepcount", EVIDENCE_MIN_STEPS) \
         .execute().data
-    users = supabase.table("users").select("user_id, user_name").execute().data
     if not forms:
         return pd.DataFrame()
     df_forms = pd.DataFrame(forms)
-    df_users = pd.DataFrame(users)
+    df_users = get_directory(supabase).to_frame()
     return pd.merge(df_forms, df_users, on="user_id")
 
-df = fetch_all_submissions()
-
 # ------------------ SIMPLE CONFIRM DELETE (CSS-RESISTANT) ------------------
 # Show a minimal confirmation widget when a pending delete is set.
+# pending_delete holds a list of queue rows (one for a row's Delete button, many for a batch).
+def finish_batch(result):
+    """Remember the outcome for the next run, clear the selection and refresh once."""
+    st.session_state["queue_summary"] = (result.error is None and not result.failed, result.summary())
+    for form_id in result.succeeded:
+        st.session_state["queue_selected"].pop(form_id, None)
+    st.rerun()
+
 if st.session_state["pending_delete"]:
-    pd = st.session_state["pending_delete"]
-    st.warning(f"Are you sure you want to permanently delete the submission for **{pd['user_name']}** on **{pd['form_date']}**?")
+    pending = st.session_state["pending_delete"]
+    if len(pending) == 1:
+        st.warning(f"Are you sure you want to permanently delete the submission for **{pending[0]['user_name']}** on **{pending[0]['form_date']}**?")
+    else:
+        st.warning(f"Are you sure you want to permanently delete the **{len(pending)}** selected submissions?")
     confirm_cb = st.checkbox("I understand this will permanently delete the submission.", key="confirm_delete_cb")
     colA, colB = st.columns(2)
     with colA:
         # Delete button is disabled until the checkbox is ticked
         if st.button("✅ Delete", disabled=not confirm_cb):
-            try:
-                supabase.table("forms").delete().eq("form_id", pd["form_id"]).execute()
-                safe_name = secure_filename(os.path.basename(str(pd.get("file", ""))))
-                file_path = os.path.join(UPLOAD_FOLDER, safe_name)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception:
-                st.error("Error deleting submission.")  # keep message generic
             st.session_state["pending_delete"] = None
-            st.rerun()
+            # Unlinks evidence files only if no other submission shares them
+            finish_batch(delete_forms(supabase, pending))
     with colB:
         if st.button("❌ Cancel", key="cancel_delete_btn"):
             st.session_state["pending_delete"] = None
@@ -165,120 +187,302 @@ if st.session_state["pending_delete"]:
 
 # ------------------ SIDEBAR ------------------
 st.sidebar.markdown(f"<h3 style='color:#603494;'>Welcome, {username}!</h3>", unsafe_allow_html=True)
+login_load = bcrypt_pool.stats()
+st.sidebar.caption(
+    f"🔑 Password checks: {login_load['queue_depth']} queued, {login_load['running']}/{login_load['workers']} running, "
+    f"peak queue {login_load['peak_queue_depth']}, avg wait {login_load['avg_wait_ms']:.0f} ms"
+)
 if st.sidebar.button("Logout"):
-    st.session_state.logged_in = False
-    st.session_state.username = ""
+    clear_profile(st.session_state)
     st.rerun()
 
 # ------------------ 1. HIGH-STEP SUBMISSIONS (>10,000) ------------------
 st.subheader("📊 Unverified Submissions (Steps > 10,000)")
 
+def submission_id(row):
+    sid = row.get("form_submission_id")
+    return sid if isinstance(sid, str) else None  # older rows have none
+
+def queue_row(row):
+    """Plain dict of what verify/delete need from a queue DataFrame row."""
+    filepath = row.get("form_filepath")
+    return {
+        "form_id": int(row["form_id"]),
+        "form_submission_id": submission_id(row),
+        "user_id": int(row["user_id"]),
+        "user_name": row["user_name"],
+        "form_stepcount": int(row["form_stepcount"]),
+        "form_date": str(row["form_date"]),
+        "form_filepath": secure_filename(str(filepath)) if isinstance(filepath, str) and filepath else None,
+    }
+
+def toggle_selected(row):
+    if st.session_state[f"sel_{row['form_id']}"]:
+        st.session_state["queue_selected"][row["form_id"]] = row
+    else:
+        st.session_state["queue_selected"].pop(row["form_id"], None)
+
+def select_page(rows):
+    for row in rows:
+        st.session_state["queue_selected"][row["form_id"]] = row
+
+def clear_selection():
+    st.session_state["queue_selected"] = {}
+
+def next_queue_page(last_row):
+    st.session_state.queue_pages.append((last_row["sort_key"], int(last_row["form_id"])))
+
+def prev_queue_page():
+    if len(st.session_state.queue_pages) > 1:
+        st.session_state.queue_pages.pop()
+
+try:
+    queue_size = count_review_queue(supabase, EVIDENCE_MIN_STEPS)
+    st.badge(f"{queue_size:,} awaiting review", color="violet")
+except Exception:
+    pass  # the badge is informational only
+order_label = st.selectbox("Order", list(QUEUE_ORDERS), key="queue_order")
+# queue_pages holds the keyset cursor for each page visited; a new order starts over
+if st.session_state.get("queue_pages_order") != order_label or "queue_pages" not in st.session_state:
+    st.session_state.queue_pages_order = order_label
+    st.session_state.queue_pages = [None]
+df = fetch_queue_page(QUEUE_ORDERS[order_label], st.session_state.queue_pages[-1])
+page_rows = [queue_row(r) for _, r in df.iterrows()]
+
+summary = st.session_state.pop("queue_summary", None)
+if summary:
+    ok, message = summary
+    (st.success if ok else st.warning)(message)
+
+# --- Batch actions on the selection (which can span pages) ---
+selected = st.session_state["queue_selected"]
+bulk1, bulk2, bulk3, bulk4 = st.columns(4)
+bulk1.button("☑️ Select page", on_click=select_page, args=(page_rows,), disabled=not page_rows)
+bulk2.button("Clear selection", on_click=clear_selection, disabled=not selected)
+if bulk3.button(f"✅ Verify selected ({len(selected)})", disabled=not selected):
+    finish_batch(verify_forms(supabase, list(selected.values())))
+if bulk4.button(f"❌ Delete selected ({len(selected)})", disabled=not selected):
+    st.session_state["pending_delete"] = list(selected.values())
+    st.rerun()
+
 if not df.empty:
-    for idx, row in df.iterrows():
+    duplicates = evidence_store.duplicates([submission_id(r) for _, r in df.iterrows()])
+    names = get_directory(supabase)
+    for (_, row), item in zip(df.iterrows(), page_rows):
         col1, col2, col3 = st.columns([1, 3, 2])
         safe_name = secure_filename(os.path.basename(str(row.get("form_filepath", ""))))
         file_path = os.path.join(UPLOAD_FOLDER, safe_name)
 
+        thumb_path = evidence_store.thumbnail_for(safe_name)
         with col1:
-            if os.path.exists(file_path):
-                st.image(file_path, width=100)
+            # Thumbnails are generated at upload (or by scripts/backfill_thumbnails.py)
+            if os.path.exists(thumb_path):
+                st.image(thumb_path, width=100)
             else:
                 st.warning("No preview available.")
 
         with col2:
             st.markdown(f"**Name:** {row['user_name']} | **Date:** {row['form_date']} | **Steps:** {row['form_stepcount']}")
-            with st.expander("View Full Screenshot"):
+            matches = duplicates.get(submission_id(row))
+            if matches:
+                kind = "Same screenshot" if any(m["exact"] for m in matches) else "Near-identical screenshot"
+                seen = ", ".join(f"{names.user_name(m['user_id']) or 'unknown'} ({m['form_date']})" for m in matches[:5])
+                st.warning(f"⚠️ Duplicate evidence: {kind.lower()} also submitted by {seen}")
+            # Expander bodies run on every rerun; a toggle reads the full file only when opened
+            if st.toggle("View Full Screenshot", key=f"full_{row['form_id']}"):
                 if os.path.exists(file_path):
                     st.image(file_path, caption=f"Screenshot for {row['user_name']}", width="stretch")
                 else:
                     st.warning("Screenshot not found.")
 
         with col3:
-            if st.button("✅ Verify", key=f"verify_{idx}"):
-                try:
-                    supabase.table("forms") \
-                        .update({"form_verified": True}) \
-                        .eq("form_id", row["form_id"]) \
-                        .execute()
-
-                    # Delete the image from uploads after verification, not needed anymore
-                    try:
-                        os.remove(file_path)
-                    except FileNotFoundError:
-                        pass
-
-                except Exception as e:
-                    st.error(f"Error verifying form, please try again later.")
-                st.rerun()
-            if st.button("❌ Delete", key=f"delete_{idx}"):
-                # set a small pending_delete dict rather than relying on index
-                st.session_state["pending_delete"] = {
-                    "form_id": row["form_id"],
-                    "user_name": row["user_name"],
-                    "form_date": row["form_date"],
-                    "file": row.get("form_filepath", "")
-                }
+            st.checkbox(
+                "Select", value=item["form_id"] in selected, key=f"sel_{item['form_id']}",
+                on_change=toggle_selected, args=(item,),
+            )
+            if st.button("✅ Verify", key=f"verify_{row['form_id']}"):
+                # Drops this submission's reference to the image; the file goes with the last one
+                finish_batch(verify_forms(supabase, [item]))
+            if st.button("❌ Delete", key=f"delete_{row['form_id']}"):
+                # set a small pending_delete list rather than relying on index
+                st.session_state["pending_delete"] = [item]
                 st.rerun()
         st.markdown("---")
+elif len(st.session_state.queue_pages) > 1:
+    st.info("No more submissions in the queue.")
 else:
     st.info("No high-step unverified submissions found.")
 
+page_no = len(st.session_state.queue_pages)
+nav1, nav2, nav3 = st.columns([1, 2, 1])
+nav1.button("⬅️ Previous", on_click=prev_queue_page, disabled=page_no == 1, key="queue_prev")
+nav2.markdown(f"<div style='text-align:center;'>Page {page_no}</div>", unsafe_allow_html=True)
+nav3.button(
+    "Next ➡️", key="queue_next", disabled=len(df) < QUEUE_PAGE_SIZE,
+    on_click=next_queue_page, args=(df.iloc[-1] if not df.empty else None,),
+)
+
+# --- Submissions the database kept rejecting (parked in this server's journal) ---
+parked = get_journal().failed_entries()
+if parked:
+    with st.expander(f"⚠️ Submissions that could not be saved ({len(parked)})"):
+        st.dataframe(
+            pd.DataFrame(parked)[["user_name", "form_date", "form_stepcount", "attempts", "last_error"]],
+            hide_index=True,
+        )
+        parked_ids = [entry["submission_id"] for entry in parked]
+        retry_col, discard_col = st.columns(2)
+        if retry_col.button("🔁 Retry all"):
+            get_journal().retry(parked_ids)
+            st.rerun()
+        if discard_col.button("🗑️ Discard all"):
+            discard_failed(parked_ids)  # also releases their evidence
+            st.rerun()
+
 # ------------------ 2. DOWNLOAD STEP DATA ------------------
 st.subheader("📥 Download Step Data")
-if not df.empty:
-    csv_data = df.to_csv(index=False)
-    st.download_button("Download Step Data CSV", csv_data, file_name="step_data.csv")
-else:
-    st.info("No step data available.")
+# The whole queue is only fetched when an admin asks for it
+if st.button("Prepare Step Data CSV"):
+    try:
+        st.session_state["step_data_csv"] = fetch_all_submissions().to_csv(index=False)
+    except Exception:
+        st.error("Error fetching step data.")
+if st.session_state.get("step_data_csv"):
+    st.download_button("Download Step Data CSV", st.session_state["step_data_csv"], file_name="step_data.csv")
+
+# Complete forms history with user names, paged and streamed when the button is clicked
+seasons = cached_seasons(supabase)
+season_names = {s["season_id"]: s["season_name"] for s in seasons}
+hcol1, hcol2 = st.columns(2)
+with hcol1:
+    history_season = st.selectbox(
+        "Season", [None] + list(season_names), key="history_season",
+        format_func=lambda sid: "All seasons" if sid is None else season_names[sid],
+    )
+with hcol2:
+    history_format = st.radio("Full history format", HISTORY_FORMATS, horizontal=True, key="history_format")
+
+def build_history_export():
+    return history_export(supabase, get_directory(supabase), history_format, history_season)
+
+st.download_button(
+    f"Download Full History ({history_format})",
+    build_history_export,
+    file_name=f"step_history{'' if history_season is None else f'_season_{history_season}'}.{'parquet' if history_format == 'Parquet' else 'csv'}",
+    mime="application/vnd.apache.parquet" if history_format == "Parquet" else "text/csv",
+)
 
-# ------------------ 3. EVIDENCE FOLDER ------------------
+# ------------------ 3. PARTICIPANT PROGRESS REPORT ------------------
+st.subheader("📈 Participant Progress Report")
+if st.button("Generate Progress Report"):
+    try:
+        # One row per user per day, then streaks/levels/badges for everyone in one vectorised pass
+        daily = fetch_daily_totals(supabase)
+        report = all_user_stats(
+            [r["user_id"] for r in daily],
+            [r["form_date"] for r in daily],
+            [r["total_steps"] for r in daily],
+        )
+        report = report.merge(get_directory(supabase).to_frame(), on="user_id", how="left")
+        st.session_state["progress_report"] = report.sort_values(
+            ["current_streak", "total_steps"], ascending=False
+        )[["user_name", "total_steps", "days_participated", "current_streak", "longest_streak", "level", "badges"]]
+    except Exception:
+        st.error("Error building progress report.")
+
+if st.session_state.get("progress_report") is not None:
+    st.dataframe(st.session_state["progress_report"], hide_index=True, width="stretch")
+    st.download_button(
+        "Download Progress Report CSV",
+        st.session_state["progress_report"].to_csv(index=False),
+        file_name="progress_report.csv",
+    )
+
+# ------------------ 4. EVIDENCE FOLDER ------------------
 st.subheader("📂 Evidence Folder")
 folder_path = os.path.abspath(UPLOAD_FOLDER)
 st.markdown(f"Path: `{folder_path}`")
 
-if os.path.exists(UPLOAD_FOLDER) and os.listdir(UPLOAD_FOLDER):
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w") as zipf:
-        for root, _, files in os.walk(UPLOAD_FOLDER):
-            for file in files:
-                zipf.write(os.path.join(root, file), arcname=file)
-    zip_buffer.seek(0)
-    st.download_button("Download All Evidence as ZIP", zip_buffer, file_name="evidence.zip")
+if has_evidence(UPLOAD_FOLDER):
+    directory = get_directory(supabase)
+    zcol1, zcol2, zcol3 = st.columns(3)
+    with zcol1:
+        zip_dates = st.date_input("Submission dates", value=(), key="zip_dates")
+    with zcol2:
+        zip_user = st.selectbox("User", ["All users"] + directory.names(), key="zip_user")
+    with zcol3:
+        zip_verified = st.selectbox("Verified state", list(VERIFIED_FILTERS), key="zip_verified")
+    zip_filters = {
+        "start": zip_dates[0] if len(zip_dates) > 0 else None,
+        "end": zip_dates[-1] if len(zip_dates) > 0 else None,
+        "user_id": None if zip_user == "All users" else directory.user_id(zip_user),
+        "verified": VERIFIED_FILTERS[zip_verified],
+        "season_id": get_active_season_id(supabase),
+    }
+
+    def build_evidence_zip():
+        # Called only when the button is clicked, on Streamlit's download thread
+        return evidence_zip(supabase, UPLOAD_FOLDER, directory, **zip_filters)
+
+    st.download_button("Download Evidence as ZIP", build_evidence_zip, file_name="evidence.zip", mime="application/zip")
 else:
     st.info("No evidence files found.")
 
 
-# ------------------ 4. RESET CHALLENGE DATA ------------------
-st.subheader("⚠️ Reset Challenge Data")
+# ------------------ 5. SEASONS ------------------
+st.subheader("🗓️ Seasons")
+
+# Polls the archive job once a second while it runs
+@st.fragment(run_every=1)
+def archive_progress():
+    job = current_job()
+    if job is None:
+        return
+    if not job.finished:
+        st.progress(job.progress(), text=f"Archiving season {job.season_id}: {job.phase} ({job.done:,}/{job.total:,})")
+    elif job.error:
+        st.error(f"Archiving season {job.season_id} failed. Please check logs.")
+    elif job.archive_path:
+        st.success(f"✅ Season {job.season_id} archived to `{job.archive_path}`.")
+
+archive_progress()
+
+if seasons:
+    st.dataframe(
+        pd.DataFrame(seasons)[["season_id", "season_name", "started_at", "ended_at", "archive_path"]],
+        hide_index=True, width="stretch",
+    )
 
 if not st.session_state.get("confirm_clear"):
-    if st.button("Clear All Data"):
+    if st.button("Start New Season"):
         st.session_state["confirm_clear"] = True
         st.rerun()
 else:
-    st.warning("This will permentantly delete ALL form submissions and uploaded screenshots. This action cannot be undone.")
+    st.warning("This ends the current season: the leaderboard starts empty, and the current season's submissions and screenshots are archived in the background. Archived seasons stay available for export.")
 
     # --- RE-AUTHENTICATION STEP ---
     with st.form("reauth_form"):
+        season_name = st.text_input("New season name:")
         admin_password = st.text_input("Re-enter your password to confirm:", type="password")
-        submitted = st.form_submit_button("✅ Confirm and Delete")
+        submitted = st.form_submit_button("✅ Confirm and Start Season")
 
         if submitted:
             try:
                 # Get stored password hash
                 resp = supabase.table("users").select("user_password").eq("user_name", username).limit(1).execute()
                 if resp.data:
-                    stored_hash = resp.data[0]["user_password"].encode("utf-8")
-                    if bcrypt.checkpw(admin_password.encode("utf-8"), stored_hash):
-                        # Auth OK — proceed with deletion
+                    if not season_name.strip():
+                        st.error("Enter a name for the new season.")
+                    elif check_password(admin_password, resp.data[0]["user_password"]):
+                        # Auth OK — switch seasons; archiving runs in the background
                         try:
-                            supabase.table("forms").delete().neq("form_id", 0).execute()
-                            if os.path.exists(UPLOAD_FOLDER):
-                                shutil.rmtree(UPLOAD_FOLDER)
-                                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                            st.success("✅ All data cleared successfully!")
+                            start_new_season(supabase, season_name.strip())
+                            st.session_state["confirm_clear"] = False
+                            st.rerun()
+                        except SeasonArchiveRunning:
+                            st.warning("⏳ The previous season is still being archived. Please wait for it to finish.")
                         except Exception:
-                            st.error("Error clearing data. Please check logs.")
+                            st.error("Error starting the new season. Please check logs.")
                     else:
                         st.error("Invalid password. Re-authentication failed.")
                 else:
@@ -1,7 +1,15 @@
 import streamlit as st
 import pandas as pd
 import time
+from datetime import date, timedelta
 from db import supabase
+from src.utils.auth import clear_profile, current_user_id
+from src.data.leaderboard import (
+    MY_POSITION, PAGE_SIZES, VIEW_OPTIONS, cached_leaderboard, fetch_around, fetch_leaderboard_page,
+)
+from src.data.leaderboard_engine import ensure_engine
+from src.data.rollup import PERIODS, get_rollup, period_bounds
+from src.data.seasons import check_season, get_active_season_start
 import random
 from pathlib import Path
 from streamlit.components.v1 import html as st_html
@@ -90,96 +98,173 @@ if not st.session_state.get("logged_in"):
 
 username = st.session_state.get("username", "Guest")
 
-# ------------------ FILTERS ------------------
-st.subheader("Filter Leaderboard")
-
-col1, col2 = st.columns(2)
-with col1:
-    selected_date = st.date_input(
-        "Select a date (leave empty for all-time)",
-        value=None
-    )
-with col2:
-    view_option = st.selectbox(
-        "Show:",
-        ["All", "Top 10", "Bottom 10"]
-    )
-
-# ------------------ FETCH DATA FROM SUPABASE ------------------
-try:
-    forms_query = supabase.table("forms").select("user_id, form_stepcount, form_date")
-    if selected_date:
-        forms_query = forms_query.eq("form_date", str(selected_date))
-    forms = forms_query.execute().data
-except Exception as e:
-    st.error(f"Database error while fetching forms: {e}")
-    st.stop()
+# ------------------ LEADERBOARD VIEW ------------------
+# Filters and table form one fragment, so changing a filter or page reruns only
+# this block rather than the whole page.
+@st.fragment
+def leaderboard_view():
+    # Drop this process's totals if another process has started a new season
+    check_season(supabase)
 
-if not forms:
-    st.info("No step data available for the selected date." if selected_date else "No step data available.")
-    st.stop()
+    # ------------------ FILTERS ------------------
+    st.subheader("Filter Leaderboard")
 
-df = pd.DataFrame(forms)
+    selected_date = None
+    date_range = None
 
-# ------------------ AGGREGATE STEPS SECURELY ------------------
-try:
-    step_summary = df.groupby("user_id")["form_stepcount"].sum().reset_index()
-    step_summary.rename(columns={"form_stepcount": "total_steps"}, inplace=True)
-except Exception as e:
-    st.error(f"Error processing step data: {e}")
-    st.stop()
+    col1, col2 = st.columns(2)
+    with col1:
+        period = st.selectbox("Period:", PERIODS)
+        if period == "Single day":
+            selected_date = st.date_input("Select a date", value=date.today())
+        elif period == "Custom range":
+            picked = st.date_input("Select a date range", value=(date.today() - timedelta(days=6), date.today()))
+            if len(picked) == 2:
+                date_range = picked
+            else:
+                st.caption("Pick an end date to apply the range.")
+                return
+        else:
+            date_range = period_bounds(period)
+    with col2:
+        view_option = st.selectbox(
+            "Show:",
+            [*VIEW_OPTIONS, MY_POSITION]
+        )
 
-# ------------------ GET USERNAMES ------------------
-try:
-    users = supabase.table("users").select("user_id, user_name").execute().data
-    users_df = pd.DataFrame(users)
-except Exception as e:
-    st.error(f"Error fetching user data, please try again later.")
-    st.stop()
+    # ------------------ KEYSET PAGINATION ("All" view) ------------------
+    # Each entry is (cursor, offset, first_rank); cursor is the (total_steps, user_id)
+    # of the previous page's last row, so every rerun fetches a single page.
+    def reset_pages(first_rank=1):
+        st.session_state.lb_pages = [(None, first_rank - 1, first_rank)]
 
-# Merge steps with usernames
-leaderboard = pd.merge(step_summary, users_df, on="user_id", how="inner")
-leaderboard = leaderboard[["user_name", "total_steps"]]
+    def next_page(last_row, next_rank):
+        st.session_state.lb_pages.append(((last_row["total_steps"], last_row["user_id"]), 0, next_rank))
 
+    def prev_page():
+        if len(st.session_state.lb_pages) > 1:
+            st.session_state.lb_pages.pop()
 
-leaderboard.rename(columns={
-    "user_name": "Username",
-    "total_steps": "Step Count"
-}, inplace=True)
+    def fetch_page(cursor, offset, size):
+        if date_range:
+            return ranked.page(after=cursor, offset=offset, limit=size)
+        if selected_date:
+            return fetch_leaderboard_page(supabase, selected_date, after=cursor, offset=offset, limit=size)
+        return ensure_engine(supabase).page(after=cursor, offset=offset, limit=size)
 
-# ------------------ SORTING OPTIONS ------------------
-if view_option == "Top 10":
-    leaderboard = leaderboard.sort_values("Step Count", ascending=False).head(10)
-elif view_option == "Bottom 10":
-    leaderboard = leaderboard.sort_values("Step Count", ascending=True).head(10)
-else:  # All
-    leaderboard = leaderboard.sort_values("Step Count", ascending=False)
+    has_next = False
+    if view_option == "All":
+        pcol1, pcol2 = st.columns(2)
+        with pcol1:
+            page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+        with pcol2:
+            jump_rank = st.number_input("Jump to rank", min_value=1, step=1, value=1)
+            if st.button("Go"):
+                reset_pages(int(jump_rank))
 
-leaderboard.reset_index(drop=True, inplace=True)
-leaderboard.index += 1  # Start rank from 1
+        page_filters = (str(selected_date), str(date_range), page_size)
+        if st.session_state.get("lb_page_filters") != page_filters or "lb_pages" not in st.session_state:
+            st.session_state.lb_page_filters = page_filters
+            reset_pages()
 
-# ------------------ DISPLAY ------------------
-st.subheader("Leaderboard")
-if selected_date:
-    st.caption(f"Showing results for **{selected_date}**")
-else:
-    st.caption("Showing **all-time** results")
+    # ------------------ FETCH AGGREGATED LEADERBOARD (SHARED CACHE) ------------------
+    try:
+        if date_range:
+            # Range totals are a vectorised subtraction over the shared daily rollup
+            ranked = get_rollup(supabase, get_active_season_start(supabase)).ranked(*date_range)
 
-if leaderboard.empty:
-    st.info("No data available to display.")
-else:
-    st.dataframe(leaderboard, width="stretch")
+        if view_option == MY_POSITION:
+            user_id = current_user_id(st.session_state, supabase)
+            if date_range:
+                rows = ranked.around(user_id) if user_id else []
+            elif selected_date:
+                rows = fetch_around(supabase, user_id, selected_date) if user_id else []
+            else:
+                rows = ensure_engine(supabase).around(user_id) if user_id else []
+        elif view_option == "All":
+            cursor, offset, first_rank = st.session_state.lb_pages[-1]
+            rows = fetch_page(cursor, offset, page_size + 1)  # one extra row to detect a next page
+            has_next = len(rows) > page_size
+            rows = rows[:page_size]
+        elif date_range:
+            ascending, limit = VIEW_OPTIONS[view_option]
+            rows = ranked.bottom(limit) if ascending else ranked.top(limit)
+        elif selected_date:
+            rows = cached_leaderboard(supabase, selected_date, view_option)
+        else:
+            # All-time totals come from the in-memory engine, kept current by deltas
+            board = ensure_engine(supabase)
+            ascending, limit = VIEW_OPTIONS[view_option]
+            rows = board.bottom(limit) if ascending else board.top(limit)
+    except Exception as e:
+        st.error(f"Database error while fetching leaderboard: {e}")
+        return
+
+    if not rows:
+        if view_option == MY_POSITION:
+            st.info("You have no steps recorded for this period yet.")
+        else:
+            st.info("No step data available for the selected period." if selected_date or date_range else "No step data available.")
+        return
+
+    # Rows arrive summed, sorted and limited by the database or engine
+    leaderboard = pd.DataFrame(rows)
+
+    if view_option == MY_POSITION:
+        leaderboard.index = leaderboard["rank"]  # Real ranks, not 1..n
+        leaderboard.index.name = None
+    elif view_option == "All":
+        leaderboard.index = range(first_rank, first_rank + len(leaderboard))
+    else:
+        leaderboard.reset_index(drop=True, inplace=True)
+        leaderboard.index += 1  # Start rank from 1
+
+    leaderboard = leaderboard[["user_name", "total_steps"]]
+    leaderboard.rename(columns={
+        "user_name": "Username",
+        "total_steps": "Step Count"
+    }, inplace=True)
+
+    # ------------------ DISPLAY ------------------
+    st.subheader("Leaderboard")
+    if selected_date:
+        st.caption(f"Showing results for **{selected_date}**")
+    elif date_range:
+        st.caption(f"Showing results from **{date_range[0]}** to **{date_range[1]}**")
+    else:
+        st.caption("Showing **all-time** results")
+
+    if leaderboard.empty:
+        st.info("No data available to display.")
+    elif view_option == MY_POSITION:
+        me = next(r for r in rows if r["user_id"] == user_id)
+        st.metric("Your Rank", f"#{me['rank']} of {me['total_users']}")
+        st.dataframe(
+            leaderboard.style.apply(
+                lambda r: ["font-weight: bold" if r["Username"] == username else "" for _ in r], axis=1
+            ),
+            width="stretch",
+        )
+    else:
+        st.dataframe(leaderboard, width="stretch")
+
+        if view_option == "All":
+            nav1, nav2, nav3 = st.columns([1, 2, 1])
+            nav1.button("⬅️ Previous", on_click=prev_page, disabled=len(st.session_state.lb_pages) == 1)
+            nav2.caption(f"Ranks {first_rank:,}–{first_rank + len(leaderboard) - 1:,}")
+            nav3.button("Next ➡️", on_click=next_page, args=(rows[-1], first_rank + len(rows)), disabled=not has_next)
+
+        # Highlight top performer (only for All or Top 10 views)
+        if view_option != "Bottom 10" and leaderboard.index[0] == 1:
+            top_user = leaderboard.iloc[0]
+            st.success(f"🥇 {top_user['Username']} is leading with {int(top_user['Step Count'])} steps!")
 
-    # Highlight top performer (only for All or Top 10 views)
-    if view_option != "Bottom 10" and not leaderboard.empty:
-        top_user = leaderboard.iloc[0]
-        st.success(f"🥇 {top_user['Username']} is leading with {int(top_user['Step Count'])} steps!")
+leaderboard_view()
 
 # ------------------ SIDEBAR ------------------
 st.sidebar.markdown(f"<h3 style='color:#603494;'>Welcome, {username}!</h3>", unsafe_allow_html=True)
 if st.sidebar.button("Logout"):
-    st.session_state.logged_in = False
-    st.session_state.username = ""
+    clear_profile(st.session_state)
     st.rerun()
 
 # ------------------ FOOTER CAROUSEL ------------------
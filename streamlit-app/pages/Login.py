@@ -1,8 +1,9 @@
 import streamlit as st
-import bcrypt
 import time
 import logging
 from db import supabase
+from src.utils.auth import clear_profile, store_profile
+from src.utils.passwords import check_password
 from pathlib import Path
 from streamlit.components.v1 import html as st_html
 
@@ -57,6 +58,8 @@ defaults = {
     "logged_in": False,
     "username": "",
     "role": "",
+    "user_id": None,
+    "is_admin": False,
     "login_attempts": 0,
     "lockout_time": 0,
 }
@@ -72,25 +75,21 @@ def sanitize_username(username: str) -> str:
     return username
 
 def logout():
-    for key in ("logged_in", "username", "role"):
-        st.session_state[key] = ""
-    st.session_state.logged_in = False
+    clear_profile(st.session_state)
     st.rerun()
 
 # ------------------ AUTHENTICATION ------------------
 def authenticate(username, password):
-    """Verify credentials securely and return role or None."""
-    FAKE_HASH = bcrypt.hashpw(b"fakepassword", bcrypt.gensalt())  # for timing defense
+    """Verify credentials securely and return the user's profile or None."""
     try:
-        response = supabase.table("users").select("user_password, user_admin").eq("user_name", username).limit(1).execute()
+        response = supabase.table("users").select("user_id, user_name, user_password, user_admin").eq("user_name", username).limit(1).execute()
 
         if response.data and len(response.data) == 1:
             user_data = response.data[0]
-            stored_hash = user_data["user_password"].encode("utf-8")
-            if bcrypt.checkpw(password.encode("utf-8"), stored_hash):
-                return "admin" if user_data.get("user_admin", False) else "user"
+            if check_password(password, user_data["user_password"]):
+                return {k: v for k, v in user_data.items() if k != "user_password"}
         else:
-            bcrypt.checkpw(password.encode("utf-8"), FAKE_HASH)
+            check_password(password, None)  # decoy check, for timing defense
             return None
 
     except Exception as e:
@@ -119,12 +118,12 @@ else:
             st.error(str(e))
             st.stop()
 
-        role = authenticate(username, password)
+        user = authenticate(username, password)
 
-        if role:
+        if user:
+            # Keep the profile in the session so other pages don't look it up on every rerun
             st.session_state.logged_in = True
-            st.session_state.username = username
-            st.session_state.role = role
+            store_profile(st.session_state, user)
             st.session_state.login_attempts = 0
             st.success(f"Welcome, {username}!")
             st.rerun()
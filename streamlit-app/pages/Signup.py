@@ -1,5 +1,7 @@
 import streamlit as st
 from db import supabase
+from src.utils.auth import clear_profile
+from src.data.identity import invalidate_directory
 import bcrypt
 import re
 import random
@@ -155,6 +157,7 @@ with st.form("signup_form"):
                 response = register_user(username, password, is_admin)
 
                 if response and response.data:
+                    invalidate_directory()
                     st.success(f"✅ User '{username}' created successfully!")
                     st.page_link("pages/Login.py", label="➡️ Click here to log in.")
                 else:
@@ -170,8 +173,7 @@ if st.session_state.get("username"):
         unsafe_allow_html=True
     )
     if st.sidebar.button("Logout"):
-        st.session_state.logged_in = False
-        st.session_state.username = ""
+        clear_profile(st.session_state)
         st.rerun()
 
 # ------------------ FOOTER CAROUSEL ------------------
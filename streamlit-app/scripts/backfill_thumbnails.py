@@ -0,0 +1,31 @@
+"""Generate Admin queue thumbnails, and near-duplicate detail grids, for
+evidence uploaded before they existed.
+
+Safe to re-run: files that already have a thumbnail or grid are skipped.
+
+Run from streamlit-app/:  python -m scripts.backfill_thumbnails
+"""
+
+from src.data.evidence import get_evidence_store
+from src.utils.images import THUMBNAIL_MAX_SIDE, detail_signature, load_screenshot, thumbnail_jpeg
+
+
+def make_thumbnail(data):
+    # Draft-decode straight to roughly thumbnail size; no full-resolution decode
+    return thumbnail_jpeg(load_screenshot(data, max_side=THUMBNAIL_MAX_SIDE))
+
+
+def make_detail(data):
+    return detail_signature(load_screenshot(data))
+
+
+def main():
+    store = get_evidence_store()
+    created, failed = store.backfill_thumbnails(make_thumbnail)
+    print(f"Created {created} thumbnails in {store.thumbnail_folder}/ ({failed} files skipped as unreadable)")
+    added, failed = store.backfill_details(make_detail)
+    print(f"Added {added} near-duplicate detail grids ({failed} files skipped as unreadable)")
+
+
+if __name__ == "__main__":
+    main()
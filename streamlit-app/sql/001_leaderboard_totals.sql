@@ -0,0 +1,27 @@
+-- Aggregated leaderboard, summed and ordered inside Postgres so the app only
+-- receives one row per user instead of every forms row.
+-- Called from src/data/leaderboard.py via supabase.rpc("leaderboard_totals", ...).
+
+create index if not exists forms_form_date_user_id_idx
+    on public.forms (form_date, user_id);
+
+create or replace function public.leaderboard_totals(
+    p_form_date date default null,
+    p_ascending boolean default false,
+    p_limit integer default null
+)
+returns table (user_id bigint, user_name text, total_steps bigint)
+language sql
+stable
+as $$
+    select u.user_id::bigint, u.user_name::text, sum(f.form_stepcount)::bigint as total_steps
+    from public.forms f
+    join public.users u on u.user_id = f.user_id
+    where p_form_date is null or f.form_date = p_form_date
+    group by u.user_id, u.user_name
+    order by
+        case when p_ascending then sum(f.form_stepcount) end asc,
+        case when not p_ascending then sum(f.form_stepcount) end desc,
+        u.user_id
+    limit p_limit;
+$$;
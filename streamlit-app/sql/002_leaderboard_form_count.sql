@@ -0,0 +1,28 @@
+-- Adds form_count to leaderboard_totals so the in-memory leaderboard engine
+-- (src/data/leaderboard_engine.py) knows when a delete removes a user's last form.
+-- The return type changes, so the function has to be dropped first.
+
+drop function if exists public.leaderboard_totals(date, boolean, integer);
+
+create or replace function public.leaderboard_totals(
+    p_form_date date default null,
+    p_ascending boolean default false,
+    p_limit integer default null
+)
+returns table (user_id bigint, user_name text, total_steps bigint, form_count bigint)
+language sql
+stable
+as $$
+    select u.user_id::bigint, u.user_name::text,
+           sum(f.form_stepcount)::bigint as total_steps,
+           count(*)::bigint as form_count
+    from public.forms f
+    join public.users u on u.user_id = f.user_id
+    where p_form_date is null or f.form_date = p_form_date
+    group by u.user_id, u.user_name
+    order by
+        case when p_ascending then sum(f.form_stepcount) end asc,
+        case when not p_ascending then sum(f.form_stepcount) end desc,
+        u.user_id
+    limit p_limit;
+$$;
@@ -0,0 +1,35 @@
+-- A user's rank plus the p_radius people either side, computed with a window
+-- function so only 2 * p_radius + 1 rows leave the database.
+-- Ranks are positional (ties broken by user_id), matching the in-memory engine.
+
+create or replace function public.leaderboard_around(
+    p_user_id bigint,
+    p_form_date date default null,
+    p_radius integer default 5
+)
+returns table (rank bigint, user_id bigint, user_name text, total_steps bigint, total_users bigint)
+language sql
+stable
+as $$
+    with totals as (
+        select f.user_id, sum(f.form_stepcount)::bigint as total_steps
+        from public.forms f
+        join public.users u on u.user_id = f.user_id
+        where p_form_date is null or f.form_date = p_form_date
+        group by f.user_id
+    ),
+    ranked as (
+        select row_number() over (order by t.total_steps desc, t.user_id) as rank,
+               count(*) over () as total_users,
+               t.user_id, t.total_steps
+        from totals t
+    ),
+    me as (
+        select r.rank from ranked r where r.user_id = p_user_id
+    )
+    select r.rank, r.user_id::bigint, u.user_name::text, r.total_steps, r.total_users
+    from ranked r
+    join me on r.rank between me.rank - p_radius and me.rank + p_radius
+    join public.users u on u.user_id = r.user_id
+    order by r.rank;
+$$;
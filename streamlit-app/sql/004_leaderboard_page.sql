@@ -0,0 +1,31 @@
+-- Keyset pagination over the aggregated leaderboard, ordered by
+-- (total_steps desc, user_id). Pass the last row of the previous page as
+-- (p_after_steps, p_after_user_id); p_offset is only used to jump to a rank.
+
+create or replace function public.leaderboard_page(
+    p_form_date date default null,
+    p_after_steps bigint default null,
+    p_after_user_id bigint default null,
+    p_offset integer default 0,
+    p_limit integer default 50
+)
+returns table (user_id bigint, user_name text, total_steps bigint)
+language sql
+stable
+as $$
+    with totals as (
+        select f.user_id, sum(f.form_stepcount)::bigint as total_steps
+        from public.forms f
+        where p_form_date is null or f.form_date = p_form_date
+        group by f.user_id
+    )
+    select t.user_id::bigint, u.user_name::text, t.total_steps
+    from totals t
+    join public.users u on u.user_id = t.user_id
+    where p_after_steps is null
+       or t.total_steps < p_after_steps
+       or (t.total_steps = p_after_steps and t.user_id > p_after_user_id)
+    order by t.total_steps desc, t.user_id
+    offset p_offset
+    limit p_limit;
+$$;
@@ -0,0 +1,16 @@
+-- Per-user daily totals, the input to the in-memory daily rollup
+-- (src/data/rollup.py). One row per (user, day) rather than per form.
+
+create index if not exists forms_user_id_form_date_idx
+    on public.forms (user_id, form_date);
+
+create or replace function public.daily_totals()
+returns table (user_id bigint, user_name text, form_date date, total_steps bigint)
+language sql
+stable
+as $$
+    select f.user_id::bigint, u.user_name::text, f.form_date, sum(f.form_stepcount)::bigint
+    from public.forms f
+    join public.users u on u.user_id = f.user_id
+    group by f.user_id, u.user_name, f.form_date;
+$$;
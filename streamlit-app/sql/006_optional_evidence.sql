@@ -0,0 +1,4 @@
+-- Submissions below the evidence threshold no longer store a screenshot;
+-- their form_filepath is null.
+
+alter table public.forms alter column form_filepath drop not null;
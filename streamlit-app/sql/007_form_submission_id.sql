@@ -0,0 +1,8 @@
+-- Client-generated id for each submission so the write-behind journal
+-- (src/data/journal.py) can replay batches with
+-- "on conflict (form_submission_id) do nothing" without duplicating rows.
+
+alter table public.forms add column if not exists form_submission_id uuid;
+
+create unique index if not exists forms_form_submission_id_key
+    on public.forms (form_submission_id);
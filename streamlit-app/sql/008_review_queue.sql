@@ -0,0 +1,73 @@
+-- Admin verification queue: unverified submissions that need evidence,
+-- served one keyset page at a time in one of three orders.
+--
+-- suspicion is a rough "look at this first" score:
+--   steps relative to the user's own average submission
+--   + one point per extra submission by the same user for the same day
+--   + steps / 50,000 (so a 100k-step day adds 2)
+
+create or replace view public.review_queue as
+select
+    f.form_id,
+    f.form_submission_id,
+    f.user_id,
+    f.form_date,
+    f.form_stepcount,
+    f.form_filepath,
+    f.form_created_at,
+    f.form_verified,
+    round(
+        f.form_stepcount::numeric / greatest(avg(f.form_stepcount) over (partition by f.user_id), 1)
+        + (count(*) over (partition by f.user_id, f.form_date) - 1)
+        + f.form_stepcount / 50000.0,
+        3
+    )::double precision as suspicion
+from public.forms f;
+
+-- p_order is 'oldest', 'steps' or 'suspicious'. Rows come back ordered by
+-- (sort_key, form_id); pass the previous page's last pair as
+-- (p_after_key, p_after_id) to get the next page.
+create or replace function public.review_queue_page(
+    p_order text default 'oldest',
+    p_after_key double precision default null,
+    p_after_id bigint default null,
+    p_limit integer default 20,
+    p_min_steps integer default 10000
+)
+returns table (
+    form_id bigint,
+    form_submission_id uuid,
+    user_id bigint,
+    form_date date,
+    form_stepcount bigint,
+    form_filepath text,
+    form_created_at timestamptz,
+    suspicion double precision,
+    sort_key double precision
+)
+language sql
+stable
+as $$
+    with queue as (
+        select q.*,
+               case p_order
+                   when 'steps' then -q.form_stepcount::double precision
+                   when 'suspicious' then -q.suspicion
+                   else extract(epoch from q.form_created_at)::double precision
+               end as sort_key
+        from public.review_queue q
+        where not q.form_verified and q.form_stepcount >= p_min_steps
+    )
+    select q.form_id::bigint, q.form_submission_id, q.user_id::bigint, q.form_date,
+           q.form_stepcount::bigint, q.form_filepath::text, q.form_created_at,
+           q.suspicion, q.sort_key
+    from queue q
+    where p_after_key is null or (q.sort_key, q.form_id) > (p_after_key, p_after_id)
+    order by q.sort_key, q.form_id
+    limit p_limit;
+$$;
+
+-- Keeps the queue's filter and the default (oldest first) order cheap
+create index if not exists forms_review_queue_idx
+    on public.forms (form_created_at, form_id)
+    where not form_verified;
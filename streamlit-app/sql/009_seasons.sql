@@ -0,0 +1,183 @@
+-- Seasons: every form belongs to a season and the live queries only look at
+-- the active one, so starting a new challenge is a single row update instead
+-- of deleting every form. Earlier seasons stay in forms (and are snapshotted
+-- by the archive job in src/data/seasons.py) without slowing the live season,
+-- because the forms indexes now lead with season_id.
+
+create table if not exists public.seasons (
+    season_id bigint generated always as identity primary key,
+    season_name text not null,
+    started_at timestamptz not null default now(),
+    ended_at timestamptz,
+    archive_path text
+);
+
+-- At most one active season
+create unique index if not exists seasons_one_active_idx
+    on public.seasons ((ended_at is null)) where ended_at is null;
+
+insert into public.seasons (season_name)
+select 'Movember 2025'
+where not exists (select 1 from public.seasons);
+
+create or replace function public.active_season_id()
+returns bigint
+language sql
+stable
+as $$
+    select s.season_id from public.seasons s where s.ended_at is null;
+$$;
+
+alter table public.forms add column if not exists season_id bigint references public.seasons (season_id);
+update public.forms set season_id = public.active_season_id() where season_id is null;
+alter table public.forms alter column season_id set default public.active_season_id();
+alter table public.forms alter column season_id set not null;
+
+create index if not exists forms_season_date_user_idx on public.forms (season_id, form_date, user_id);
+create index if not exists forms_season_user_date_idx on public.forms (season_id, user_id, form_date);
+drop index if exists public.forms_form_date_user_id_idx;
+drop index if exists public.forms_user_id_form_date_idx;
+drop index if exists public.forms_review_queue_idx;
+create index if not exists forms_review_queue_idx
+    on public.forms (season_id, form_created_at, form_id)
+    where not form_verified;
+
+-- Close the active season and open a new one in one transaction.
+create or replace function public.start_season(p_name text)
+returns table (previous_season_id bigint, season_id bigint)
+language plpgsql
+as $$
+declare
+    v_previous bigint;
+    v_next bigint;
+begin
+    update public.seasons s set ended_at = now()
+    where s.ended_at is null
+    returning s.season_id into v_previous;
+
+    insert into public.seasons (season_name) values (p_name)
+    returning seasons.season_id into v_next;
+
+    return query select v_previous, v_next;
+end;
+$$;
+
+-- The leaderboard, rollup and review queue functions, scoped to the active season.
+
+create or replace function public.leaderboard_totals(
+    p_form_date date default null,
+    p_ascending boolean default false,
+    p_limit integer default null
+)
+returns table (user_id bigint, user_name text, total_steps bigint, form_count bigint)
+language sql
+stable
+as $$
+    select u.user_id::bigint, u.user_name::text,
+           sum(f.form_stepcount)::bigint as total_steps,
+           count(*)::bigint as form_count
+    from public.forms f
+    join public.users u on u.user_id = f.user_id
+    where f.season_id = public.active_season_id()
+      and (p_form_date is null or f.form_date = p_form_date)
+    group by u.user_id, u.user_name
+    order by
+        case when p_ascending then sum(f.form_stepcount) end asc,
+        case when not p_ascending then sum(f.form_stepcount) end desc,
+        u.user_id
+    limit p_limit;
+$$;
+
+create or replace function public.leaderboard_around(
+    p_user_id bigint,
+    p_form_date date default null,
+    p_radius integer default 5
+)
+returns table (rank bigint, user_id bigint, user_name text, total_steps bigint, total_users bigint)
+language sql
+stable
+as $$
+    with totals as (
+        select f.user_id, sum(f.form_stepcount)::bigint as total_steps
+        from public.forms f
+        join public.users u on u.user_id = f.user_id
+        where f.season_id = public.active_season_id()
+          and (p_form_date is null or f.form_date = p_form_date)
+        group by f.user_id
+    ),
+    ranked as (
+        select row_number() over (order by t.total_steps desc, t.user_id) as rank,
+               count(*) over () as total_users,
+               t.user_id, t.total_steps
+        from totals t
+    ),
+    me as (
+        select r.rank from ranked r where r.user_id = p_user_id
+    )
+    select r.rank, r.user_id::bigint, u.user_name::text, r.total_steps, r.total_users
+    from ranked r
+    join me on r.rank between me.rank - p_radius and me.rank + p_radius
+    join public.users u on u.user_id = r.user_id
+    order by r.rank;
+$$;
+
+create or replace function public.leaderboard_page(
+    p_form_date date default null,
+    p_after_steps bigint default null,
+    p_after_user_id bigint default null,
+    p_offset integer default 0,
+    p_limit integer default 50
+)
+returns table (user_id bigint, user_name text, total_steps bigint)
+language sql
+stable
+as $$
+    with totals as (
+        select f.user_id, sum(f.form_stepcount)::bigint as total_steps
+        from public.forms f
+        where f.season_id = public.active_season_id()
+          and (p_form_date is null or f.form_date = p_form_date)
+        group by f.user_id
+    )
+    select t.user_id::bigint, u.user_name::text, t.total_steps
+    from totals t
+    join public.users u on u.user_id = t.user_id
+    where p_after_steps is null
+       or t.total_steps < p_after_steps
+       or (t.total_steps = p_after_steps and t.user_id > p_after_user_id)
+    order by t.total_steps desc, t.user_id
+    offset p_offset
+    limit p_limit;
+$$;
+
+create or replace function public.daily_totals()
+returns table (user_id bigint, user_name text, form_date date, total_steps bigint)
+language sql
+stable
+as $$
+    select f.user_id::bigint, u.user_name::text, f.form_date, sum(f.form_stepcount)::bigint
+    from public.forms f
+    join public.users u on u.user_id = f.user_id
+    where f.season_id = public.active_season_id()
+    group by f.user_id, u.user_name, f.form_date;
+$$;
+
+-- review_queue_page reads this view, so scoping the view scopes the queue
+create or replace view public.review_queue as
+select
+    f.form_id,
+    f.form_submission_id,
+    f.user_id,
+    f.form_date,
+    f.form_stepcount,
+    f.form_filepath,
+    f.form_created_at,
+    f.form_verified,
+    round(
+        f.form_stepcount::numeric / greatest(avg(f.form_stepcount) over (partition by f.user_id), 1)
+        + (count(*) over (partition by f.user_id, f.form_date) - 1)
+        + f.form_stepcount / 50000.0,
+        3
+    )::double precision as suspicion
+from public.forms f
+where f.season_id = public.active_season_id();
@@ -0,0 +1,132 @@
+-- Review queue pages that read only one page of index entries.
+--
+-- The review_queue view scored every form with window functions before the
+-- queue filters and keyset applied, so each page scanned and sorted the whole
+-- forms table. Suspicion is now scored once, when a form is inserted (against
+-- the user's submissions so far this season), and stored on the row. Every
+-- order then pages over a partial index of the season's unverified forms:
+--   oldest      (form_created_at, form_id)
+--   steps       (form_stepcount desc, form_id desc)
+--   suspicious  (form_suspicion desc, form_id desc)
+
+alter table public.forms add column if not exists form_suspicion double precision not null default 0;
+
+-- One-off backfill of the unverified forms with the old view's score
+update public.forms f
+set form_suspicion = s.suspicion
+from (
+    select f2.form_id,
+           round(
+               f2.form_stepcount::numeric / greatest(avg(f2.form_stepcount) over (partition by f2.season_id, f2.user_id), 1)
+               + (count(*) over (partition by f2.season_id, f2.user_id, f2.form_date) - 1)
+               + f2.form_stepcount / 50000.0,
+               3
+           )::double precision as suspicion
+    from public.forms f2
+) s
+where s.form_id = f.form_id and not f.form_verified;
+
+create or replace function public.forms_score_suspicion()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_sum numeric;
+    v_count bigint;
+    v_same_day bigint;
+begin
+    -- forms_season_user_date_idx covers this lookup
+    select coalesce(sum(f.form_stepcount), 0), count(*), count(*) filter (where f.form_date = new.form_date)
+    into v_sum, v_count, v_same_day
+    from public.forms f
+    where f.season_id = new.season_id and f.user_id = new.user_id;
+
+    new.form_suspicion := round(
+        new.form_stepcount::numeric / greatest((v_sum + new.form_stepcount) / (v_count + 1), 1)
+        + v_same_day
+        + new.form_stepcount / 50000.0,
+        3
+    )::double precision;
+    return new;
+end;
+$$;
+
+drop trigger if exists forms_score_suspicion on public.forms;
+create trigger forms_score_suspicion
+    before insert on public.forms
+    for each row execute function public.forms_score_suspicion();
+
+-- forms_review_queue_idx (season_id, form_created_at, form_id) already serves 'oldest'
+create index if not exists forms_review_steps_idx
+    on public.forms (season_id, form_stepcount, form_id)
+    where not form_verified;
+create index if not exists forms_review_suspicion_idx
+    on public.forms (season_id, form_suspicion, form_id)
+    where not form_verified;
+
+drop function if exists public.review_queue_page(text, double precision, bigint, integer, integer);
+drop view if exists public.review_queue;
+
+-- p_order is 'oldest', 'steps' or 'suspicious'. Each row's sort_key is its
+-- order column as text; pass the previous page's last (sort_key, form_id) as
+-- (p_after_key, p_after_id) to get the next page.
+create or replace function public.review_queue_page(
+    p_order text default 'oldest',
+    p_after_key text default null,
+    p_after_id bigint default null,
+    p_limit integer default 20,
+    p_min_steps integer default 10000
+)
+returns table (
+    form_id bigint,
+    form_submission_id uuid,
+    user_id bigint,
+    form_date date,
+    form_stepcount bigint,
+    form_filepath text,
+    form_created_at timestamptz,
+    suspicion double precision,
+    sort_key text
+)
+language plpgsql
+stable
+as $$
+declare
+    v_season bigint := public.active_season_id();
+begin
+    if p_order = 'steps' then
+        return query
+        select f.form_id::bigint, f.form_submission_id, f.user_id::bigint, f.form_date,
+               f.form_stepcount::bigint, f.form_filepath::text, f.form_created_at,
+               f.form_suspicion, f.form_stepcount::text
+        from public.forms f
+        where f.season_id = v_season and not f.form_verified and f.form_stepcount >= p_min_steps
+          and (f.form_stepcount, f.form_id)
+              < (coalesce(p_after_key::bigint, 9223372036854775807), coalesce(p_after_id, 9223372036854775807))
+        order by f.form_stepcount desc, f.form_id desc
+        limit p_limit;
+    elsif p_order = 'suspicious' then
+        return query
+        select f.form_id::bigint, f.form_submission_id, f.user_id::bigint, f.form_date,
+               f.form_stepcount::bigint, f.form_filepath::text, f.form_created_at,
+               f.form_suspicion, f.form_suspicion::text
+        from public.forms f
+        where f.season_id = v_season and not f.form_verified and f.form_stepcount >= p_min_steps
+          and (f.form_suspicion, f.form_id)
+              < (coalesce(p_after_key::double precision, 'infinity'), coalesce(p_after_id, 9223372036854775807))
+        order by f.form_suspicion desc, f.form_id desc
+        limit p_limit;
+    else
+        return query
+        select f.form_id::bigint, f.form_submission_id, f.user_id::bigint, f.form_date,
+               f.form_stepcount::bigint, f.form_filepath::text, f.form_created_at,
+               f.form_suspicion, f.form_created_at::text
+        from public.forms f
+        where f.season_id = v_season and not f.form_verified and f.form_stepcount >= p_min_steps
+          and (f.form_created_at, f.form_id)
+              > (coalesce(p_after_key::timestamptz, '-infinity'), coalesce(p_after_id, 0))
+        order by f.form_created_at, f.form_id
+        limit p_limit;
+    end if;
+end;
+$$;
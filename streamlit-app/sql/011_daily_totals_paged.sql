@@ -0,0 +1,25 @@
+-- daily_totals in keyset pages. A single call returns one row per user per
+-- day, which PostgREST's max-rows cap silently truncated once a season had
+-- more than 1000 of them. Pages are ordered by (user_id, form_date), so each
+-- one is a range scan of forms_season_user_date_idx.
+
+drop function if exists public.daily_totals();
+
+create or replace function public.daily_totals(
+    p_after_user_id bigint default null,
+    p_after_date date default null,
+    p_limit integer default 1000
+)
+returns table (user_id bigint, user_name text, form_date date, total_steps bigint)
+language sql
+stable
+as $$
+    select f.user_id::bigint, u.user_name::text, f.form_date, sum(f.form_stepcount)::bigint
+    from public.forms f
+    join public.users u on u.user_id = f.user_id
+    where f.season_id = public.active_season_id()
+      and (f.user_id, f.form_date) > (coalesce(p_after_user_id, -1), coalesce(p_after_date, '-infinity'::date))
+    group by f.user_id, u.user_name, f.form_date
+    order by f.user_id, f.form_date
+    limit p_limit;
+$$;
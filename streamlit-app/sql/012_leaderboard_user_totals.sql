@@ -0,0 +1,23 @@
+-- Every user's season total with their form count, in user_id keyset pages.
+-- This is the load for the in-memory all-time leaderboard
+-- (src/data/leaderboard_engine.py); an unpaged leaderboard_totals() call is
+-- truncated by PostgREST's max-rows cap once there are more than 1000 users.
+
+create or replace function public.leaderboard_user_totals(
+    p_after_user_id bigint default null,
+    p_limit integer default 1000
+)
+returns table (user_id bigint, user_name text, total_steps bigint, form_count bigint)
+language sql
+stable
+as $$
+    select f.user_id::bigint, u.user_name::text,
+           sum(f.form_stepcount)::bigint, count(*)::bigint
+    from public.forms f
+    join public.users u on u.user_id = f.user_id
+    where f.season_id = public.active_season_id()
+      and f.user_id > coalesce(p_after_user_id, -1)
+    group by f.user_id, u.user_name
+    order by f.user_id
+    limit p_limit;
+$$;
@@ -0,0 +1,27 @@
+-- leaderboard_user_totals also returns each user's highest form_id.
+--
+-- The in-memory leaderboard replays deltas that arrive while it reloads. A
+-- submission's delta is sent only after its insert commits, so a reload that
+-- started earlier may or may not have read the row. Any form_id above the
+-- user's max_form_id in the snapshot was not read; anything else was.
+
+drop function if exists public.leaderboard_user_totals(bigint, integer);
+
+create or replace function public.leaderboard_user_totals(
+    p_after_user_id bigint default null,
+    p_limit integer default 1000
+)
+returns table (user_id bigint, user_name text, total_steps bigint, form_count bigint, max_form_id bigint)
+language sql
+stable
+as $$
+    select f.user_id::bigint, u.user_name::text,
+           sum(f.form_stepcount)::bigint, count(*)::bigint, max(f.form_id)::bigint
+    from public.forms f
+    join public.users u on u.user_id = f.user_id
+    where f.season_id = public.active_season_id()
+      and f.user_id > coalesce(p_after_user_id, -1)
+    group by f.user_id, u.user_name
+    order by f.user_id
+    limit p_limit;
+$$;
@@ -0,0 +1,288 @@
+"""Content-addressed evidence store.
+
+Screenshots are saved under the SHA-256 of their encoded bytes, so the same
+image uploaded twice is stored once. A local SQLite index maps each hash to
+the submissions that reference it (by ``form_submission_id``) and keeps a
+64-bit dHash and a small grayscale detail grid per image; a file is unlinked
+only when its last reference is released, and the index remembers released
+images so later reuse of the same or a near-identical screenshot is still
+flagged for admins. Screenshots from one step-counter app share a layout, so
+a close dHash only nominates candidates; the detail grids must also agree.
+The hashes are held in memory once loaded, and each image's matches are
+cached until a new image is stored.
+
+Each stored image also gets a small thumbnail under ``THUMBNAIL_FOLDER`` (same
+filename) so the Admin queue never has to read full-size evidence to list it.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from src.utils.images import detail_distance
+
+EVIDENCE_FOLDER = "uploads"
+THUMBNAIL_FOLDER = "thumbnails"  # kept outside uploads/ so it stays out of evidence exports
+INDEX_PATH = "evidence_index.db"
+NEAR_DUPLICATE_BITS = 12  # max dHash bits that may differ for a near-duplicate candidate
+NEAR_DUPLICATE_DETAIL = 8.0  # max detail_distance for a candidate to count as a near-duplicate
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence (
+    hash TEXT PRIMARY KEY,
+    dhash INTEGER NOT NULL,
+    refs INTEGER NOT NULL DEFAULT 0,
+    detail BLOB
+);
+CREATE TABLE IF NOT EXISTS evidence_refs (
+    submission_id TEXT PRIMARY KEY,
+    hash TEXT NOT NULL REFERENCES evidence (hash),
+    user_id INTEGER,
+    form_date TEXT,
+    released INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS evidence_refs_hash_idx ON evidence_refs (hash);
+"""
+SQLITE_MAX_PARAMS = 500  # ids per IN (...) query
+
+
+def _signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _popcount(values):
+    return np.unpackbits(values.view(np.uint8)).reshape(len(values), 64).sum(axis=1)
+
+
+def _chunks(items, size=SQLITE_MAX_PARAMS):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class _HashIndex:
+    """The evidence table's hashes in memory, with each image's matches cached."""
+
+    def __init__(self, rows):
+        self.digests = [digest for digest, _, _ in rows]
+        self.dhashes = np.array([d for _, d, _ in rows], dtype=np.int64).view(np.uint64)
+        self.details = [detail for _, _, detail in rows]
+        self.position = {digest: i for i, digest in enumerate(self.digests)}
+        self._matches = {}
+
+    def add(self, digest, dhash, detail):
+        self.position[digest] = len(self.digests)
+        self.digests.append(digest)
+        self.dhashes = np.append(self.dhashes, np.array([_signed(dhash)], dtype=np.int64).view(np.uint64))
+        self.details.append(detail)
+        self._matches.clear()  # the new image may match any earlier one
+
+    def matches(self, digest):
+        """Digests of the same image and of confirmed near-identical images."""
+        found = self._matches.get(digest)
+        if found is None:
+            i = self.position[digest]
+            found = [digest]
+            detail = self.details[i]
+            if detail is not None:  # images indexed before detail grids only match exactly
+                distance = _popcount(self.dhashes ^ self.dhashes[i])
+                for j in np.flatnonzero(distance <= NEAR_DUPLICATE_BITS):
+                    other = self.details[j]
+                    if j != i and other is not None and detail_distance(detail, other) <= NEAR_DUPLICATE_DETAIL:
+                        found.append(self.digests[j])
+            self._matches[digest] = found
+        return found
+
+
+class EvidenceStore:
+    def __init__(self, folder=EVIDENCE_FOLDER, index_path=INDEX_PATH, thumbnail_folder=THUMBNAIL_FOLDER):
+        self.folder = folder
+        self.thumbnail_folder = thumbnail_folder
+        os.makedirs(folder, exist_ok=True)
+        os.makedirs(thumbnail_folder, exist_ok=True)
+        self._conn = sqlite3.connect(index_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(evidence)")]
+        if "detail" not in columns:  # index created before detail grids
+            self._conn.execute("ALTER TABLE evidence ADD COLUMN detail BLOB")
+        self._lock = threading.Lock()
+        self._index = None  # _HashIndex, loaded by the first duplicates() call
+
+    def path_for(self, filename):
+        return os.path.join(self.folder, os.path.basename(filename))
+
+    def thumbnail_for(self, filename):
+        return os.path.join(self.thumbnail_folder, os.path.basename(filename))
+
+    def store(self, data, dhash, submission_id, user_id=None, form_date=None, thumbnail=None, detail=None):
+        """Save ``data`` (once per distinct content) for a submission; returns the filename."""
+        digest = hashlib.sha256(data).hexdigest()
+        filename = f"{digest}.jpg"
+        path = self.path_for(filename)
+        with self._lock:
+            if not os.path.exists(path):
+                _write_atomic(path, data)
+            if thumbnail is not None and not os.path.exists(self.thumbnail_for(filename)):
+                _write_atomic(self.thumbnail_for(filename), thumbnail)
+            self._conn.execute("BEGIN")
+            try:
+                new = self._conn.execute("SELECT 1 FROM evidence WHERE hash = ?", (digest,)).fetchone() is None
+                self._conn.execute(
+                    "INSERT INTO evidence (hash, dhash, refs, detail) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT (hash) DO UPDATE SET refs = refs + 1",
+                    (digest, _signed(dhash), detail),
+                )
+                self._conn.execute(
+                    "INSERT INTO evidence_refs (submission_id, hash, user_id, form_date) VALUES (?, ?, ?, ?)",
+                    (submission_id, digest, user_id, str(form_date) if form_date else None),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if new and self._index is not None:
+                self._index.add(digest, dhash, detail)
+        return filename
+
+    def release(self, submission_id, filename):
+        """Drop a submission's reference; the file goes when nothing references it.
+
+        Files saved before the store existed are not in the index and are
+        removed directly, as before.
+        """
+        path = self.path_for(filename) if filename else None
+        with self._lock:
+            ref = None
+            if submission_id:
+                ref = self._conn.execute(
+                    "SELECT hash FROM evidence_refs WHERE submission_id = ? AND released = 0",
+                    (submission_id,),
+                ).fetchone()
+            if ref is None:
+                digest = os.path.splitext(os.path.basename(filename or ""))[0]
+                indexed = self._conn.execute("SELECT 1 FROM evidence WHERE hash = ?", (digest,)).fetchone()
+                if path and not indexed:
+                    _remove(path)
+                    _remove(self.thumbnail_for(filename))
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("UPDATE evidence_refs SET released = 1 WHERE submission_id = ?", (submission_id,))
+                self._conn.execute("UPDATE evidence SET refs = refs - 1 WHERE hash = ?", ref)
+                refs = self._conn.execute("SELECT refs FROM evidence WHERE hash = ?", ref).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if refs <= 0:
+                _remove(self.path_for(f"{ref[0]}.jpg"))
+                _remove(self.thumbnail_for(f"{ref[0]}.jpg"))
+
+    def duplicates(self, submission_ids):
+        """For each given submission, the other submissions with the same or a near-identical image.
+
+        Returns ``{submission_id: [{"user_id", "form_date", "exact"}, ...]}`` for
+        submissions that have at least one match, including released ones.
+        """
+        submission_ids = [s for s in submission_ids if s]
+        if not submission_ids:
+            return {}
+        with self._lock:
+            if self._index is None:
+                self._index = _HashIndex(self._conn.execute("SELECT hash, dhash, detail FROM evidence").fetchall())
+            own = {}
+            for chunk in _chunks(submission_ids):
+                own.update(self._conn.execute(
+                    f"SELECT submission_id, hash FROM evidence_refs WHERE submission_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall())
+            matched = {sid: self._index.matches(digest) for sid, digest in own.items()}
+            wanted = sorted({d for digests in matched.values() for d in digests})
+            by_hash = {}
+            for chunk in _chunks(wanted):
+                for sid, digest, user_id, form_date in self._conn.execute(
+                    f"SELECT submission_id, hash, user_id, form_date FROM evidence_refs WHERE hash IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ):
+                    by_hash.setdefault(digest, []).append((sid, user_id, form_date))
+
+        result = {}
+        for sid, digests in matched.items():
+            matches = [
+                {"user_id": user_id, "form_date": form_date, "exact": digest == own[sid]}
+                for digest in digests
+                for other, user_id, form_date in by_hash.get(digest, [])
+                if other != sid
+            ]
+            if matches:
+                result[sid] = matches
+        return result
+
+    def backfill_details(self, make_detail):
+        """Add detail grids for indexed images still on disk; returns (added, failed)."""
+        with self._lock:
+            digests = [row[0] for row in self._conn.execute("SELECT hash FROM evidence WHERE detail IS NULL")]
+        added = failed = 0
+        for digest in digests:
+            path = self.path_for(f"{digest}.jpg")
+            if not os.path.isfile(path):
+                continue  # released; it keeps matching exactly only
+            try:
+                with open(path, "rb") as f:
+                    detail = make_detail(f.read())
+            except Exception:
+                failed += 1
+                continue
+            with self._lock:
+                self._conn.execute("UPDATE evidence SET detail = ? WHERE hash = ?", (detail, digest))
+            added += 1
+        with self._lock:
+            self._index = None  # reload with the new grids
+        return added, failed
+
+    def backfill_thumbnails(self, make_thumbnail):
+        """Create missing thumbnails for files already in the folder; returns (created, failed)."""
+        created = failed = 0
+        for name in sorted(os.listdir(self.folder)):
+            path = self.path_for(name)
+            if not os.path.isfile(path) or os.path.exists(self.thumbnail_for(name)):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    thumbnail = make_thumbnail(f.read())
+            except Exception:
+                failed += 1  # not an image (or unreadable); the queue shows no preview
+                continue
+            _write_atomic(self.thumbnail_for(name), thumbnail)
+            created += 1
+        return created, failed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_evidence_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EvidenceStore()
+        return _store
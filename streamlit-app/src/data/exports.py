@@ -0,0 +1,235 @@
+"""Admin exports, built only when an admin asks for them.
+
+The full forms history is paged with a form_id keyset and each page is written
+out (CSV, or Parquet when pyarrow is installed) to a temporary file before the
+next is fetched, so memory stays at about one page however long the season was.
+
+The evidence ZIP is written file by file to ``exports/``, named by a digest of
+its contents, and each download gets its own read handle on that file, so the
+app never holds an archive in memory itself (Streamlit still buffers the one it
+is serving). JPEG and PNG files are already compressed, so they are stored
+rather than deflated. A built archive is reused until its filters, the
+matching forms or the contents of ``uploads/`` change.
+"""
+
+import csv
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+
+from src.utils.cache import TTLCache
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+EXPORT_PAGE_SIZE = 1000  # forms rows per request
+EXPORT_FOLDER = "exports"
+ZIP_CACHE_TTL = 3600
+ZIP_KEEP = 2  # built archives kept on disk
+FOLDER_CHECK_TTL = 60  # seconds the "any evidence on disk?" answer is reused
+STORED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+VERIFIED_FILTERS = {"All": None, "Unverified": False, "Verified": True}
+HISTORY_COLUMNS = [
+    "form_id", "user_id", "user_name", "form_date", "form_stepcount",
+    "form_verified", "form_filepath", "form_created_at", "season_id",
+]
+HISTORY_FORMATS = ["CSV", "Parquet"] if pa is not None else ["CSV"]
+
+_zip_cache = TTLCache(ttl=ZIP_CACHE_TTL, maxsize=ZIP_KEEP)
+_folder_cache = TTLCache(ttl=FOLDER_CHECK_TTL, maxsize=8)
+
+
+def iter_form_pages(client, columns="*", page_size=EXPORT_PAGE_SIZE, configure=None):
+    """Yield ``forms`` rows a page at a time, keyset-paged on form_id.
+
+    ``configure(query)`` may add filters; it is applied to every page request.
+    Rows deleted mid-export are simply absent; none are skipped or repeated.
+    """
+    if columns != "*" and "form_id" not in [c.strip() for c in columns.split(",")]:
+        columns = f"form_id, {columns}"
+    last_id = None
+    while True:
+        query = client.table("forms").select(columns)
+        if configure is not None:
+            query = configure(query)
+        if last_id is not None:
+            query = query.gt("form_id", last_id)
+        page = query.order("form_id").limit(page_size).execute().data or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["form_id"]
+
+
+def _in_season(season_id):
+    return None if season_id is None else (lambda query: query.eq("season_id", season_id))
+
+
+def iter_history(client, directory, page_size=EXPORT_PAGE_SIZE, season_id=None):
+    """Pages of forms rows in HISTORY_COLUMNS order, with names from the user directory."""
+    columns = ", ".join(c for c in HISTORY_COLUMNS if c != "user_name")
+    for page in iter_form_pages(client, columns, page_size, configure=_in_season(season_id)):
+        for row in page:
+            row["user_name"] = directory.user_name(row["user_id"])
+        yield page
+
+
+def _parquet_schema():
+    return pa.schema([
+        ("form_id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("user_name", pa.string()),
+        ("form_date", pa.date32()),
+        ("form_stepcount", pa.int64()),
+        ("form_verified", pa.bool_()),
+        ("form_filepath", pa.string()),
+        ("form_created_at", pa.string()),
+        ("season_id", pa.int64()),
+    ])
+
+
+def write_history(client, directory, out, fmt="CSV", page_size=EXPORT_PAGE_SIZE, season_id=None, on_page=None):
+    """Stream the forms history (all seasons, or one) into binary file ``out``; returns the row count.
+
+    ``on_page(rows_so_far)`` is called after each page is written.
+    """
+    rows = 0
+    pages = iter_history(client, directory, page_size, season_id)
+    if fmt == "Parquet":
+        if pa is None:
+            raise RuntimeError("Parquet export needs pyarrow installed.")
+        schema = _parquet_schema()
+        with pq.ParquetWriter(out, schema) as writer:
+            for page in pages:
+                columns = {c: [row.get(c) for row in page] for c in HISTORY_COLUMNS}
+                columns["form_date"] = pa.array(columns["form_date"], pa.string()).cast(pa.date32())
+                columns["form_verified"] = [None if v is None else bool(v) for v in columns["form_verified"]]
+                writer.write_table(pa.table(columns, schema=schema))  # one row group per page
+                rows += len(page)
+                if on_page:
+                    on_page(rows)
+        return rows
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=HISTORY_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for page in pages:
+        writer.writerows(page)
+        out.write(buf.getvalue().encode("utf-8"))
+        buf.seek(0)
+        buf.truncate()
+        rows += len(page)
+        if on_page:
+            on_page(rows)
+    out.write(buf.getvalue().encode("utf-8"))  # header only, for an empty table
+    return rows
+
+
+def history_export(client, directory, fmt="CSV", season_id=None):
+    """The forms history as an open, rewound temporary file of CSV or Parquet."""
+    raw = tempfile.TemporaryFile(buffering=0)  # io.FileIO, which st.download_button accepts
+    out = io.BufferedWriter(raw)
+    try:
+        write_history(client, directory, out, fmt, season_id=season_id)
+        out.flush()
+    except Exception:
+        out.close()
+        raise
+    out.detach()
+    raw.seek(0)
+    return raw
+
+
+def evidence_manifest(client, folder, directory, start=None, end=None, user_id=None, verified=None, season_id=None):
+    """(arcname, path) for every matching form whose evidence file is on disk."""
+
+    def configure(query):
+        query = query.not_.is_("form_filepath", "null")
+        if season_id is not None:
+            query = query.eq("season_id", season_id)
+        if start:
+            query = query.gte("form_date", str(start))
+        if end:
+            query = query.lte("form_date", str(end))
+        if user_id is not None:
+            query = query.eq("user_id", user_id)
+        if verified is not None:
+            query = query.eq("form_verified", verified)
+        return query
+
+    manifest = []
+    columns = "form_id, user_id, form_date, form_filepath"
+    for page in iter_form_pages(client, columns, configure=configure):
+        for row in page:
+            path = os.path.join(folder, os.path.basename(row["form_filepath"]))
+            if not os.path.isfile(path):
+                continue  # released after verification, or never stored
+            name = directory.user_name(row["user_id"]) or f"user_{row['user_id']}"
+            ext = os.path.splitext(path)[1] or ".jpg"
+            manifest.append((f"{name}/{row['form_date']}_{row['form_id']}{ext}", path))
+    return manifest
+
+
+def has_evidence(folder):
+    """Whether ``folder`` holds any file; rechecked at most every FOLDER_CHECK_TTL seconds."""
+
+    def check():
+        if not os.path.isdir(folder):
+            return False
+        with os.scandir(folder) as entries:
+            return any(entry.is_file() for entry in entries)
+
+    return _folder_cache.get_or_load(folder, check)
+
+
+def folder_signature(folder):
+    """Cheap fingerprint of a folder's contents: file count, total size, newest mtime."""
+    count = size = newest = 0
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file():
+                stat = entry.stat()
+                count += 1
+                size += stat.st_size
+                newest = max(newest, stat.st_mtime_ns)
+    return count, size, newest
+
+
+def _prune_zips(export_folder, keep=ZIP_KEEP):
+    """Delete all but the ``keep`` newest archives (open download handles stay readable)."""
+    paths = [e.path for e in os.scandir(export_folder) if e.name.startswith("evidence_") and e.name.endswith(".zip")]
+    for path in sorted(paths, key=os.path.getmtime, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _build_zip(manifest, path):
+    partial = f"{path}.part"
+    with zipfile.ZipFile(partial, "w") as zipf:
+        for arcname, source in manifest:
+            stored = os.path.splitext(source)[1].lower() in STORED_EXTENSIONS
+            # ZipFile.write copies the file in chunks, so only one buffer is held at a time
+            zipf.write(source, arcname, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+    os.replace(partial, path)
+    _prune_zips(os.path.dirname(path))
+    return path
+
+
+def evidence_zip(client, folder, directory, export_folder=EXPORT_FOLDER, **filters):
+    """An open binary file of the matching evidence ZIP (possibly empty), rebuilt only when something has changed."""
+    manifest = evidence_manifest(client, folder, directory, **filters)
+    key = hashlib.sha256(repr((manifest, folder_signature(folder))).encode()).hexdigest()
+    path = os.path.join(export_folder, f"evidence_{key[:32]}.zip")
+    os.makedirs(export_folder, exist_ok=True)
+    if not os.path.isfile(path):
+        _zip_cache.invalidate(key)  # pruned from disk since it was built
+    _zip_cache.get_or_load(key, lambda: _build_zip(manifest, path))  # concurrent clicks wait for one build
+    return open(path, "rb")
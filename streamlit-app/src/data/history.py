@@ -0,0 +1,78 @@
+"""Per-session cache of one user's submissions for the Daily Progress tab.
+
+The first load fetches only the columns the tab uses; later reruns fetch rows
+created after the newest one already held, and the session's own submits are
+appended straight from the journaled row. Only the active season's rows are
+held; a season change triggers a full reload.
+"""
+
+import time
+
+import pandas as pd
+
+from src.data.seasons import get_active_season_id
+
+HISTORY_COLUMNS = "form_id, form_submission_id, form_date, form_stepcount, form_created_at"
+INCREMENTAL_REFRESH_SECONDS = 30  # skip the network entirely within this window
+FULL_REFRESH_SECONDS = 600  # full reload picks up admin deletes
+HISTORY_FIELDS = [c.strip() for c in HISTORY_COLUMNS.split(",")]
+
+
+def _key(row):
+    # Journaled rows have no form_id yet; the submission id links them to the inserted row
+    return row.get("form_submission_id") or row["form_id"]
+
+
+class UserHistory:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.season_id = None
+        self.rows = {}  # form_submission_id (or form_id for older rows) -> row
+        self.last_created_at = None
+        self.loaded_at = None
+        self.checked_at = None
+
+    def refresh(self, client):
+        now = time.monotonic()
+        season_id = get_active_season_id(client)
+        if self.loaded_at is None or now - self.loaded_at > FULL_REFRESH_SECONDS or season_id != self.season_id:
+            self.season_id = season_id
+            data = self._query(client).execute().data or []
+            self.rows = {}
+            self.last_created_at = None
+            self.loaded_at = now
+        elif now - self.checked_at > INCREMENTAL_REFRESH_SECONDS:
+            query = self._query(client)
+            if self.last_created_at:
+                query = query.gt("form_created_at", self.last_created_at)
+            data = query.execute().data or []
+        else:
+            return
+        self.checked_at = now
+        self._merge(data)
+
+    def add_local(self, row):
+        """Record a row this session just inserted, without refetching."""
+        # The cursor is left alone so rows from the user's other sessions that
+        # were created just before this one are still picked up.
+        self.rows[_key(row)] = {k: row.get(k) for k in HISTORY_FIELDS}
+
+    def frame(self, extra=()):
+        """Rows as a DataFrame, plus any ``extra`` rows (e.g. journaled) not yet held."""
+        rows = dict(self.rows)
+        for row in extra:
+            rows.setdefault(_key(row), {k: row.get(k) for k in HISTORY_FIELDS})
+        return pd.DataFrame(list(rows.values())) if rows else pd.DataFrame()
+
+    def _query(self, client):
+        return (
+            client.table("forms").select(HISTORY_COLUMNS)
+            .eq("user_id", self.user_id)
+            .eq("season_id", self.season_id)
+        )
+
+    def _merge(self, data):
+        for row in data:
+            self.rows[_key(row)] = row
+            if self.last_created_at is None or row["form_created_at"] > self.last_created_at:
+                self.last_created_at = row["form_created_at"]
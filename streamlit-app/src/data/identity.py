@@ -0,0 +1,100 @@
+"""Process-wide user_id <-> user_name directory.
+
+Both directions are sorted NumPy arrays searched with ``searchsorted``, so the
+whole users table is read once per TTL (or after a signup) instead of on every
+page rerun. The load is paged by user_id so PostgREST's max-rows cap cannot
+truncate it. A name missing from the directory is looked up on its own and the
+answer, found or not, is cached briefly, so an unknown name never forces the
+whole table to be reloaded.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.utils.cache import TTLCache
+
+DIRECTORY_TTL = 600  # seconds; signups invalidate explicitly
+LOOKUP_TTL = 60  # seconds a single-name lookup (including "no such user") is reused
+USERS_PAGE_SIZE = 1000
+
+
+class UserDirectory:
+    def __init__(self, rows):
+        ids = np.array([r["user_id"] for r in rows], dtype=np.int64)
+        names = np.array([r["user_name"] for r in rows], dtype=str)
+
+        by_id = np.argsort(ids, kind="stable")
+        self._ids = ids[by_id]
+        self._names_by_id = names[by_id]
+
+        by_name = np.argsort(names, kind="stable")
+        self._names = names[by_name]
+        self._ids_by_name = ids[by_name]
+        self._sorted_names = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def user_id(self, user_name):
+        i = int(np.searchsorted(self._names, user_name))
+        if i < len(self._names) and self._names[i] == user_name:
+            return int(self._ids_by_name[i])
+        return None
+
+    def names(self):
+        """Every user name, sorted; built once per directory load."""
+        if self._sorted_names is None:
+            self._sorted_names = self._names.tolist()
+        return self._sorted_names
+
+    def user_name(self, user_id):
+        i = int(np.searchsorted(self._ids, user_id))
+        if i < len(self._ids) and self._ids[i] == user_id:
+            return str(self._names_by_id[i])
+        return None
+
+    def to_frame(self):
+        """DataFrame of user_id, user_name for merges."""
+        return pd.DataFrame({"user_id": self._ids, "user_name": self._names_by_id})
+
+
+_directory_cache = TTLCache(ttl=DIRECTORY_TTL, maxsize=1)
+_lookup_cache = TTLCache(ttl=LOOKUP_TTL, maxsize=1024)
+
+
+def fetch_users(client, page_size=USERS_PAGE_SIZE):
+    """Every users row (id and name), in keyset pages on user_id."""
+    rows, last_id = [], None
+    while True:
+        query = client.table("users").select("user_id, user_name")
+        if last_id is not None:
+            query = query.gt("user_id", last_id)
+        page = query.order("user_id").limit(page_size).execute().data or []
+        rows += page
+        if len(page) < page_size:
+            return rows
+        last_id = page[-1]["user_id"]
+
+
+def get_directory(client):
+    return _directory_cache.get_or_load("users", lambda: UserDirectory(fetch_users(client)))
+
+
+def invalidate_directory():
+    """Call after inserting into users."""
+    _directory_cache.invalidate()
+    _lookup_cache.invalidate()
+
+
+def _lookup_user_id(client, user_name):
+    rows = client.table("users").select("user_id").eq("user_name", user_name).limit(1).execute().data
+    return rows[0]["user_id"] if rows else None
+
+
+def resolve_user_id(client, user_name):
+    """Look up a user's id in the cached directory, falling back to a single-row query."""
+    user_id = get_directory(client).user_id(user_name)
+    if user_id is None:
+        # May have signed up through another process since the last load
+        user_id = _lookup_cache.get_or_load(user_name, lambda: _lookup_user_id(client, user_name))
+    return user_id
@@ -0,0 +1,219 @@
+"""Write-behind journal for step submissions.
+
+Submissions are appended to a local SQLite database in WAL mode, which returns
+in well under a millisecond even when Supabase is slow or unreachable. A
+background thread flushes them to ``forms`` in batched multi-row upserts on
+``form_submission_id``, a client-generated UUID, so replaying a batch after a
+timeout never creates duplicate rows.
+
+A row the database keeps rejecting (not a network or server outage) is parked
+after ``MAX_ATTEMPTS`` tries. Parked rows stay in the journal so the user and
+admins can see them; an admin can retry them, and discarding one hands it back
+so its evidence can be released.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+try:
+    import httpx
+except ImportError:  # only needed to recognise network errors from the Supabase client
+    httpx = None
+
+# SQLSTATE classes that say nothing about the row: connection, rollback, resources, shutdown
+TRANSIENT_SQLSTATE_CLASSES = {"08", "40", "53", "57"}
+
+JOURNAL_PATH = "submissions_journal.db"
+FLUSH_INTERVAL = 2.0  # seconds
+FLUSH_BATCH = 200
+MAX_ATTEMPTS = 5  # failed single-row inserts before an entry is parked as failed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    submission_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    user_name TEXT,
+    row TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS journal_user_idx ON journal (user_id) WHERE failed = 0;
+"""
+
+
+def is_unavailable(error):
+    """Whether ``error`` means the database could not be reached, rather than that it rejected the row."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    code = str(getattr(error, "code", "") or "")
+    if len(code) == 3 and code.startswith("5"):  # HTTP 5xx from PostgREST or a gateway
+        return True
+    return len(code) == 5 and code[:2] in TRANSIENT_SQLSTATE_CLASSES
+
+
+class SubmissionJournal:
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def append(self, row, user_name=None):
+        """Durably record a forms row that carries a ``form_submission_id``."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO journal (submission_id, user_id, user_name, row, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (row["form_submission_id"], row["user_id"], user_name, json.dumps(row), time.time()),
+            )
+
+    def pending_for_user(self, user_id):
+        """Rows for ``user_id`` not yet in the database, with a provisional form_created_at."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT row, created_at FROM journal WHERE user_id = ? AND failed = 0 ORDER BY created_at",
+                (user_id,),
+            )
+            entries = cur.fetchall()
+        rows = []
+        for raw, created_at in entries:
+            row = json.loads(raw)
+            row["form_created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(created_at))
+            rows.append(row)
+        return rows
+
+    def failed_entries(self, user_id=None):
+        """Parked rows (all, or one user's) with their submission_id and last error."""
+        query = "SELECT submission_id, user_name, row, attempts, last_error FROM journal WHERE failed = 1"
+        params = ()
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params = (user_id,)
+        with self._lock:
+            entries = self._conn.execute(query + " ORDER BY created_at", params).fetchall()
+        rows = []
+        for sid, user_name, raw, attempts, last_error in entries:
+            row = json.loads(raw)
+            row.update(submission_id=sid, user_name=user_name, attempts=attempts, last_error=last_error)
+            rows.append(row)
+        return rows
+
+    def retry(self, submission_ids):
+        """Put parked rows back in the queue with a fresh attempt count."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE journal SET failed = 0, attempts = 0 WHERE submission_id = ? AND failed = 1",
+                [(sid,) for sid in submission_ids],
+            )
+
+    def discard(self, submission_ids):
+        """Remove parked rows and return them, so the caller can release their evidence."""
+        with self._lock:
+            rows = []
+            for sid in submission_ids:
+                found = self._conn.execute(
+                    "SELECT row FROM journal WHERE submission_id = ? AND failed = 1", (sid,)
+                ).fetchone()
+                if found:
+                    self._conn.execute("DELETE FROM journal WHERE submission_id = ?", (sid,))
+                    rows.append(json.loads(found[0]))
+            return rows
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM journal WHERE failed = 0").fetchone()[0]
+
+    def flush(self, client, batch_size=FLUSH_BATCH, on_inserted=None):
+        """Push pending entries to forms; returns how many rows were newly inserted.
+
+        ``on_inserted(rows)`` receives the rows the database actually inserted
+        (duplicates from a replayed batch are skipped), each with its user_name.
+        """
+        with self._flush_lock:
+            inserted_total = 0
+            while True:
+                with self._lock:
+                    entries = self._conn.execute(
+                        "SELECT submission_id, user_name, row FROM journal WHERE failed = 0 "
+                        "ORDER BY created_at LIMIT ?",
+                        (batch_size,),
+                    ).fetchall()
+                if not entries:
+                    return inserted_total
+                names = {sid: name for sid, name, _ in entries}
+                try:
+                    inserted = self._upsert(client, [json.loads(raw) for _, _, raw in entries])
+                    done = [sid for sid, _, _ in entries]
+                except Exception as e:
+                    if is_unavailable(e):
+                        logging.warning(f"Journal flush deferred, database unavailable: {e}")
+                        return inserted_total  # everything stays queued until the next interval
+                    logging.error(f"Journal batch flush failed, retrying rows individually: {e}")
+                    inserted, done = self._flush_individually(client, entries)
+                    if not done:
+                        return inserted_total  # database unavailable; try again next interval
+                self._delete(done)
+                for row in inserted:
+                    row["user_name"] = names.get(row.get("form_submission_id"))
+                if inserted and on_inserted:
+                    on_inserted(inserted)
+                inserted_total += len(inserted)
+                if len(entries) < batch_size:
+                    return inserted_total
+
+    def _upsert(self, client, rows):
+        res = client.table("forms").upsert(
+            rows, on_conflict="form_submission_id", ignore_duplicates=True
+        ).execute()
+        return res.data or []
+
+    def _flush_individually(self, client, entries):
+        inserted, done, errors = [], [], []
+        for sid, _, raw in entries:
+            try:
+                inserted += self._upsert(client, [json.loads(raw)])
+                done.append(sid)
+            except Exception as e:
+                if is_unavailable(e):
+                    break  # the database went away; the rest stay queued and no attempt is counted
+                errors.append((str(e)[:500], MAX_ATTEMPTS, sid))
+        if errors:
+            logging.error(f"Journal rows rejected by the database: {[sid for _, _, sid in errors]}")
+            with self._lock:
+                self._conn.executemany(
+                    "UPDATE journal SET attempts = attempts + 1, last_error = ?, "
+                    "failed = (attempts + 1 >= ?) WHERE submission_id = ?",
+                    errors,
+                )
+        return inserted, done
+
+    def _delete(self, submission_ids):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM journal WHERE submission_id = ?", [(sid,) for sid in submission_ids]
+            )
+
+    def start_flusher(self, client, interval=FLUSH_INTERVAL, on_inserted=None):
+        """Flush on a daemon thread every ``interval`` seconds."""
+
+        def run():
+            while True:
+                try:
+                    self.flush(client, on_inserted=on_inserted)
+                except Exception as e:
+                    logging.error(f"Journal flusher error: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name="journal-flusher", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,269 @@
+"""Aggregated leaderboard queries.
+
+The summing, ordering and limiting happen in the database (see the
+leaderboard_totals function in sql/), so the payload is one row per user no
+matter how many forms have been submitted. The SQLite version runs the same query
+against a local database for testing without Supabase.
+"""
+
+from src.utils.cache import TTLCache
+
+LEADERBOARD_RPC = "leaderboard_totals"
+AROUND_RPC = "leaderboard_around"
+PAGE_RPC = "leaderboard_page"
+USER_TOTALS_RPC = "leaderboard_user_totals"
+USER_TOTALS_PAGE = 1000  # rows per leaderboard_user_totals call, within PostgREST's max-rows
+LEADERBOARD_TTL = 60  # seconds; submissions also invalidate explicitly
+
+# view option -> (ascending, limit)
+VIEW_OPTIONS = {
+    "All": (False, None),
+    "Top 10": (False, 10),
+    "Bottom 10": (True, 10),
+}
+MY_POSITION = "My position"
+NEIGHBOURHOOD_RADIUS = 5
+PAGE_SIZES = [25, 50, 100]
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    user_name TEXT NOT NULL UNIQUE,
+    user_password TEXT,
+    user_admin INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS seasons (
+    season_id INTEGER PRIMARY KEY,
+    season_name TEXT NOT NULL,
+    started_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    ended_at TEXT,
+    archive_path TEXT
+);
+INSERT INTO seasons (season_name) SELECT 'Season 1' WHERE NOT EXISTS (SELECT 1 FROM seasons);
+CREATE TABLE IF NOT EXISTS forms (
+    form_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (user_id),
+    form_stepcount INTEGER NOT NULL,
+    form_date TEXT NOT NULL,
+    form_filepath TEXT,
+    form_submission_id TEXT UNIQUE,
+    form_verified INTEGER DEFAULT 0,
+    form_created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    season_id INTEGER REFERENCES seasons (season_id),
+    form_suspicion REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS forms_season_date_user_idx ON forms (season_id, form_date, user_id);
+CREATE INDEX IF NOT EXISTS forms_season_user_date_idx ON forms (season_id, user_id, form_date);
+CREATE INDEX IF NOT EXISTS forms_review_queue_idx ON forms (season_id, form_created_at, form_id) WHERE NOT form_verified;
+CREATE INDEX IF NOT EXISTS forms_review_steps_idx ON forms (season_id, form_stepcount, form_id) WHERE NOT form_verified;
+CREATE INDEX IF NOT EXISTS forms_review_suspicion_idx ON forms (season_id, form_suspicion, form_id) WHERE NOT form_verified;
+-- SQLite column defaults cannot be subqueries, so new forms join the active
+-- season here and are scored for the review queue (sql/010_review_queue_keyset.sql)
+CREATE TRIGGER IF NOT EXISTS forms_active_season AFTER INSERT ON forms
+BEGIN
+    UPDATE forms SET season_id = COALESCE(NEW.season_id, (SELECT season_id FROM seasons WHERE ended_at IS NULL))
+    WHERE form_id = NEW.form_id;
+    UPDATE forms SET form_suspicion = (
+        SELECT ROUND(
+            CAST(NEW.form_stepcount AS REAL) / MAX(AVG(f.form_stepcount), 1)
+            + (SUM(f.form_date = NEW.form_date) - 1)
+            + NEW.form_stepcount / 50000.0,
+            3
+        )
+        FROM forms f
+        WHERE f.user_id = NEW.user_id
+          AND f.season_id = (SELECT season_id FROM forms WHERE form_id = NEW.form_id)
+          AND f.form_id <= NEW.form_id
+    )
+    WHERE form_id = NEW.form_id;
+END;
+"""
+
+# Appended to the WHERE clause of every SQLite query that reads forms
+SQLITE_ACTIVE_SEASON = "f.season_id = (SELECT season_id FROM seasons WHERE ended_at IS NULL)"
+
+SQLITE_LEADERBOARD_SQL = """
+SELECT u.user_id, u.user_name, SUM(f.form_stepcount) AS total_steps, COUNT(*) AS form_count
+FROM forms f
+JOIN users u ON u.user_id = f.user_id
+WHERE (:form_date IS NULL OR f.form_date = :form_date)
+  AND """ + SQLITE_ACTIVE_SEASON + """
+GROUP BY u.user_id, u.user_name
+ORDER BY
+    CASE WHEN :ascending THEN SUM(f.form_stepcount) END ASC,
+    CASE WHEN NOT :ascending THEN SUM(f.form_stepcount) END DESC,
+    u.user_id
+LIMIT COALESCE(:limit, -1)
+"""
+
+SQLITE_AROUND_SQL = """
+WITH totals AS (
+    SELECT f.user_id, SUM(f.form_stepcount) AS total_steps
+    FROM forms f
+    JOIN users u ON u.user_id = f.user_id
+    WHERE (:form_date IS NULL OR f.form_date = :form_date)
+      AND """ + SQLITE_ACTIVE_SEASON + """
+    GROUP BY f.user_id
+),
+ranked AS (
+    SELECT ROW_NUMBER() OVER (ORDER BY total_steps DESC, user_id) AS rank,
+           COUNT(*) OVER () AS total_users,
+           user_id, total_steps
+    FROM totals
+),
+me AS (SELECT rank FROM ranked WHERE user_id = :user_id)
+SELECT r.rank, r.user_id, u.user_name, r.total_steps, r.total_users
+FROM ranked r
+JOIN me ON r.rank BETWEEN me.rank - :radius AND me.rank + :radius
+JOIN users u ON u.user_id = r.user_id
+ORDER BY r.rank
+"""
+
+SQLITE_PAGE_SQL = """
+WITH totals AS (
+    SELECT f.user_id, SUM(f.form_stepcount) AS total_steps
+    FROM forms f
+    WHERE (:form_date IS NULL OR f.form_date = :form_date)
+      AND """ + SQLITE_ACTIVE_SEASON + """
+    GROUP BY f.user_id
+)
+SELECT t.user_id, u.user_name, t.total_steps
+FROM totals t
+JOIN users u ON u.user_id = t.user_id
+WHERE :after_steps IS NULL
+   OR t.total_steps < :after_steps
+   OR (t.total_steps = :after_steps AND t.user_id > :after_user_id)
+ORDER BY t.total_steps DESC, t.user_id
+LIMIT :limit OFFSET :offset
+"""
+
+SQLITE_USER_TOTALS_SQL = """
+SELECT f.user_id, u.user_name, SUM(f.form_stepcount) AS total_steps, COUNT(*) AS form_count,
+       MAX(f.form_id) AS max_form_id
+FROM forms f
+JOIN users u ON u.user_id = f.user_id
+WHERE f.user_id > COALESCE(:after_user_id, -1)
+  AND """ + SQLITE_ACTIVE_SEASON + """
+GROUP BY f.user_id, u.user_name
+ORDER BY f.user_id
+LIMIT :limit
+"""
+
+
+def fetch_leaderboard(client, form_date=None, ascending=False, limit=None):
+    """Return [{user_id, user_name, total_steps, form_count}, ...] summed and sorted."""
+    params = {
+        "p_form_date": str(form_date) if form_date else None,
+        "p_ascending": ascending,
+        "p_limit": limit,
+    }
+    return client.rpc(LEADERBOARD_RPC, params).execute().data or []
+
+
+def fetch_around(client, user_id, form_date=None, radius=NEIGHBOURHOOD_RADIUS):
+    """Return the user's row and ``radius`` rows either side, each with its rank.
+
+    Empty if the user has no steps for the period.
+    """
+    params = {
+        "p_user_id": user_id,
+        "p_form_date": str(form_date) if form_date else None,
+        "p_radius": radius,
+    }
+    return client.rpc(AROUND_RPC, params).execute().data or []
+
+
+def fetch_leaderboard_page(client, form_date=None, after=None, offset=0, limit=50):
+    """One page of the descending leaderboard.
+
+    ``after`` is the (total_steps, user_id) of the previous page's last row;
+    ``offset`` skips rows after that point and is only needed to jump to a rank.
+    """
+    after_steps, after_user_id = after or (None, None)
+    params = {
+        "p_form_date": str(form_date) if form_date else None,
+        "p_after_steps": after_steps,
+        "p_after_user_id": after_user_id,
+        "p_offset": offset,
+        "p_limit": limit,
+    }
+    return client.rpc(PAGE_RPC, params).execute().data or []
+
+
+def fetch_user_totals(client, page_size=USER_TOTALS_PAGE):
+    """Every user's season total, form count and highest form_id, fetched in user_id keyset pages."""
+    rows, after = [], None
+    while True:
+        params = {"p_after_user_id": after, "p_limit": page_size}
+        page = client.rpc(USER_TOTALS_RPC, params).execute().data or []
+        rows += page
+        if len(page) < page_size:
+            return rows
+        after = page[-1]["user_id"]
+
+
+# One snapshot per (date, view option), shared by every session in the process
+_leaderboard_cache = TTLCache(ttl=LEADERBOARD_TTL)
+
+
+def cached_leaderboard(client, form_date=None, view_option="All"):
+    """Cached fetch_leaderboard keyed by the page's date and view filters."""
+    ascending, limit = VIEW_OPTIONS[view_option]
+    key = (str(form_date) if form_date else None, view_option)
+    return _leaderboard_cache.get_or_load(
+        key, lambda: fetch_leaderboard(client, form_date, ascending=ascending, limit=limit)
+    )
+
+
+def invalidate_leaderboard():
+    """Call after any insert, verify or delete on forms."""
+    _leaderboard_cache.invalidate()
+
+
+def create_sqlite_schema(conn):
+    """Create the minimal users/forms tables used by the SQLite backend."""
+    conn.executescript(SQLITE_SCHEMA)
+
+
+def fetch_leaderboard_sqlite(conn, form_date=None, ascending=False, limit=None):
+    """SQLite equivalent of fetch_leaderboard for local testing."""
+    params = {
+        "form_date": str(form_date) if form_date else None,
+        "ascending": bool(ascending),
+        "limit": limit,
+    }
+    return _sqlite_rows(conn, SQLITE_LEADERBOARD_SQL, params)
+
+
+def fetch_around_sqlite(conn, user_id, form_date=None, radius=NEIGHBOURHOOD_RADIUS):
+    """SQLite equivalent of fetch_around (needs SQLite 3.25+ for window functions)."""
+    params = {
+        "user_id": user_id,
+        "form_date": str(form_date) if form_date else None,
+        "radius": radius,
+    }
+    return _sqlite_rows(conn, SQLITE_AROUND_SQL, params)
+
+
+def fetch_leaderboard_page_sqlite(conn, form_date=None, after=None, offset=0, limit=50):
+    """SQLite equivalent of fetch_leaderboard_page."""
+    after_steps, after_user_id = after or (None, None)
+    params = {
+        "form_date": str(form_date) if form_date else None,
+        "after_steps": after_steps,
+        "after_user_id": after_user_id,
+        "offset": offset,
+        "limit": limit,
+    }
+    return _sqlite_rows(conn, SQLITE_PAGE_SQL, params)
+
+
+def fetch_user_totals_sqlite(conn, after=None, limit=USER_TOTALS_PAGE):
+    """SQLite equivalent of one leaderboard_user_totals page."""
+    return _sqlite_rows(conn, SQLITE_USER_TOTALS_SQL, {"after_user_id": after, "limit": limit})
+
+
+def _sqlite_rows(conn, sql, params):
+    cur = conn.execute(sql, params)
+    columns = [c[0] for c in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
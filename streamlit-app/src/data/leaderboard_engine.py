@@ -0,0 +1,201 @@
+"""Incremental all-time leaderboard.
+
+Totals are loaded once from the aggregated leaderboard query, then kept up to
+date by +steps/-steps deltas from the submit and delete paths. Users are held
+in a list sorted by (-total_steps, user_id), so top-N/bottom-N and a user's
+neighbourhood are slices and a rank lookup is a bisect instead of a sort over
+every user. A periodic reconcile reloads from the database to correct any
+drift (e.g. rows changed by another process). Only one thread reloads at a
+time; others keep reading the current state (or wait for the first load).
+
+Deltas arrive after their insert or delete has committed, so a reload running
+at the same time may already include them. Each submission's delta carries its
+form_id and is replayed onto the new state only if it is above the user's
+``max_form_id`` in the snapshot. Whether a delete was read cannot be told that
+way, so a delete during a reload is not replayed; the next ensure_fresh
+reloads again instead.
+"""
+
+import bisect
+import threading
+import time
+
+from src.data.leaderboard import fetch_user_totals
+
+RECONCILE_INTERVAL = 300  # seconds
+
+
+class LeaderboardEngine:
+    def __init__(self, reconcile_interval=RECONCILE_INTERVAL):
+        self.reconcile_interval = reconcile_interval
+        self._totals = {}  # user_id -> total_steps
+        self._counts = {}  # user_id -> number of forms contributing
+        self._names = {}  # user_id -> user_name
+        self._order = []  # sorted [(-total_steps, user_id), ...]
+        self._lock = threading.RLock()
+        self._loaded = threading.Condition(self._lock)
+        self._loaded_at = None
+        self._reloading = False
+        self._in_flight = []  # deltas applied since the running reload began
+        self._generation = 0  # bumped by reset(); a reload that started earlier is dropped
+
+    # ------------------ LOADING ------------------
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def load(self, rows):
+        """Replace state with rows of {user_id, user_name, total_steps, form_count}."""
+        with self._lock:
+            self._totals = {r["user_id"]: int(r["total_steps"]) for r in rows}
+            self._counts = {r["user_id"]: int(r["form_count"]) for r in rows}
+            self._names = {r["user_id"]: r["user_name"] for r in rows}
+            self._order = sorted((-steps, uid) for uid, steps in self._totals.items())
+            self._loaded_at = time.monotonic()
+
+    def reconcile(self, loader):
+        """Reload from ``loader()`` and return how many users had drifted.
+
+        Returns None without loading if another thread is already reloading.
+        """
+        with self._lock:
+            if self._reloading:
+                return None
+            self._reloading = True
+            self._in_flight = []
+            generation = self._generation
+        try:
+            rows = loader()
+        except Exception:
+            with self._lock:
+                self._reloading = False
+                self._loaded.notify_all()
+            raise
+        with self._lock:
+            if generation != self._generation:
+                self._reloading = False
+                self._loaded.notify_all()
+                return 0
+            fresh = {r["user_id"]: int(r["total_steps"]) for r in rows}
+            drifted = sum(1 for uid in fresh.keys() | self._totals.keys()
+                          if fresh.get(uid) != self._totals.get(uid))
+            self.load(rows)
+            # Replay only the deltas the snapshot missed
+            in_flight, self._in_flight = self._in_flight, []
+            self._reloading = False
+            high_water = {r["user_id"]: r.get("max_form_id") or 0 for r in rows}
+            recheck = False
+            for user_id, delta, user_name, forms, form_id in in_flight:
+                if forms > 0 and form_id is not None:
+                    if form_id > high_water.get(user_id, 0):
+                        self.apply(user_id, delta, user_name, forms, form_id)
+                else:
+                    recheck = True
+            if recheck:
+                # A delete may or may not be in the snapshot; mark it stale so the next ensure_fresh reloads
+                self._loaded_at = time.monotonic() - self.reconcile_interval - 1
+            self._loaded.notify_all()
+        return drifted
+
+    def ensure_fresh(self, loader):
+        """Load on first use and reconcile once the interval has elapsed."""
+        with self._lock:
+            stale = (self._loaded_at is None
+                     or time.monotonic() - self._loaded_at > self.reconcile_interval)
+            if stale and self._reloading:
+                # Someone else is loading; only the very first load is waited for
+                self._loaded.wait_for(lambda: self.loaded or not self._reloading)
+                return
+        if stale and self.reconcile(loader) is None:
+            self.ensure_fresh(loader)
+
+    # ------------------ DELTAS ------------------
+    def apply(self, user_id, delta, user_name=None, forms=1, form_id=None):
+        """Add ``delta`` steps from ``forms`` submissions (negative to remove).
+
+        ``form_id`` is the inserted or deleted row's id, used to decide whether a
+        reload running at the same time already saw it.
+        """
+        with self._lock:
+            if self._reloading:
+                self._in_flight.append((user_id, delta, user_name, forms, form_id))
+                if not self.loaded:
+                    return  # replayed once the first load lands
+            elif not self.loaded:
+                return  # the first load will include this change
+            old = self._totals.get(user_id)
+            if old is not None:
+                self._order.pop(bisect.bisect_left(self._order, (-old, user_id)))
+            count = self._counts.get(user_id, 0) + forms
+            if count <= 0:
+                self._totals.pop(user_id, None)
+                self._counts.pop(user_id, None)
+                self._names.pop(user_id, None)
+                return
+            new = (old or 0) + int(delta)
+            self._totals[user_id] = new
+            self._counts[user_id] = count
+            if user_name:
+                self._names[user_id] = user_name
+            bisect.insort(self._order, (-new, user_id))
+
+    def reset(self):
+        """Empty the leaderboard, e.g. after all forms are cleared."""
+        with self._lock:
+            self._generation += 1
+            self._in_flight = []
+            self.load([])
+
+    # ------------------ QUERIES ------------------
+    def __len__(self):
+        return len(self._order)
+
+    def _row(self, key):
+        steps, uid = -key[0], key[1]
+        return {"user_id": uid, "user_name": self._names.get(uid, ""), "total_steps": steps}
+
+    def top(self, n=None):
+        with self._lock:
+            keys = self._order if n is None else self._order[:n]
+            return [self._row(k) for k in keys]
+
+    def bottom(self, n):
+        with self._lock:
+            return [self._row(k) for k in reversed(self._order[-n:])] if n else []
+
+    def rank(self, user_id):
+        """1-based rank of ``user_id``, or None if they have no steps."""
+        with self._lock:
+            steps = self._totals.get(user_id)
+            if steps is None:
+                return None
+            return bisect.bisect_left(self._order, (-steps, user_id)) + 1
+
+    def page(self, after=None, offset=0, limit=50):
+        """Keyset page: rows after the (total_steps, user_id) cursor, each with its rank."""
+        with self._lock:
+            start = bisect.bisect_right(self._order, (-after[0], after[1])) if after else 0
+            start += offset
+            return [dict(self._row(k), rank=i)
+                    for i, k in enumerate(self._order[start:start + limit], start=start + 1)]
+
+    def around(self, user_id, radius=5):
+        """The user's row plus ``radius`` rows either side, each with its rank."""
+        with self._lock:
+            rank = self.rank(user_id)
+            if rank is None:
+                return []
+            start = max(rank - 1 - radius, 0)
+            window = self._order[start:rank + radius]
+            return [dict(self._row(k), rank=i, total_users=len(self._order))
+                    for i, k in enumerate(window, start=start + 1)]
+
+
+# Process-wide instance shared by every session
+engine = LeaderboardEngine()
+
+
+def ensure_engine(client):
+    """Load or reconcile the shared engine from the aggregated query."""
+    engine.ensure_fresh(lambda: fetch_user_totals(client))
+    return engine
@@ -0,0 +1,104 @@
+"""Admin moderation: verify or delete many queue submissions in one go.
+
+Each batch is a single ``in_("form_id", ...)`` update or delete. Rows the
+database reports back are the successes; anything else (e.g. already handled
+by another admin) is reported as failed. Verifies only match rows that are
+still unverified, so two admins verifying the same row can't both succeed.
+Evidence references are then released on a small thread pool and the shared
+leaderboard caches are updated once.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from src.data.evidence import get_evidence_store
+from src.data.leaderboard import invalidate_leaderboard
+from src.data.leaderboard_engine import engine as leaderboard_engine
+from src.data.rollup import apply_rollup_delta
+
+CLEANUP_WORKERS = 8
+
+
+class BatchResult:
+    def __init__(self, action, requested):
+        self.action = action
+        self.requested = list(requested)
+        self.succeeded = []
+        self.file_errors = 0
+        self.error = None
+
+    @property
+    def failed(self):
+        done = set(self.succeeded)
+        return [form_id for form_id in self.requested if form_id not in done]
+
+    def summary(self):
+        parts = [f"{len(self.succeeded)} of {len(self.requested)} submissions {self.action}"]
+        if self.failed:
+            parts.append(f"{len(self.failed)} failed")
+        if self.file_errors:
+            parts.append(f"{self.file_errors} evidence files could not be removed")
+        return ", ".join(parts) + "."
+
+
+def _release_evidence(rows):
+    """Release each row's evidence reference in parallel; returns how many failed."""
+    rows = [r for r in rows if r.get("form_filepath")]
+    if not rows:
+        return 0
+    store = get_evidence_store()
+
+    def release(row):
+        try:
+            store.release(row.get("form_submission_id"), row["form_filepath"])
+            return True
+        except Exception:
+            return False
+
+    with ThreadPoolExecutor(max_workers=min(CLEANUP_WORKERS, len(rows))) as pool:
+        return sum(not ok for ok in pool.map(release, rows))
+
+
+def verify_forms(client, rows):
+    """Mark queue rows verified and drop their evidence; ``rows`` are queue row dicts."""
+    by_id = {r["form_id"]: r for r in rows}
+    result = BatchResult("verified", by_id)
+    if not by_id:
+        return result
+    try:
+        # Only rows this call flips come back, so a concurrent verify isn't counted
+        # (and its evidence released) twice
+        res = (
+            client.table("forms")
+            .update({"form_verified": True})
+            .in_("form_id", list(by_id))
+            .eq("form_verified", False)
+            .execute()
+        )
+    except Exception as e:
+        result.error = e
+        return result
+    result.succeeded = [r["form_id"] for r in res.data or [] if r["form_id"] in by_id]
+    invalidate_leaderboard()
+    result.file_errors = _release_evidence([by_id[i] for i in result.succeeded])
+    return result
+
+
+def delete_forms(client, rows):
+    """Delete queue rows, update the leaderboard caches and release their evidence."""
+    by_id = {r["form_id"]: r for r in rows}
+    result = BatchResult("deleted", by_id)
+    if not by_id:
+        return result
+    try:
+        res = client.table("forms").delete().in_("form_id", list(by_id)).execute()
+    except Exception as e:
+        result.error = e
+        return result
+    deleted = [r for r in res.data or [] if r["form_id"] in by_id]
+    result.succeeded = [r["form_id"] for r in deleted]
+    invalidate_leaderboard()
+    for row in deleted:
+        leaderboard_engine.apply(row["user_id"], -row["form_stepcount"], forms=-1, form_id=row["form_id"])
+        apply_rollup_delta(row["user_id"], row["form_date"], -row["form_stepcount"])
+    result.file_errors = _release_evidence([by_id[i] for i in result.succeeded])
+    return result
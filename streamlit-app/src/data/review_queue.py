@@ -0,0 +1,88 @@
+"""Admin verification queue: keyset pages of unverified evidence in a chosen order.
+
+Each page is one ``review_queue_page`` call (sql/010_review_queue_keyset.sql)
+that walks a partial index of the season's unverified forms, and the queue-size
+badge is a head-only count, so an Admin rerun never loads the whole queue.
+Suspicion is scored when a form is inserted and stored on the row. Rows carry
+``sort_key``; pass the last row's ``(sort_key, form_id)`` as ``after`` to get
+the next page.
+"""
+
+from src.data.leaderboard import SQLITE_ACTIVE_SEASON
+from src.data.seasons import get_active_season_id
+
+REVIEW_PAGE_RPC = "review_queue_page"
+QUEUE_ORDERS = {
+    "Oldest first": "oldest",
+    "Highest steps first": "steps",
+    "Most suspicious first": "suspicious",
+}
+QUEUE_PAGE_SIZE = 20
+
+# Local SQLite equivalents of the three review_queue_page branches
+_SQLITE_REVIEW_SELECT = """
+SELECT form_id, form_submission_id, user_id, form_date, form_stepcount, form_filepath,
+       form_created_at, form_suspicion AS suspicion, CAST({key} AS TEXT) AS sort_key
+FROM forms f
+WHERE """ + SQLITE_ACTIVE_SEASON + """
+  AND NOT f.form_verified AND f.form_stepcount >= :min_steps
+  AND {keyset}
+ORDER BY {order}
+LIMIT :limit
+"""
+SQLITE_REVIEW_PAGE_SQL = {
+    "oldest": _SQLITE_REVIEW_SELECT.format(
+        key="f.form_created_at",
+        keyset="(:after_key IS NULL OR (f.form_created_at, f.form_id) > (:after_key, :after_id))",
+        order="f.form_created_at, f.form_id",
+    ),
+    "steps": _SQLITE_REVIEW_SELECT.format(
+        key="f.form_stepcount",
+        keyset="(:after_key IS NULL OR (f.form_stepcount, f.form_id) < (CAST(:after_key AS INTEGER), :after_id))",
+        order="f.form_stepcount DESC, f.form_id DESC",
+    ),
+    "suspicious": _SQLITE_REVIEW_SELECT.format(
+        key="f.form_suspicion",
+        keyset="(:after_key IS NULL OR (f.form_suspicion, f.form_id) < (CAST(:after_key AS REAL), :after_id))",
+        order="f.form_suspicion DESC, f.form_id DESC",
+    ),
+}
+
+
+def fetch_review_page(client, order="oldest", after=None, limit=QUEUE_PAGE_SIZE, min_steps=10000):
+    after_key, after_id = after or (None, None)
+    params = {
+        "p_order": order,
+        "p_after_key": after_key,
+        "p_after_id": after_id,
+        "p_limit": limit,
+        "p_min_steps": min_steps,
+    }
+    return client.rpc(REVIEW_PAGE_RPC, params).execute().data or []
+
+
+def count_review_queue(client, min_steps=10000):
+    """Number of active-season submissions waiting for review, without fetching any rows."""
+    res = (
+        client.table("forms")
+        .select("form_id", count="exact", head=True)
+        .eq("season_id", get_active_season_id(client))
+        .eq("form_verified", False)
+        .gte("form_stepcount", min_steps)
+        .execute()
+    )
+    return res.count or 0
+
+
+def fetch_review_page_sqlite(conn, order="oldest", after=None, limit=QUEUE_PAGE_SIZE, min_steps=10000):
+    """SQLite equivalent of fetch_review_page for local testing."""
+    after_key, after_id = after or (None, None)
+    params = {
+        "after_key": after_key,
+        "after_id": after_id,
+        "limit": limit,
+        "min_steps": min_steps,
+    }
+    cur = conn.execute(SQLITE_REVIEW_PAGE_SQL.get(order, SQLITE_REVIEW_PAGE_SQL["oldest"]), params)
+    columns = [c[0] for c in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
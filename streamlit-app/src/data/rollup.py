@@ -0,0 +1,245 @@
+"""Daily rollup for date-range leaderboards.
+
+Per-user daily totals are held as a users x days matrix of cumulative sums, so
+the total for any range is ``prefix[:, end + 1] - prefix[:, start]`` for every
+user at once instead of a rescan of forms. The ranking for a range is kept as
+arrays and cached until the next delta; dicts are built only for the rows a
+page shows.
+
+The matrix only spans the season so far (from its start to tomorrow). Rows
+dated outside that window, e.g. from before submit dates were validated, are
+kept aside as a short list and added to the ranges that cover them, so one
+stray date cannot make the matrix years wide.
+"""
+
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.data.leaderboard import SQLITE_ACTIVE_SEASON
+from src.utils.cache import TTLCache
+
+DAILY_TOTALS_RPC = "daily_totals"
+ROLLUP_TTL = 300  # seconds; submissions update it in place or invalidate it
+DAILY_TOTALS_PAGE = 1000  # rows per daily_totals call, within PostgREST's max-rows
+RANKED_CACHE_SIZE = 8  # ranked ranges kept per rollup
+MAX_DAYS_AHEAD = 1  # users in timezones ahead of the server may already be on tomorrow
+
+PERIODS = ["All time", "Single day", "This week", "Last 7 days", "This month", "Custom range"]
+
+SQLITE_DAILY_TOTALS_SQL = """
+SELECT f.user_id, u.user_name, f.form_date, SUM(f.form_stepcount) AS total_steps
+FROM forms f
+JOIN users u ON u.user_id = f.user_id
+WHERE """ + SQLITE_ACTIVE_SEASON + """
+  AND (:after_user_id IS NULL OR (f.user_id, f.form_date) > (:after_user_id, :after_date))
+GROUP BY f.user_id, u.user_name, f.form_date
+ORDER BY f.user_id, f.form_date
+LIMIT :limit
+"""
+
+
+def period_bounds(period, today=None):
+    """(start, end) dates for a preset period, inclusive; None for other periods."""
+    today = today or date.today()
+    if period == "This week":
+        return today - timedelta(days=today.weekday()), today
+    if period == "Last 7 days":
+        return today - timedelta(days=6), today
+    if period == "This month":
+        return today.replace(day=1), today
+    return None
+
+
+class RankedRange:
+    """Users with steps in a range, ordered by (total_steps desc, user_id)."""
+
+    def __init__(self, user_ids, user_names, totals):
+        self.user_ids = user_ids
+        self.user_names = user_names
+        self.totals = totals
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def rows(self, start, stop):
+        """Row dicts (with 1-based rank) for positions ``start:stop``."""
+        start, stop = max(start, 0), min(stop, len(self))
+        return [
+            {"rank": i + 1, "user_id": int(self.user_ids[i]),
+             "user_name": self.user_names[i], "total_steps": int(self.totals[i])}
+            for i in range(start, stop)
+        ]
+
+    def top(self, limit):
+        return self.rows(0, limit)
+
+    def bottom(self, limit):
+        return self.rows(len(self) - limit, len(self))[::-1]
+
+    def page(self, after=None, offset=0, limit=50):
+        """Keyset page; ``after`` is the (total_steps, user_id) of the previous page's last row."""
+        start = 0
+        if after:
+            steps, user_id = after
+            # rows at or before the cursor in (total_steps desc, user_id) order
+            start = int(np.count_nonzero((self.totals > steps) | ((self.totals == steps) & (self.user_ids <= user_id))))
+        start += offset
+        return self.rows(start, start + limit)
+
+    def around(self, user_id, radius=5):
+        """The user's row and ``radius`` rows either side, with total_users."""
+        matches = np.flatnonzero(self.user_ids == user_id)
+        if not len(matches):
+            return []
+        idx = int(matches[0])
+        return [dict(r, total_users=len(self)) for r in self.rows(idx - radius, idx + radius + 1)]
+
+
+class DailyRollup:
+    def __init__(self, user_ids, user_names, first_day, prefix, outside=None):
+        self.user_ids = user_ids  # sorted int64 array
+        self.user_names = user_names  # object array aligned with user_ids
+        self.first_day = first_day  # np.datetime64 day of column 0
+        self.prefix = prefix  # int64 (users, days + 1); prefix[:, 0] == 0
+        # (user index, day, steps) arrays for rows outside the matrix's window
+        self.outside = outside or (np.array([], dtype=np.int64), np.array([], dtype="datetime64[D]"),
+                                   np.array([], dtype=np.int64))
+        self._ranked = {}  # (lo, hi) columns -> RankedRange, cleared by apply()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, rows, first_day=None, last_day=None):
+        """Build from rows of {user_id, user_name, form_date, total_steps}.
+
+        The matrix covers ``first_day`` to ``last_day``; either may be None to
+        use the earliest/latest day with data. Rows outside go to ``outside``.
+        """
+        raw_ids = np.array([r["user_id"] for r in rows], dtype=np.int64)
+        days = np.array([str(r["form_date"])[:10] for r in rows], dtype="datetime64[D]")
+        steps = np.array([r["total_steps"] for r in rows], dtype=np.int64)
+
+        user_ids, user_idx = np.unique(raw_ids, return_inverse=True)
+        names = np.empty(len(user_ids), dtype=object)
+        names[user_idx] = [r["user_name"] for r in rows]
+
+        inside = np.ones(len(days), dtype=bool)
+        if first_day is not None:
+            inside &= days >= np.datetime64(str(first_day)[:10], "D")
+        if last_day is not None:
+            inside &= days <= np.datetime64(str(last_day)[:10], "D")
+
+        # a bounded window is kept whole so today's and tomorrow's submits can be applied in place
+        if first_day is not None:
+            start = np.datetime64(str(first_day)[:10], "D")
+        else:
+            start = days[inside].min() if inside.any() else np.datetime64(date.today(), "D")
+        if last_day is not None:
+            end = np.datetime64(str(last_day)[:10], "D")
+        else:
+            end = days[inside].max() if inside.any() else start - 1
+        width = max(int((end - start).astype(np.int64)) + 1, 0)
+        daily = np.zeros((len(user_ids), width), dtype=np.int64)
+        np.add.at(daily, (user_idx[inside], (days[inside] - start).astype(np.int64)), steps[inside])
+
+        prefix = np.zeros((len(user_ids), width + 1), dtype=np.int64)
+        prefix[:, 1:] = np.cumsum(daily, axis=1)
+        outside = (user_idx[~inside].astype(np.int64), days[~inside], steps[~inside])
+        return cls(user_ids, names, start, prefix, outside)
+
+    def _column(self, day):
+        offset = int((np.datetime64(str(day)[:10], "D") - self.first_day).astype(np.int64))
+        return min(max(offset, 0), self.prefix.shape[1] - 1)
+
+    def _range(self, start, end):
+        return self._column(start), self._column(np.datetime64(str(end)[:10], "D") + 1)
+
+    def _totals(self, start, end):
+        lo, hi = self._range(start, end)
+        totals = self.prefix[:, hi] - self.prefix[:, lo]
+        users, days, steps = self.outside
+        if len(users):
+            hit = (days >= np.datetime64(str(start)[:10], "D")) & (days <= np.datetime64(str(end)[:10], "D"))
+            totals = totals + np.bincount(users[hit], weights=steps[hit], minlength=len(totals)).astype(np.int64)
+        return totals
+
+    def totals(self, start, end):
+        """Steps per user between ``start`` and ``end`` inclusive, aligned with user_ids."""
+        with self._lock:
+            return self._totals(start, end)
+
+    def ranked(self, start, end):
+        """RankedRange of users with steps between ``start`` and ``end``, reused until the next delta."""
+        with self._lock:
+            key = self._range(start, end)
+            if len(self.outside[0]):
+                key += (str(start)[:10], str(end)[:10])  # ranges clamped to the same columns can differ outside
+            ranked = self._ranked.get(key)
+            if ranked is None:
+                totals = self._totals(start, end)
+                active = np.flatnonzero(totals > 0)
+                order = active[np.lexsort((self.user_ids[active], -totals[active]))]
+                ranked = RankedRange(self.user_ids[order], self.user_names[order], totals[order])
+                if len(self._ranked) >= RANKED_CACHE_SIZE:
+                    self._ranked.clear()
+                self._ranked[key] = ranked
+            return ranked
+
+    def apply(self, user_id, form_date, delta):
+        """Add ``delta`` in place; False if the user or day is outside the matrix."""
+        with self._lock:
+            row = int(np.searchsorted(self.user_ids, user_id))
+            if row >= len(self.user_ids) or self.user_ids[row] != user_id:
+                return False
+            offset = int((np.datetime64(str(form_date)[:10], "D") - self.first_day).astype(np.int64))
+            if offset < 0 or offset >= self.prefix.shape[1] - 1:
+                return False
+            self.prefix[row, offset + 1:] += delta
+            self._ranked.clear()
+            return True
+
+
+def fetch_daily_totals(client, page_size=DAILY_TOTALS_PAGE):
+    """Every (user, day) total for the active season, fetched in keyset pages."""
+    rows, after = [], (None, None)
+    while True:
+        params = {"p_after_user_id": after[0], "p_after_date": after[1], "p_limit": page_size}
+        page = client.rpc(DAILY_TOTALS_RPC, params).execute().data or []
+        rows += page
+        if len(page) < page_size:
+            return rows
+        after = (page[-1]["user_id"], str(page[-1]["form_date"]))
+
+
+def fetch_daily_totals_sqlite(conn, after=None, limit=DAILY_TOTALS_PAGE):
+    """SQLite equivalent of one daily_totals page for local testing."""
+    after_user_id, after_date = after or (None, None)
+    params = {"after_user_id": after_user_id, "after_date": after_date, "limit": limit}
+    cur = conn.execute(SQLITE_DAILY_TOTALS_SQL, params)
+    columns = [c[0] for c in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+# Process-wide rollup shared by every session
+_rollup_cache = TTLCache(ttl=ROLLUP_TTL, maxsize=1)
+
+
+def get_rollup(client, first_day=None):
+    """The shared rollup; pass the active season's start as ``first_day`` to bound its matrix."""
+    last_day = date.today() + timedelta(days=MAX_DAYS_AHEAD)
+    return _rollup_cache.get_or_load(
+        "rollup", lambda: DailyRollup.from_rows(fetch_daily_totals(client), first_day, last_day)
+    )
+
+
+def apply_rollup_delta(user_id, form_date, delta):
+    """Patch the shared rollup after a submit/delete, or drop it if that's not possible."""
+    rollup = _rollup_cache.get("rollup")
+    # with nothing cached a load may be running; invalidating makes it discard its result
+    if rollup is None or not rollup.apply(user_id, form_date, delta):
+        _rollup_cache.invalidate()
+
+
+def invalidate_rollup():
+    _rollup_cache.invalidate()
@@ -0,0 +1,205 @@
+"""Seasons: which challenge the live app shows, and archiving a finished one.
+
+Forms carry a ``season_id`` and every live query is scoped to the active
+season (sql/009_seasons.sql), so starting a new season is one ``start_season``
+call and the leaderboard is empty straight away. The old season is then
+archived on a background thread: a columnar snapshot of its forms (Parquet,
+or CSV without pyarrow) and an uncompressed tarball of its evidence under
+``archives/season_<id>/``, after which its evidence references are released.
+Its rows stay in forms, so earlier seasons remain queryable and exportable.
+
+Submissions are stamped with the season they were made in before they are
+journaled, so rows still waiting to be flushed at the switch stay in the old
+season. Other processes notice the new season through ``check_season`` (within
+SEASON_TTL) and drop their own leaderboard caches then.
+"""
+
+import logging
+import os
+import tarfile
+import threading
+from datetime import date
+
+from src.data.evidence import get_evidence_store
+from src.data.exports import HISTORY_FORMATS, evidence_manifest, iter_form_pages, write_history
+from src.data.identity import get_directory
+from src.data.leaderboard import invalidate_leaderboard
+from src.data.leaderboard_engine import engine as leaderboard_engine
+from src.data.rollup import invalidate_rollup
+from src.utils.cache import TTLCache
+
+START_SEASON_RPC = "start_season"
+SEASON_TTL = 60  # other processes pick up a new season within this
+ARCHIVE_FOLDER = "archives"
+
+_season_cache = TTLCache(ttl=SEASON_TTL, maxsize=3)
+_seen_season = None  # the active season this process's live caches were built for
+_seen_lock = threading.Lock()
+
+
+class SeasonArchiveRunning(RuntimeError):
+    pass
+
+
+def fetch_seasons(client):
+    """All seasons, newest first."""
+    return client.table("seasons").select("*").order("season_id", desc=True).execute().data or []
+
+
+def cached_seasons(client):
+    return _season_cache.get_or_load("all", lambda: fetch_seasons(client))
+
+
+def get_active_season_id(client):
+    def load():
+        rows = client.table("seasons").select("season_id").is_("ended_at", "null").limit(1).execute().data
+        return rows[0]["season_id"] if rows else None
+
+    return _season_cache.get_or_load("active", load)
+
+
+def get_active_season_start(client):
+    """The day the active season started, or None if no season is active."""
+
+    def load():
+        rows = client.table("seasons").select("started_at").is_("ended_at", "null").limit(1).execute().data
+        return date.fromisoformat(str(rows[0]["started_at"])[:10]) if rows else None
+
+    return _season_cache.get_or_load("start", load)
+
+
+def invalidate_season():
+    _season_cache.invalidate()
+
+
+def _reset_live_caches():
+    invalidate_leaderboard()
+    leaderboard_engine.reset()
+    invalidate_rollup()
+
+
+def check_season(client):
+    """The active season id; resets this process's live caches if it has changed.
+
+    Call before reading the leaderboard caches so a season started by another
+    process is picked up here too.
+    """
+    global _seen_season
+    season_id = get_active_season_id(client)
+    with _seen_lock:
+        if _seen_season is not None and season_id != _seen_season:
+            _reset_live_caches()
+        _seen_season = season_id
+    return season_id
+
+
+def seen_season():
+    """The season this process's live caches currently hold, if known."""
+    return _seen_season
+
+
+class ArchiveJob:
+    """Progress of one season archive; shared by every session so any admin can watch it."""
+
+    def __init__(self, season_id):
+        self.season_id = season_id
+        self.phase = "Starting"
+        self.done = 0
+        self.total = 0
+        self.error = None
+        self.finished = False
+        self.archive_path = None
+
+    def progress(self):
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    def begin(self, phase, total):
+        self.phase, self.done, self.total = phase, 0, total
+
+
+_job = None
+_job_lock = threading.Lock()
+
+
+def current_job():
+    return _job
+
+
+def start_new_season(client, name, folder=ARCHIVE_FOLDER):
+    """Switch to a new season now and archive the previous one in the background."""
+    global _job, _seen_season
+    with _job_lock:
+        if _job is not None and not _job.finished:
+            raise SeasonArchiveRunning("The previous season is still being archived.")
+        row = (client.rpc(START_SEASON_RPC, {"p_name": name}).execute().data or [{}])[0]
+        invalidate_season()
+        with _seen_lock:
+            _reset_live_caches()
+            _seen_season = row.get("season_id")
+        _job = ArchiveJob(row.get("previous_season_id"))
+        if _job.season_id is None:
+            _job.phase, _job.finished = "Nothing to archive", True
+            return _job
+        thread = threading.Thread(
+            target=archive_season, args=(client, _job, folder), name="season-archive", daemon=True
+        )
+        thread.start()
+        return _job
+
+
+def start_season_sqlite(conn, name):
+    """SQLite equivalent of the start_season RPC for local testing."""
+    previous = conn.execute("SELECT season_id FROM seasons WHERE ended_at IS NULL").fetchone()
+    conn.execute("UPDATE seasons SET ended_at = CURRENT_TIMESTAMP WHERE ended_at IS NULL")
+    cur = conn.execute("INSERT INTO seasons (season_name) VALUES (?)", (name,))
+    conn.commit()
+    return [{"previous_season_id": previous[0] if previous else None, "season_id": cur.lastrowid}]
+
+
+def _count_forms(client, season_id):
+    res = client.table("forms").select("form_id", count="exact", head=True).eq("season_id", season_id).execute()
+    return res.count or 0
+
+
+def archive_season(client, job, folder=ARCHIVE_FOLDER):
+    season_id = job.season_id
+    target = os.path.join(folder, f"season_{season_id}")
+    try:
+        os.makedirs(target, exist_ok=True)
+        directory = get_directory(client)
+        store = get_evidence_store()
+
+        # 1. Columnar snapshot of the season's forms
+        fmt = "Parquet" if "Parquet" in HISTORY_FORMATS else "CSV"
+        job.begin("Snapshotting submissions", _count_forms(client, season_id))
+        snapshot = os.path.join(target, "forms.parquet" if fmt == "Parquet" else "forms.csv")
+        with open(snapshot, "wb") as out:
+            write_history(client, directory, out, fmt, season_id=season_id,
+                          on_page=lambda rows: setattr(job, "done", rows))
+
+        # 2. Evidence tarball; JPEGs are already compressed, so no gzip
+        manifest = evidence_manifest(client, store.folder, directory, season_id=season_id)
+        job.begin("Archiving evidence", len(manifest))
+        with tarfile.open(os.path.join(target, "evidence.tar"), "w") as tar:
+            for arcname, path in manifest:
+                tar.add(path, arcname=arcname)
+                job.done += 1
+
+        # 3. Release the season's evidence now that it is archived
+        job.begin("Releasing evidence", len(manifest))
+        configure = lambda query: query.eq("season_id", season_id).not_.is_("form_filepath", "null")
+        for page in iter_form_pages(client, "form_submission_id, form_filepath", configure=configure):
+            for row in page:
+                store.release(row.get("form_submission_id"), row["form_filepath"])
+                job.done = min(job.done + 1, job.total)
+
+        client.table("seasons").update({"archive_path": target}).eq("season_id", season_id).execute()
+        invalidate_season()
+        job.archive_path = target
+        job.phase = "Archived"
+    except Exception as e:
+        logging.error(f"Archiving season {season_id} failed: {e}")
+        job.error = e
+        job.phase = "Failed"
+    finally:
+        job.finished = True
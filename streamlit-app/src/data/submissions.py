@@ -0,0 +1,173 @@
+"""Step submissions: what gets stored for a new form, and saving it off the script thread.
+
+Workers encode the evidence into the content-addressed evidence store (which
+also names the file), then append the row to the local
+write-behind journal; the journal's flusher thread inserts it into forms and
+updates the shared leaderboard caches for the rows that were actually inserted.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+
+from src.data.evidence import get_evidence_store
+from src.data.journal import SubmissionJournal
+from src.data.leaderboard import invalidate_leaderboard
+from src.data.leaderboard_engine import engine as leaderboard_engine
+from src.data.rollup import MAX_DAYS_AHEAD, apply_rollup_delta
+from src.data.seasons import seen_season
+from src.utils.images import detail_signature, dhash, encode_jpeg, thumbnail_jpeg
+
+# Only submissions at or above this need evidence for admin verification
+EVIDENCE_MIN_STEPS = 10000
+
+SUBMIT_WORKERS = 4
+MAX_PENDING_SUBMISSIONS = 32  # running + queued; beyond this submit() waits
+PENDING_WAIT_SECONDS = 5
+ENCODE_WORKERS = 0  # >0 moves JPEG encoding to a process pool of this size
+
+
+class SubmissionQueueFull(RuntimeError):
+    pass
+
+
+def needs_evidence(steps):
+    return steps >= EVIDENCE_MIN_STEPS
+
+
+def valid_form_date(form_date, season_start=None, today=None):
+    """Whether steps can be submitted for ``form_date``: not in the future, not before the season."""
+    today = today or date.today()
+    if form_date > today + timedelta(days=MAX_DAYS_AHEAD):
+        return False
+    return season_start is None or form_date >= season_start
+
+
+def build_form_row(user_id, steps, form_date, filepath=None, season_id=None):
+    """The forms row for a submission; ``form_filepath`` is None when no evidence is kept.
+
+    For evidence saved through ``submit`` the worker fills in ``form_filepath``
+    once the image's content hash is known. Pass the active ``season_id`` so a
+    row still in the journal when a new season starts keeps the season it was
+    submitted in, rather than taking the database default at flush time.
+    """
+    row = {
+        "form_submission_id": str(uuid.uuid4()),
+        "form_filepath": filepath,
+        "form_stepcount": steps,
+        "form_date": str(form_date),
+        "user_id": user_id,
+        "form_verified": False,
+    }
+    if season_id is not None:
+        row["season_id"] = season_id
+    return row
+
+
+# ------------------ BACKGROUND PERSISTENCE ------------------
+_io_pool = ThreadPoolExecutor(max_workers=SUBMIT_WORKERS, thread_name_prefix="submit")
+_encode_pool = ProcessPoolExecutor(max_workers=ENCODE_WORKERS) if ENCODE_WORKERS else None
+_pending = threading.BoundedSemaphore(MAX_PENDING_SUBMISSIONS)
+_journal = None
+_journal_lock = threading.Lock()
+_flusher = None
+
+
+class SubmissionHandle:
+    """Tracks one submission being saved; kept in the submitter's session."""
+
+    def __init__(self, future, steps, form_date):
+        self.future = future
+        self.steps = steps
+        self.form_date = form_date
+        self.submitted_at = time.time()
+
+    def done(self):
+        return self.future.done()
+
+    def row(self):
+        """The journaled forms row; raises the worker's exception if saving failed."""
+        return self.future.result()
+
+    def error(self):
+        return self.future.exception() if self.future.done() else None
+
+
+def _encode(img):
+    if _encode_pool is not None:
+        return _encode_pool.submit(encode_jpeg, img).result()
+    return encode_jpeg(img)
+
+
+def get_journal():
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = SubmissionJournal()
+        return _journal
+
+
+def _apply_inserted(rows):
+    """Runs on the flusher thread for rows the database newly inserted."""
+    invalidate_leaderboard()
+    season_id = seen_season()
+    for row in rows:
+        if season_id is not None and row.get("season_id", season_id) != season_id:
+            continue  # a previous season's straggler; the live totals don't include it
+        leaderboard_engine.apply(row["user_id"], row["form_stepcount"], user_name=row.get("user_name"),
+                                 form_id=row.get("form_id"))
+        apply_rollup_delta(row["user_id"], row["form_date"], row["form_stepcount"])
+
+
+def start_flusher(client):
+    """Start the process-wide journal flusher once; safe to call on every rerun."""
+    global _flusher
+    journal = get_journal()
+    with _journal_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = journal.start_flusher(client, on_inserted=_apply_inserted)
+
+
+def discard_failed(submission_ids):
+    """Drop parked journal rows and release the evidence stored for them."""
+    store = get_evidence_store()
+    rows = get_journal().discard(submission_ids)
+    for row in rows:
+        if row.get("form_filepath"):
+            store.release(row["form_submission_id"], row["form_filepath"])
+    return rows
+
+
+def persist_submission(row, image=None, user_name=None):
+    """Store evidence (if any) and journal the row for the flusher to insert."""
+    try:
+        if image is not None:
+            store = get_evidence_store()
+            row["form_filepath"] = store.store(
+                _encode(image), dhash(image), row["form_submission_id"], row["user_id"], row["form_date"],
+                thumbnail=thumbnail_jpeg(image), detail=detail_signature(image),
+            )
+        try:
+            get_journal().append(row, user_name)
+        except Exception:
+            if image is not None:
+                # no orphaned evidence for a row that was never stored
+                store.release(row["form_submission_id"], row["form_filepath"])
+            raise
+        return row
+    finally:
+        _pending.release()
+
+
+def submit(row, image=None, user_name=None):
+    """Queue a submission on the worker pool and return its handle straight away."""
+    if not _pending.acquire(timeout=PENDING_WAIT_SECONDS):
+        raise SubmissionQueueFull("Too many submissions are being saved; try again shortly.")
+    try:
+        future = _io_pool.submit(persist_submission, row, image, user_name)
+    except Exception:
+        _pending.release()
+        raise
+    return SubmissionHandle(future, row["form_stepcount"], row["form_date"])
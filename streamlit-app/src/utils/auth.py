@@ -0,0 +1,91 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+from src.data.identity import resolve_user_id
+
+PROFILE_REVALIDATE_SECONDS = 900
+ROLE_TOKEN_TTL = PROFILE_REVALIDATE_SECONDS
+PROFILE_KEYS = ("user_id", "username", "role", "is_admin", "profile_checked_at", "role_token")
+
+# Role tokens only live in server-side session state, so a per-process key is
+# enough; set ROLE_TOKEN_SECRET to keep tokens valid across restarts/replicas.
+_token_key = os.environ.get("ROLE_TOKEN_SECRET", "").encode() or secrets.token_bytes(32)
+
+
+def _sign(payload):
+    return hmac.new(_token_key, payload, hashlib.sha256).hexdigest()
+
+
+def issue_role_token(user_id, username, is_admin, ttl=ROLE_TOKEN_TTL):
+    """A signed, time-limited record of the role determined at login."""
+    claims = {"uid": user_id, "sub": username, "admin": bool(is_admin), "exp": int(time.time() + ttl)}
+    payload = base64.urlsafe_b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return f"{payload.decode()}.{_sign(payload)}"
+
+
+def read_role_token(token):
+    """The token's claims, or None if it is missing, tampered with or expired."""
+    try:
+        payload, signature = token.encode().rsplit(b".", 1)
+        if not hmac.compare_digest(_sign(payload), signature.decode()):
+            return None
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (AttributeError, ValueError):
+        return None
+    return claims if claims.get("exp", 0) > time.time() else None
+
+
+def store_profile(state, user):
+    """Keep the users row fetched at login in the session so pages skip the lookup."""
+    state["user_id"] = user["user_id"]
+    state["username"] = user["user_name"]
+    state["is_admin"] = bool(user.get("user_admin", False))
+    state["role"] = "admin" if state["is_admin"] else "user"
+    state["profile_checked_at"] = time.time()
+    state["role_token"] = issue_role_token(state["user_id"], state["username"], state["is_admin"])
+
+
+def clear_profile(state):
+    for key in PROFILE_KEYS:
+        state.pop(key, None)
+    state["logged_in"] = False
+    state["username"] = ""
+
+
+def current_user_id(state, client):
+    """The session's user_id, re-checked against the cached user directory now and then.
+
+    The revalidation normally costs no network round trip; it catches renamed
+    or deleted accounts and sessions that logged in before user_id was stored.
+    """
+    user_id = state.get("user_id")
+    checked_at = state.get("profile_checked_at", 0)
+    if user_id is None or time.time() - checked_at > PROFILE_REVALIDATE_SECONDS:
+        user_id = resolve_user_id(client, state.get("username"))
+        state["user_id"] = user_id
+        state["profile_checked_at"] = time.time()
+    return user_id
+
+
+def is_admin(state, client):
+    """Whether the session's user is an admin.
+
+    Answered from the signed role token while it is valid, so reruns cost no
+    query; once it expires the users row is read again and a new token issued.
+    """
+    username = state.get("username")
+    claims = read_role_token(state.get("role_token"))
+    if claims is not None and claims["sub"] == username:
+        return claims["admin"]
+    rows = client.table("users").select("user_id, user_admin").eq("user_name", username).limit(1).execute().data
+    admin = bool(rows and rows[0].get("user_admin", False))
+    user_id = rows[0]["user_id"] if rows else None
+    state["is_admin"] = admin
+    state["role"] = "admin" if admin else "user"
+    state["role_token"] = issue_role_token(user_id, username, admin)
+    return admin
@@ -0,0 +1,72 @@
+import threading
+import time
+
+
+class TTLCache:
+    """Process-wide, thread-safe cache whose entries expire after ``ttl`` seconds.
+
+    Streamlit imports modules under ``src`` once per process, so an instance
+    held at module level is shared by every session. Concurrent misses on the
+    same key wait for a single load instead of all hitting the database.
+    """
+
+    def __init__(self, ttl, maxsize=256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = {}  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._generation = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+        return default
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for ``key`` or call ``loader()`` and cache it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have loaded it while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    return entry[1]
+                generation = self._generation
+
+            value = loader()
+
+            with self._lock:
+                # Skip storing if an invalidation happened during the load
+                if generation == self._generation:
+                    if len(self._entries) >= self.maxsize:
+                        self._evict_expired()
+                    if len(self._entries) >= self.maxsize:
+                        self._entries.pop(next(iter(self._entries)))
+                    self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when ``key`` is None."""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
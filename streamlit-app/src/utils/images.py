@@ -0,0 +1,79 @@
+"""Screenshot ingestion: decode an upload once and reuse it for preview and storage.
+
+JPEGs are decoded with ``Image.draft`` so libjpeg scales down during the DCT
+instead of decoding every pixel, and stored evidence is capped at a size that
+is still easy for an admin to read.
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+EVIDENCE_MAX_SIDE = 1600  # px; step counts stay legible well below this
+PREVIEW_MAX_SIDE = 600
+THUMBNAIL_MAX_SIDE = 200  # Admin queue list
+DETAIL_SIZE = (32, 64)  # grayscale grid kept per stored image to confirm near-duplicates
+DETAIL_BLOCK = 2  # cells per side of the blocks compared by detail_distance
+JPEG_QUALITY = 85
+
+
+def load_screenshot(data, max_side=EVIDENCE_MAX_SIDE):
+    """Decode upload bytes into an RGB image no larger than ``max_side``."""
+    img = Image.open(io.BytesIO(data))
+    if img.format == "JPEG":
+        # libjpeg decodes at the smallest 1/2, 1/4 or 1/8 scale still >= this size
+        scale = min(max_side / max(img.size), 1.0)
+        img.draft("RGB", (int(img.width * scale), int(img.height * scale)))
+    img = img.convert("RGB")
+    img.thumbnail((max_side, max_side))
+    return img
+
+
+def preview_image(img, max_side=PREVIEW_MAX_SIDE):
+    preview = img.copy()
+    preview.thumbnail((max_side, max_side))
+    return preview
+
+
+def encode_jpeg(img, quality=JPEG_QUALITY):
+    """JPEG bytes without the extra ``optimize`` Huffman pass."""
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def thumbnail_jpeg(img, max_side=THUMBNAIL_MAX_SIDE):
+    return encode_jpeg(preview_image(img, max_side))
+
+
+def dhash(img, size=8):
+    """64-bit difference hash; a cheap first filter for near-identical images.
+
+    Screenshots from the same step-counter app share a layout, so their hashes
+    are close even when the numbers differ; confirm with detail_distance.
+    """
+    small = np.asarray(img.convert("L").resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def detail_signature(img, size=DETAIL_SIZE):
+    """Small grayscale grid (bytes) that still shows which digits are on screen.
+
+    BILINEAR weights edge pixels by how much of a cell they cover; BOX snaps
+    them in or out, so a resized copy drifts by a whole pixel column per cell.
+    """
+    return np.asarray(img.convert("L").resize(size, Image.BILINEAR), dtype=np.uint8).tobytes()
+
+
+def detail_distance(a, b, size=DETAIL_SIZE, block=DETAIL_BLOCK):
+    """Largest mean brightness difference over any block of two detail signatures.
+
+    Re-encoding or resizing the same screenshot changes every block a little;
+    a different step count or date changes a few blocks a lot.
+    """
+    w, h = size
+    diff = np.abs(np.frombuffer(a, np.uint8).astype(np.int16) - np.frombuffer(b, np.uint8).astype(np.int16))
+    blocks = diff.reshape(h // block, block, w // block, block).mean(axis=(1, 3))
+    return float(blocks.max())
@@ -0,0 +1,89 @@
+"""Password checks on a small, bounded bcrypt worker pool.
+
+bcrypt is deliberately slow, so checks are run on at most ``BCRYPT_WORKERS``
+threads shared by every session instead of on each session's script thread.
+A burst of logins then queues rather than oversubscribing the CPU, and the
+queue depth and wait times are kept for the Admin page. Unknown usernames are
+checked against a decoy hash computed once per process, so they take as long
+as a wrong password without paying for a fresh hash on every attempt.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+BCRYPT_WORKERS = min(4, os.cpu_count() or 1)
+
+_decoy_hash = None
+_decoy_lock = threading.Lock()
+
+
+def decoy_hash():
+    """A bcrypt hash at the default cost, made on first use and then reused."""
+    global _decoy_hash
+    if _decoy_hash is None:
+        with _decoy_lock:
+            if _decoy_hash is None:
+                _decoy_hash = bcrypt.hashpw(b"decoy-password", bcrypt.gensalt())
+    return _decoy_hash
+
+
+class BcryptPool:
+    """A thread pool for bcrypt checks that counts queued and running jobs."""
+
+    def __init__(self, workers=BCRYPT_WORKERS):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _run(self, password, hashed, submitted):
+        waited = time.perf_counter() - submitted
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        try:
+            return bcrypt.checkpw(password, hashed)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def checkpw(self, password, hashed):
+        """bcrypt.checkpw on a pool thread; blocks the caller until it is done."""
+        with self._lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        return self._executor.submit(self._run, password, hashed, time.perf_counter()).result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "peak_queue_depth": self._peak_queued,
+                "completed": self._completed,
+                "avg_wait_ms": self._wait_total / self._completed * 1000 if self._completed else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+            }
+
+
+bcrypt_pool = BcryptPool()
+
+
+def check_password(password, stored_hash):
+    """Whether ``password`` matches ``stored_hash``; pass None for an unknown user."""
+    hashed = decoy_hash() if stored_hash is None else stored_hash.encode("utf-8")
+    matched = bcrypt_pool.checkpw(password.encode("utf-8"), hashed)
+    return matched and stored_hash is not None
@@ -0,0 +1,65 @@
+"""Process-wide sliding-window rate limiting keyed by user.
+
+Limits are checked in memory, so a cooldown costs no database query and holds
+across every session and tab a user has open on this server. The storage sits
+behind a small backend interface so it can move to a shared store (e.g. Redis
+sorted sets) when the app runs on more than one process.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+
+SUBMISSION_LIMIT = 1  # submissions allowed per window
+SUBMISSION_WINDOW = 60  # seconds
+
+
+class MemoryBackend:
+    """Hit timestamps per key in this process; old hits are pruned as keys are checked."""
+
+    def __init__(self):
+        self._hits = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def acquire(self, key, limit, window, now):
+        """Record a hit and return 0, or return the seconds until one is allowed."""
+        with self._lock:
+            hits = self._hits[key]
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return hits[0] + window - now
+            hits.append(now)
+            return 0
+
+    def release(self, key, stamp):
+        """Forget a recorded hit, e.g. when the action it allowed failed."""
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits and stamp in hits:
+                hits.remove(stamp)
+            if not hits:
+                self._hits.pop(key, None)
+
+
+class RateLimiter:
+    def __init__(self, limit, window, backend=None, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.backend = backend or MemoryBackend()
+        self.clock = clock
+
+    def try_acquire(self, key):
+        """(allowed, retry_after seconds, token); pass the token to ``refund`` to undo the hit."""
+        now = self.clock()
+        retry_after = self.backend.acquire(key, self.limit, self.window, now)
+        if retry_after > 0:
+            return False, retry_after, None
+        return True, 0, now
+
+    def refund(self, key, token):
+        if token is not None:
+            self.backend.release(key, token)
+
+
+submission_limiter = RateLimiter(SUBMISSION_LIMIT, SUBMISSION_WINDOW)
@@ -0,0 +1,166 @@
+"""Progress statistics: daily totals, streaks, badges, levels and challenges.
+
+Everything works on NumPy ``datetime64[D]`` arrays, either for one user's
+submissions or for every user at once (``all_user_stats``), so an all-users
+report is one vectorised pass rather than a loop per user.
+"""
+
+import numpy as np
+import pandas as pd
+
+DAILY_GOAL = 10000
+STREAK_GOAL = 7
+MILESTONE_GOAL = 100000
+
+# (minimum total steps, level name), ascending
+LEVELS = [
+    (0, "🌱 Mo’ Rookie"),
+    (50000, "💪 Mo’ Pro"),
+    (150000, "🏆 Mo’ Champion"),
+]
+
+# (badge, "total" or "streak", threshold), in display order
+BADGES = [
+    ("10K Steps", "total", 10000),
+    ("50K Steps", "total", 50000),
+    ("100K Steps", "total", 100000),
+    ("7-Day Streak", "streak", STREAK_GOAL),
+    ("Mo’ Legend", "total", 200000),
+]
+
+
+def _days(values):
+    return np.asarray([str(v)[:10] for v in values], dtype="datetime64[D]")
+
+
+def daily_totals(dates, steps):
+    """Sorted unique days and the summed steps for each."""
+    days = _days(dates)
+    steps = np.asarray(steps, dtype=np.int64)
+    unique_days, idx = np.unique(days, return_inverse=True)
+    return unique_days, np.bincount(idx, weights=steps, minlength=len(unique_days)).astype(np.int64)
+
+
+def _run_lengths(days):
+    """Lengths of consecutive-day runs in sorted unique ``days``."""
+    if len(days) == 0:
+        return np.array([], dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(days).astype(np.int64) != 1) + 1
+    return np.diff(np.concatenate(([0], breaks, [len(days)])))
+
+
+def current_streak(days, today=None):
+    """Length of the run ending today (0 if there is no submission today)."""
+    today = np.datetime64(today or pd.Timestamp.now().date(), "D")
+    if len(days) == 0 or days[-1] != today:
+        return 0
+    return int(_run_lengths(days)[-1])
+
+
+def longest_streak(days):
+    runs = _run_lengths(days)
+    return int(runs.max()) if len(runs) else 0
+
+
+def level_for(total_steps):
+    thresholds = np.array([t for t, _ in LEVELS])
+    return LEVELS[int(np.searchsorted(thresholds, total_steps, side="right")) - 1][1]
+
+
+def next_level(total_steps):
+    """(level name, threshold, progress 0..1) for the next level, or None at the top."""
+    for threshold, name in LEVELS:
+        if total_steps < threshold:
+            return name, threshold, min(total_steps / threshold, 1.0)
+    return None
+
+
+def badges_for(total_steps, streak):
+    values = {"total": total_steps, "streak": streak}
+    return [name for name, kind, threshold in BADGES if values[kind] >= threshold]
+
+
+def challenges_for(today_steps, streak, total_steps):
+    challenges = []
+    if today_steps < DAILY_GOAL:
+        challenges.append(f"Hit 10,000 steps today! You’re at {today_steps:,}.")
+    if streak < STREAK_GOAL:
+        challenges.append(f"Build a 7-day streak! Current: {streak} days.")
+    if total_steps < MILESTONE_GOAL:
+        challenges.append("Reach 100,000 steps milestone!")
+    return challenges
+
+
+def user_stats(dates, steps, today=None):
+    """Everything the Daily Progress tab shows, for one user's submissions."""
+    today = np.datetime64(today or pd.Timestamp.now().date(), "D")
+    days, totals = daily_totals(dates, steps)
+    total_steps = int(totals.sum())
+    streak = current_streak(days, today)
+    return {
+        "days": days,
+        "daily_steps": totals,
+        "total_steps": total_steps,
+        "today_steps": int(totals[days == today].sum()),
+        "days_participated": len(days),
+        "avg_steps": int(totals.mean()) if len(totals) else 0,
+        "current_streak": streak,
+        "longest_streak": longest_streak(days),
+        "level": level_for(total_steps),
+        "next_level": next_level(total_steps),
+        "badges": badges_for(total_steps, streak),
+    }
+
+
+def all_user_stats(user_ids, dates, steps, today=None):
+    """One row per user: totals, streaks, level and badges, computed in one pass."""
+    today = np.datetime64(today or pd.Timestamp.now().date(), "D")
+    users = np.asarray(user_ids, dtype=np.int64)
+    days = _days(dates)
+    steps = np.asarray(steps, dtype=np.int64)
+    if len(users) == 0:
+        return pd.DataFrame(columns=["user_id", "total_steps", "days_participated",
+                                     "current_streak", "longest_streak", "level", "badges"])
+
+    # Collapse to one entry per (user, day), sorted by user then day
+    order = np.lexsort((days, users))
+    users, days, steps = users[order], days[order], steps[order]
+    first = np.ones(len(users), dtype=bool)
+    first[1:] = (users[1:] != users[:-1]) | (days[1:] != days[:-1])
+    starts = np.flatnonzero(first)
+    users, days, steps = users[starts], days[starts], np.add.reduceat(steps, starts)
+
+    # Runs of consecutive days within each user
+    new_run = np.ones(len(users), dtype=bool)
+    new_run[1:] = (users[1:] != users[:-1]) | (np.diff(days).astype(np.int64) != 1)
+    run_id = np.cumsum(new_run) - 1
+    run_len = np.bincount(run_id)
+    run_starts = np.flatnonzero(new_run)
+
+    user_starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    user_ends = np.r_[user_starts[1:], len(users)] - 1
+    ids = users[user_starts]
+    total_steps = np.add.reduceat(steps, user_starts)
+    days_participated = np.diff(np.r_[user_starts, len(users)])
+    longest = np.maximum.reduceat(run_len, np.searchsorted(run_starts, user_starts))
+    current = np.where(days[user_ends] == today, run_len[run_id[user_ends]], 0)
+
+    thresholds = np.array([t for t, _ in LEVELS])
+    names = np.array([n for _, n in LEVELS], dtype=object)
+    levels = names[np.searchsorted(thresholds, total_steps, side="right") - 1]
+
+    earned = {
+        name: (total_steps if kind == "total" else current) >= threshold
+        for name, kind, threshold in BADGES
+    }
+    badges = [", ".join(name for name in earned if earned[name][i]) for i in range(len(ids))]
+
+    return pd.DataFrame({
+        "user_id": ids,
+        "total_steps": total_steps,
+        "days_participated": days_participated,
+        "current_streak": current,
+        "longest_streak": longest,
+        "level": levels,
+        "badges": badges,
+    })
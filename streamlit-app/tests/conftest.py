@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Tests import the app's modules the same way the pages do, from streamlit-app/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.leaderboard import create_sqlite_schema  # noqa: E402
+
+
+@pytest.fixture
+def conn():
+    """In-memory database with the local schema and three users."""
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    create_sqlite_schema(conn)
+    conn.executemany(
+        "INSERT INTO users (user_id, user_name) VALUES (?, ?)",
+        [(1, "alice"), (2, "bob"), (3, "carol")],
+    )
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def client(conn):
+    return SQLiteClient(conn)
+
+
+def add_forms(conn, rows):
+    """Insert (user_id, steps, form_date[, verified]) rows; returns their form_ids."""
+    ids = []
+    for row in rows:
+        user_id, steps, form_date, verified = (*row, 0)[:4]
+        cur = conn.execute(
+            "INSERT INTO forms (user_id, form_stepcount, form_date, form_verified) VALUES (?, ?, ?, ?)",
+            (user_id, steps, form_date, verified),
+        )
+        ids.append(cur.lastrowid)
+    conn.commit()
+    return ids
+
+
+class Result:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class Query:
+    """The slice of the supabase-py query builder the app uses, run against SQLite."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.op = "select"
+        self.columns = "*"
+        self.where, self.args, self.order_by = [], [], []
+        self.limit_rows = None
+        self.payload = None
+        self.count = None
+        self.head = False
+        self._negate = False
+
+    def select(self, columns="*", count=None, head=False):
+        self.columns, self.count, self.head = columns, count, head
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict=None, ignore_duplicates=False):
+        self.op, self.payload = "upsert", payload
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    def _filter(self, sql, *args):
+        self.where.append(sql)
+        self.args += args
+        return self
+
+    def eq(self, column, value):
+        return self._filter(f"{column} = ?", value)
+
+    def gt(self, column, value):
+        return self._filter(f"{column} > ?", value)
+
+    def gte(self, column, value):
+        return self._filter(f"{column} >= ?", value)
+
+    def lte(self, column, value):
+        return self._filter(f"{column} <= ?", value)
+
+    def in_(self, column, values):
+        values = list(values)
+        return self._filter(f"{column} IN ({','.join('?' * len(values))})" if values else "0", *values)
+
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def is_(self, column, value):
+        negate, self._negate = self._negate, False
+        return self._filter(f"{column} IS {'NOT ' if negate else ''}NULL")
+
+    def order(self, column, desc=False):
+        self.order_by.append(f"{column} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, rows):
+        self.limit_rows = rows
+        return self
+
+    def execute(self):
+        self.client.calls.append((self.table, self.op))
+        where = f" WHERE {' AND '.join(self.where)}" if self.where else ""
+        conn = self.client.conn
+        if self.op == "select":
+            count = None
+            if self.count:
+                count = conn.execute(f"SELECT COUNT(*) FROM {self.table}{where}", self.args).fetchone()[0]
+            sql = f"SELECT {self.columns} FROM {self.table}{where}"
+            if self.order_by:
+                sql += " ORDER BY " + ", ".join(self.order_by)
+            if self.limit_rows is not None:
+                sql += f" LIMIT {self.limit_rows}"
+            return Result([] if self.head else _rows(conn.execute(sql, self.args)), count)
+        if self.op in ("insert", "upsert"):
+            verb = "INSERT OR IGNORE" if self.op == "upsert" else "INSERT"
+            rows = []
+            for row in self.payload if isinstance(self.payload, list) else [self.payload]:
+                sql = f"{verb} INTO {self.table} ({','.join(row)}) VALUES ({','.join('?' * len(row))}) RETURNING *"
+                rows += _rows(conn.execute(sql, list(row.values())))
+            conn.commit()
+            return Result(rows)
+        if self.op == "update":
+            sets = ", ".join(f"{column} = ?" for column in self.payload)
+            cur = conn.execute(f"UPDATE {self.table} SET {sets}{where} RETURNING *",
+                               list(self.payload.values()) + self.args)
+            rows = _rows(cur)
+            conn.commit()
+            return Result(rows)
+        rows = _rows(conn.execute(f"DELETE FROM {self.table}{where} RETURNING *", self.args))
+        conn.commit()
+        return Result(rows)
+
+
+class SQLiteClient:
+    """Stands in for the Supabase client: tables are SQLite tables, RPCs are Python functions."""
+
+    def __init__(self, conn, rpcs=None):
+        self.conn = conn
+        self.rpcs = rpcs or {}
+        self.calls = []
+
+    def table(self, name):
+        return Query(self, name)
+
+    def rpc(self, name, params=None):
+        client = self
+
+        class Call:
+            def execute(self):
+                client.calls.append(("rpc", name))
+                return Result(client.rpcs[name](**(params or {})))
+
+        return Call()
+
+
+def _rows(cursor):
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
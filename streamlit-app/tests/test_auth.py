@@ -0,0 +1,51 @@
+import base64
+import json
+
+from src.utils.auth import is_admin, issue_role_token, read_role_token, store_profile
+
+
+def test_round_trip():
+    claims = read_role_token(issue_role_token(7, "alice", True))
+    assert claims["uid"] == 7 and claims["sub"] == "alice" and claims["admin"] is True
+
+
+def test_expired_token_is_rejected():
+    assert read_role_token(issue_role_token(7, "alice", True, ttl=-1)) is None
+
+
+def test_tampered_token_is_rejected():
+    payload, signature = issue_role_token(7, "alice", False).rsplit(".", 1)
+    claims = json.loads(base64.urlsafe_b64decode(payload))
+    claims["admin"] = True
+    forged = base64.urlsafe_b64encode(json.dumps(claims, separators=(",", ":")).encode()).decode()
+    assert read_role_token(f"{forged}.{signature}") is None
+
+
+def test_malformed_token_is_rejected():
+    assert read_role_token(None) is None
+    assert read_role_token("") is None
+    assert read_role_token("not-a-token") is None
+
+
+def test_is_admin_reads_the_token_without_a_query(client):
+    state = {}
+    store_profile(state, {"user_id": 1, "user_name": "alice", "user_admin": True})
+    assert is_admin(state, client) and is_admin(state, client)
+    assert client.calls == []
+
+
+def test_expired_token_rechecks_the_users_row(client, conn):
+    conn.execute("UPDATE users SET user_admin = 1 WHERE user_id = 1")
+    state = {"username": "alice", "role_token": issue_role_token(1, "alice", False, ttl=-1)}
+    assert is_admin(state, client)
+    assert state["role"] == "admin" and read_role_token(state["role_token"])["admin"]
+
+    conn.execute("UPDATE users SET user_admin = 0 WHERE user_id = 1")  # demoted
+    state["role_token"] = issue_role_token(1, "alice", True, ttl=-1)
+    assert not is_admin(state, client)
+    assert len(client.calls) == 2
+
+
+def test_token_for_another_user_is_ignored(client):
+    state = {"username": "bob", "role_token": issue_role_token(1, "alice", True)}
+    assert not is_admin(state, client)
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from src.utils.cache import TTLCache
+
+
+def test_get_or_load_caches_until_expiry():
+    cache = TTLCache(ttl=0.05)
+    calls = []
+    load = lambda: calls.append(1) or len(calls)
+
+    assert cache.get_or_load("k", load) == 1
+    assert cache.get_or_load("k", load) == 1
+    time.sleep(0.06)
+    assert cache.get_or_load("k", load) == 2
+
+
+def test_invalidate_one_key_or_all():
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None and cache.get("b") == 2
+    cache.invalidate()
+    assert cache.get("b") is None
+
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache(ttl=60)
+    calls = []
+    started = threading.Barrier(8)
+
+    def load():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    def worker():
+        started.wait()
+        assert cache.get_or_load("k", load) == "value"
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+
+
+def test_load_overlapping_invalidate_is_not_stored():
+    cache = TTLCache(ttl=60)
+
+    def load():
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get_or_load("k", load) == "stale"
+    assert cache.get("k") is None
+
+
+def test_maxsize_evicts_oldest():
+    cache = TTLCache(ttl=60, maxsize=2)
+    for key in "abc":
+        cache.get_or_load(key, lambda: key)
+    assert cache.get("a") is None
+    assert cache.get("b") == "b" and cache.get("c") == "c"
@@ -0,0 +1,97 @@
+import io
+import os
+
+import pytest
+from PIL import Image, ImageDraw
+
+from src.data.evidence import EvidenceStore
+from src.utils.images import detail_signature, dhash, thumbnail_jpeg
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EvidenceStore(
+        folder=str(tmp_path / "uploads"),
+        index_path=str(tmp_path / "index.db"),
+        thumbnail_folder=str(tmp_path / "thumbnails"),
+    )
+
+
+def screenshot(digits):
+    """A step-app style screenshot: the same layout, with the count drawn as blocks per digit."""
+    img = Image.new("RGB", (360, 720), (245, 245, 245))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, 360, 90), fill=(30, 90, 160))
+    draw.ellipse((80, 150, 280, 350), outline=(30, 90, 160), width=16)
+    for i, digit in enumerate(digits):
+        x = 40 + i * 58
+        draw.rectangle((x, 420, x + 44, 420 + 12 * (int(digit) + 1)), fill=(20, 20, 20))
+    return img
+
+
+def jpeg(img, quality=90):
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def put(store, img, submission_id, data=None, user_id=1):
+    return store.store(data or jpeg(img), dhash(img), submission_id, user_id, "2025-11-01",
+                       detail=detail_signature(img))
+
+
+def test_same_image_is_stored_once_and_refcounted(store):
+    img = screenshot("12345")
+    data = jpeg(img)
+    first = put(store, img, "a", data)
+    second = put(store, img, "b", data)
+    assert first == second
+    assert os.listdir(store.folder) == [first]
+
+    store.release("a", first)
+    assert os.path.exists(store.path_for(first))
+    store.release("b", second)
+    assert not os.path.exists(store.path_for(first))
+    store.release("b", second)  # releasing twice is harmless
+
+
+def test_exact_duplicates_are_flagged_even_after_release(store):
+    img = screenshot("12345")
+    data = jpeg(img)
+    filename = put(store, img, "a", data, user_id=1)
+    store.release("a", filename)
+    put(store, img, "b", data, user_id=2)
+    assert store.duplicates(["b"]) == {"b": [{"user_id": 1, "form_date": "2025-11-01", "exact": True}]}
+
+
+def test_re_encoded_screenshot_is_a_near_duplicate(store):
+    img = screenshot("12345")
+    put(store, img, "a")
+    smaller = Image.open(io.BytesIO(jpeg(img.resize((180, 360)), quality=60)))
+    smaller.load()
+    put(store, smaller, "b", user_id=2)
+    matches = store.duplicates(["a", "b"])
+    assert matches["b"] == [{"user_id": 1, "form_date": "2025-11-01", "exact": False}]
+
+
+def test_same_app_with_another_count_is_not_a_duplicate(store):
+    put(store, screenshot("12345"), "a")
+    put(store, screenshot("12945"), "b", user_id=2)
+    assert store.duplicates(["a", "b"]) == {}
+
+
+def test_new_images_reach_an_already_loaded_index(store):
+    img = screenshot("12345")
+    put(store, img, "a")
+    assert store.duplicates(["a"]) == {}
+    put(store, img, "b", data=jpeg(img, quality=70), user_id=2)
+    assert store.duplicates(["a"]) == {"a": [{"user_id": 2, "form_date": "2025-11-01", "exact": False}]}
+
+
+def test_thumbnails_follow_their_evidence(store):
+    img = screenshot("12345")
+    filename = store.store(jpeg(img), dhash(img), "a", thumbnail=thumbnail_jpeg(img))
+    assert os.path.isfile(store.thumbnail_for(filename))
+    assert not store.thumbnail_for(filename).startswith(store.folder)  # kept out of evidence exports
+    store.release("a", filename)
+    assert not os.path.exists(store.thumbnail_for(filename))
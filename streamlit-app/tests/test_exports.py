@@ -0,0 +1,134 @@
+import csv
+import io
+import os
+import zipfile
+
+import pytest
+
+from conftest import add_forms
+from src.data import exports
+from src.data.exports import HISTORY_COLUMNS, evidence_zip, has_evidence, history_export, iter_form_pages, write_history
+from src.data.identity import UserDirectory
+
+DIRECTORY = UserDirectory([{"user_id": 1, "user_name": "alice"}, {"user_id": 2, "user_name": "bob"}])
+
+
+@pytest.fixture
+def uploads(tmp_path, conn):
+    """Forms 1-3 with evidence on disk; form 3's file has since been released."""
+    folder = tmp_path / "uploads"
+    folder.mkdir()
+    add_forms(conn, [(1, 12000, "2025-11-01"), (2, 15000, "2025-11-02"), (2, 11000, "2025-11-03", 1)])
+    for form_id in (1, 2, 3):
+        conn.execute("UPDATE forms SET form_filepath = ? WHERE form_id = ?", (f"shot{form_id}.jpg", form_id))
+        if form_id != 3:
+            (folder / f"shot{form_id}.jpg").write_bytes(b"jpeg" * (100 * form_id))
+    conn.commit()
+    exports._zip_cache.invalidate()
+    return str(folder)
+
+
+def names(archive):
+    with zipfile.ZipFile(archive) as zipf:
+        return sorted(zipf.namelist()), {i.compress_type for i in zipf.infolist()}
+
+
+def test_zip_holds_matching_files_stored_uncompressed(client, uploads, tmp_path):
+    with evidence_zip(client, uploads, DIRECTORY, export_folder=str(tmp_path / "exports")) as archive:
+        listed, compression = names(archive)
+    assert listed == ["alice/2025-11-01_1.jpg", "bob/2025-11-02_2.jpg"]
+    assert compression == {zipfile.ZIP_STORED}
+
+
+def test_zip_filters(client, uploads, tmp_path):
+    export_folder = str(tmp_path / "exports")
+    with evidence_zip(client, uploads, DIRECTORY, export_folder, user_id=2) as archive:
+        assert names(archive)[0] == ["bob/2025-11-02_2.jpg"]
+    with evidence_zip(client, uploads, DIRECTORY, export_folder, start="2025-11-01", end="2025-11-01") as archive:
+        assert names(archive)[0] == ["alice/2025-11-01_1.jpg"]
+    with evidence_zip(client, uploads, DIRECTORY, export_folder, verified=True) as archive:
+        assert names(archive)[0] == []
+
+
+def test_zip_is_reused_until_the_evidence_changes(client, uploads, tmp_path, monkeypatch):
+    export_folder = str(tmp_path / "exports")
+    builds = []
+    build = exports._build_zip
+    monkeypatch.setattr(exports, "_build_zip", lambda manifest, path: builds.append(path) or build(manifest, path))
+
+    with evidence_zip(client, uploads, DIRECTORY, export_folder) as first:
+        first_path = first.name
+    with evidence_zip(client, uploads, DIRECTORY, export_folder) as again:
+        assert again.name == first_path
+    assert len(builds) == 1
+
+    with open(os.path.join(uploads, "shot1.jpg"), "ab") as f:
+        f.write(b"more")
+    with evidence_zip(client, uploads, DIRECTORY, export_folder) as rebuilt:
+        assert rebuilt.name != first_path
+    assert len(builds) == 2
+
+
+def test_old_archives_are_pruned(client, uploads, tmp_path):
+    export_folder = str(tmp_path / "exports")
+    for user_id in (1, 2, None):
+        evidence_zip(client, uploads, DIRECTORY, export_folder, user_id=user_id).close()
+    assert len(os.listdir(export_folder)) == exports.ZIP_KEEP
+
+
+def test_has_evidence(tmp_path):
+    exports._folder_cache.invalidate()
+    folder = tmp_path / "uploads"
+    assert not has_evidence(str(folder))
+    exports._folder_cache.invalidate()
+    folder.mkdir()
+    (folder / "a.jpg").write_bytes(b"x")
+    assert has_evidence(str(folder))
+
+
+def read_csv(data):
+    return list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+
+
+def test_history_export_is_a_rewound_file(client, uploads):
+    with history_export(client, DIRECTORY) as export:
+        rows = read_csv(export.read())
+    assert [(r["form_id"], r["user_name"], r["form_stepcount"]) for r in rows] == [
+        ("1", "alice", "12000"), ("2", "bob", "15000"), ("3", "bob", "11000"),
+    ]
+    assert list(rows[0]) == HISTORY_COLUMNS
+
+
+def test_history_for_one_season(client, conn, uploads):
+    conn.execute("INSERT INTO seasons (season_name) VALUES ('Season 2')")
+    conn.execute("UPDATE forms SET season_id = 2 WHERE form_id = 3")
+    with history_export(client, DIRECTORY, season_id=2) as export:
+        assert [r["form_id"] for r in read_csv(export.read())] == ["3"]
+
+
+def test_empty_history_still_has_a_header(client):
+    with history_export(client, DIRECTORY) as export:
+        assert export.read().decode().strip() == ",".join(HISTORY_COLUMNS)
+
+
+def test_pages_are_keyed_on_form_id(client, conn, uploads):
+    pages = iter_form_pages(client, "form_stepcount", page_size=2)
+    first = next(pages)
+    assert [r["form_id"] for r in first] == [1, 2]
+    conn.execute("DELETE FROM forms WHERE form_id IN (1, 2)")  # deleted mid-export
+    assert [[r["form_id"] for r in page] for page in pages] == [[3]]
+
+
+def test_write_history_reports_progress(client, uploads):
+    progress = []
+    out = io.BytesIO()
+    assert write_history(client, DIRECTORY, out, page_size=2, on_page=progress.append) == 3
+    assert progress == [2, 3]
+
+
+@pytest.mark.skipif(exports.pa is None, reason="pyarrow not installed")
+def test_parquet_history(client, uploads):
+    with history_export(client, DIRECTORY, fmt="Parquet") as export:
+        table = exports.pq.read_table(io.BytesIO(export.read()))
+    assert table.column_names == HISTORY_COLUMNS
+    assert table.column("form_stepcount").to_pylist() == [12000, 15000, 11000]
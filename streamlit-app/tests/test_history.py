@@ -0,0 +1,91 @@
+import pytest
+
+from conftest import add_forms
+from src.data import history
+from src.data.history import FULL_REFRESH_SECONDS, INCREMENTAL_REFRESH_SECONDS, UserHistory
+from src.data.seasons import invalidate_season, start_season_sqlite
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(history.time, "monotonic", clock)
+    invalidate_season()
+    yield clock
+    invalidate_season()
+
+
+def created(conn, form_id, at):
+    conn.execute("UPDATE forms SET form_created_at = ? WHERE form_id = ?", (at, form_id))
+
+
+def steps(user_history):
+    return sorted(user_history.frame()["form_stepcount"])
+
+
+def test_first_load_reads_only_the_users_rows(client, conn, clock):
+    add_forms(conn, [(1, 100, "2025-11-01"), (1, 200, "2025-11-02"), (2, 900, "2025-11-01")])
+    user_history = UserHistory(1)
+    user_history.refresh(client)
+    assert steps(user_history) == [100, 200]
+    assert list(user_history.frame().columns) == history.HISTORY_FIELDS
+
+
+def test_reruns_skip_the_network_then_fetch_only_new_rows(client, conn, clock):
+    first, = add_forms(conn, [(1, 100, "2025-11-01")])
+    created(conn, first, "2025-11-01 10:00:00")
+    user_history = UserHistory(1)
+    user_history.refresh(client)
+
+    later, = add_forms(conn, [(1, 200, "2025-11-02")])
+    created(conn, later, "2025-11-02 10:00:00")
+    calls = len(client.calls)
+    user_history.refresh(client)
+    assert len(client.calls) == calls and steps(user_history) == [100]
+
+    clock.now += INCREMENTAL_REFRESH_SECONDS + 1
+    user_history.refresh(client)
+    assert steps(user_history) == [100, 200]
+    forms_selects = [c for c in client.calls[calls:] if c == ("forms", "select")]
+    assert len(forms_selects) == 1
+
+
+def test_full_refresh_picks_up_deletes(client, conn, clock):
+    form_id, _ = add_forms(conn, [(1, 100, "2025-11-01"), (1, 200, "2025-11-02")])
+    user_history = UserHistory(1)
+    user_history.refresh(client)
+    conn.execute("DELETE FROM forms WHERE form_id = ?", (form_id,))
+
+    clock.now += INCREMENTAL_REFRESH_SECONDS + 1
+    user_history.refresh(client)
+    assert steps(user_history) == [100, 200]
+    clock.now += FULL_REFRESH_SECONDS
+    user_history.refresh(client)
+    assert steps(user_history) == [200]
+
+
+def test_new_season_reloads(client, conn, clock):
+    add_forms(conn, [(1, 100, "2025-11-01")])
+    user_history = UserHistory(1)
+    user_history.refresh(client)
+    start_season_sqlite(conn, "Season 2")
+    invalidate_season()
+    user_history.refresh(client)
+    assert user_history.frame().empty
+
+
+def test_local_and_journaled_rows_are_merged_once():
+    user_history = UserHistory(1)
+    row = {"form_submission_id": "s1", "form_date": "2025-11-01", "form_stepcount": 300}
+    user_history.add_local(row)
+    pending = {"form_submission_id": "s2", "form_date": "2025-11-02", "form_stepcount": 400}
+    frame = user_history.frame(extra=[row, pending])
+    assert sorted(frame["form_stepcount"]) == [300, 400]
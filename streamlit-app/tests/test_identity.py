@@ -0,0 +1,53 @@
+import pytest
+
+from src.data.identity import UserDirectory, fetch_users, get_directory, invalidate_directory, resolve_user_id
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    invalidate_directory()
+    yield
+    invalidate_directory()
+
+
+def test_directory_maps_both_ways():
+    directory = UserDirectory([{"user_id": 3, "user_name": "carol"}, {"user_id": 1, "user_name": "alice"}])
+    assert directory.user_id("carol") == 3
+    assert directory.user_name(1) == "alice"
+    assert directory.user_id("nobody") is None and directory.user_name(2) is None
+    assert directory.names() == ["alice", "carol"]
+    assert list(directory.to_frame()["user_name"]) == ["alice", "carol"]
+
+
+def test_fetch_users_pages_past_the_row_cap(client, conn):
+    conn.executemany("INSERT INTO users (user_id, user_name) VALUES (?, ?)",
+                     [(i, f"user{i}") for i in range(4, 11)])
+    rows = fetch_users(client, page_size=3)
+    assert [r["user_id"] for r in rows] == list(range(1, 11))
+    assert len(client.calls) == 4
+
+
+def test_directory_is_loaded_once(client):
+    assert get_directory(client).user_id("bob") == 2
+    assert get_directory(client).user_name(3) == "carol"
+    assert len(client.calls) == 1
+
+
+def test_unknown_name_is_looked_up_alone_and_cached(client, conn):
+    get_directory(client)
+    conn.execute("INSERT INTO users (user_id, user_name) VALUES (4, 'dave')")  # signed up elsewhere
+    assert resolve_user_id(client, "dave") == 4
+    assert resolve_user_id(client, "dave") == 4
+    assert resolve_user_id(client, "nobody") is None
+    assert resolve_user_id(client, "nobody") is None
+    # one directory load, then one single-row query per unknown name
+    assert len(client.calls) == 3
+
+
+def test_invalidate_drops_negative_lookups(client, conn):
+    assert resolve_user_id(client, "dave") is None
+    conn.execute("INSERT INTO users (user_id, user_name) VALUES (4, 'dave')")
+    assert resolve_user_id(client, "dave") is None  # still within LOOKUP_TTL
+    invalidate_directory()
+    assert resolve_user_id(client, "dave") == 4
+    assert get_directory(client).user_id("dave") == 4
@@ -0,0 +1,44 @@
+import io
+
+from PIL import Image
+
+from src.utils.images import encode_jpeg, load_screenshot, preview_image, thumbnail_jpeg
+
+
+def upload(size, fmt="JPEG", mode="RGB"):
+    buf = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128)[:len(mode)]).save(buf, fmt)
+    return buf.getvalue()
+
+
+def test_large_jpeg_is_decoded_within_max_side():
+    img = load_screenshot(upload((3000, 6000)), max_side=1600)
+    assert img.mode == "RGB"
+    assert max(img.size) == 1600
+    assert img.size == (800, 1600)  # aspect ratio kept
+
+
+def test_small_image_is_not_upscaled():
+    assert load_screenshot(upload((300, 600))).size == (300, 600)
+
+
+def test_png_with_alpha_becomes_rgb():
+    img = load_screenshot(upload((400, 800), fmt="PNG", mode="RGBA"), max_side=200)
+    assert img.mode == "RGB" and img.size == (100, 200)
+
+
+def test_preview_leaves_the_original_alone():
+    img = load_screenshot(upload((1000, 2000)))
+    preview = preview_image(img, max_side=300)
+    assert preview.size == (150, 300) and img.size == (800, 1600)
+
+
+def test_encoded_jpeg_decodes_back():
+    img = load_screenshot(upload((1000, 2000)))
+    assert Image.open(io.BytesIO(encode_jpeg(img))).size == img.size
+
+
+def test_thumbnail_is_a_small_jpeg():
+    img = load_screenshot(upload((1000, 2000)))
+    thumb = Image.open(io.BytesIO(thumbnail_jpeg(img, max_side=100)))
+    assert thumb.format == "JPEG" and thumb.size == (50, 100)
@@ -0,0 +1,144 @@
+import uuid
+
+import pytest
+
+from src.data.journal import MAX_ATTEMPTS, SubmissionJournal, is_unavailable
+
+
+class APIError(Exception):
+    def __init__(self, code):
+        super().__init__(f"error {code}")
+        self.code = code
+
+
+class FakeForms:
+    """Upserts into a dict keyed by form_submission_id; ``reject`` decides which rows fail."""
+
+    def __init__(self, reject=lambda row: None):
+        self.rows = {}
+        self.reject = reject
+        self.requests = 0
+        self._pending = None
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self._pending = rows
+        return self
+
+    def execute(self):
+        self.requests += 1
+        for row in self._pending:
+            error = self.reject(row)
+            if error:
+                raise error
+        inserted = [r for r in self._pending if r["form_submission_id"] not in self.rows]
+        self.rows.update((r["form_submission_id"], r) for r in inserted)
+        return type("Result", (), {"data": inserted})()
+
+
+def form_row(user_id=1, steps=1000):
+    return {"form_submission_id": str(uuid.uuid4()), "user_id": user_id,
+            "form_stepcount": steps, "form_date": "2025-11-01"}
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return SubmissionJournal(str(tmp_path / "journal.db"))
+
+
+def test_is_unavailable():
+    assert is_unavailable(ConnectionError())
+    assert is_unavailable(APIError("502"))
+    assert is_unavailable(APIError("08006"))
+    assert not is_unavailable(APIError("23505"))
+    assert not is_unavailable(APIError("400"))
+    assert not is_unavailable(ValueError())
+
+
+def test_flush_inserts_and_reports_rows(journal):
+    client = FakeForms()
+    rows = [form_row(), form_row(user_id=2)]
+    for row in rows:
+        journal.append(row, user_name=f"user{row['user_id']}")
+    assert [r["form_submission_id"] for r in journal.pending_for_user(1)] == [rows[0]["form_submission_id"]]
+
+    seen = []
+    assert journal.flush(client, on_inserted=seen.extend) == 2
+    assert journal.pending_count() == 0
+    assert sorted(r["user_name"] for r in seen) == ["user1", "user2"]
+
+
+def test_replayed_rows_are_not_reported_twice(journal):
+    client = FakeForms()
+    row = form_row()
+    client.rows[row["form_submission_id"]] = row  # an earlier flush landed but its response was lost
+    journal.append(row)
+    seen = []
+    assert journal.flush(client, on_inserted=seen.extend) == 0
+    assert seen == [] and journal.pending_count() == 0
+
+
+def test_outage_keeps_rows_queued_without_counting_attempts(journal):
+    for _ in range(50):
+        journal.append(form_row())
+    down = FakeForms(reject=lambda row: ConnectionError("down"))
+    for _ in range(MAX_ATTEMPTS + 1):
+        assert journal.flush(down) == 0
+    # one request per cycle, not one per row
+    assert down.requests == MAX_ATTEMPTS + 1
+    assert journal.pending_count() == 50 and journal.failed_entries() == []
+    assert journal.flush(FakeForms()) == 50
+
+
+def test_outage_during_row_retries_stops_them(journal):
+    bad, rows = form_row(steps=-1), [form_row() for _ in range(5)]
+    for row in [bad, *rows]:
+        journal.append(row)
+    flaky = FakeForms(reject=lambda row: APIError("23514") if row["form_stepcount"] < 0
+                      else ConnectionError("down"))
+    # the batch is rejected because of the bad row; then the database goes away mid-retry
+    assert journal.flush(flaky) == 0
+    assert flaky.requests == 3  # the batch, the bad row, and the first row that hit the outage
+    assert journal.pending_count() == 6 and journal.failed_entries() == []
+
+
+def test_lone_rejected_row_is_parked(journal):
+    bad = form_row(steps=-1)
+    journal.append(bad)
+    client = FakeForms(reject=lambda row: APIError("23514") if row["form_stepcount"] < 0 else None)
+    for _ in range(MAX_ATTEMPTS):
+        journal.flush(client)
+    assert journal.pending_count() == 0
+    parked = journal.failed_entries(user_id=1)
+    assert [r["submission_id"] for r in parked] == [bad["form_submission_id"]]
+    assert parked[0]["attempts"] == MAX_ATTEMPTS and "23514" in parked[0]["last_error"]
+    assert journal.pending_for_user(1) == []
+
+
+def test_rejected_row_does_not_hold_back_its_batch(journal):
+    good, bad = form_row(), form_row(steps=-1)
+    journal.append(bad)
+    journal.append(good)
+    client = FakeForms(reject=lambda row: APIError("23514") if row["form_stepcount"] < 0 else None)
+    assert journal.flush(client) == 1
+    assert good["form_submission_id"] in client.rows
+    assert journal.pending_count() == 1
+
+
+def test_retry_and_discard_parked_rows(journal):
+    bad, other = form_row(steps=-1), form_row(steps=-2)
+    journal.append(bad)
+    journal.append(other)
+    client = FakeForms(reject=lambda row: APIError("23514"))
+    for _ in range(MAX_ATTEMPTS):
+        journal.flush(client)
+    assert len(journal.failed_entries()) == 2
+
+    journal.retry([bad["form_submission_id"]])
+    assert journal.flush(FakeForms()) == 1
+
+    discarded = journal.discard([other["form_submission_id"], bad["form_submission_id"]])
+    assert [r["form_submission_id"] for r in discarded] == [other["form_submission_id"]]
+    assert journal.failed_entries() == []
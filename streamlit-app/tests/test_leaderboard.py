@@ -0,0 +1,68 @@
+from conftest import SQLiteClient, add_forms
+from src.data.leaderboard import (
+    fetch_around_sqlite, fetch_leaderboard_page_sqlite,
+    LEADERBOARD_RPC, USER_TOTALS_RPC, cached_leaderboard, fetch_leaderboard_sqlite, fetch_user_totals,
+    fetch_user_totals_sqlite, invalidate_leaderboard,
+)
+
+
+def seed(conn):
+    add_forms(conn, [(1, 500, "2025-11-01"), (1, 400, "2025-11-02"), (2, 900, "2025-11-01"),
+                     (3, 300, "2025-11-02")])
+
+
+def test_leaderboard_sums_and_orders(conn):
+    seed(conn)
+    rows = fetch_leaderboard_sqlite(conn)
+    # alice and bob tie on 900; user_id breaks the tie
+    assert [(r["user_name"], r["total_steps"], r["form_count"]) for r in rows] == [
+        ("alice", 900, 2), ("bob", 900, 1), ("carol", 300, 1),
+    ]
+    assert [r["user_name"] for r in fetch_leaderboard_sqlite(conn, ascending=True, limit=1)] == ["carol"]
+    assert [r["total_steps"] for r in fetch_leaderboard_sqlite(conn, form_date="2025-11-02")] == [400, 300]
+
+
+def test_cached_leaderboard_is_reused_until_invalidated(conn):
+    seed(conn)
+    client = SQLiteClient(conn, {LEADERBOARD_RPC: lambda p_form_date, p_ascending, p_limit:
+                                 fetch_leaderboard_sqlite(conn, p_form_date, p_ascending, p_limit)})
+    invalidate_leaderboard()
+    top = cached_leaderboard(client, view_option="Top 10")
+    add_forms(conn, [(3, 5000, "2025-11-03")])
+    assert cached_leaderboard(client, view_option="Top 10") == top
+    assert len(client.calls) == 1
+
+    invalidate_leaderboard()
+    assert cached_leaderboard(client, view_option="Top 10")[0]["user_name"] == "carol"
+
+
+def test_user_totals_are_read_in_user_id_pages(conn):
+    seed(conn)
+    client = SQLiteClient(conn, {USER_TOTALS_RPC: lambda p_after_user_id, p_limit:
+                                 fetch_user_totals_sqlite(conn, p_after_user_id, p_limit)})
+    rows = fetch_user_totals(client, page_size=2)
+    assert [(r["user_id"], r["total_steps"], r["form_count"], r["max_form_id"]) for r in rows] == [
+        (1, 900, 2, 2), (2, 900, 1, 3), (3, 300, 1, 4),
+    ]
+    assert len(client.calls) == 2
+
+
+def test_around_returns_ranked_neighbours(conn):
+    seed(conn)
+    rows = fetch_around_sqlite(conn, user_id=3, radius=1)
+    assert [(r["rank"], r["user_id"], r["total_users"]) for r in rows] == [(2, 2, 3), (3, 3, 3)]
+    assert fetch_around_sqlite(conn, user_id=99) == []
+
+
+def test_keyset_pages_cover_every_user_once(conn):
+    seed(conn)
+    seen, after = [], None
+    while True:
+        page = fetch_leaderboard_page_sqlite(conn, after=after, limit=2)
+        seen += [r["user_id"] for r in page]
+        if len(page) < 2:
+            break
+        after = (page[-1]["total_steps"], page[-1]["user_id"])
+    assert seen == [1, 2, 3]
+    # offset jumps past rows after the cursor
+    assert [r["user_id"] for r in fetch_leaderboard_page_sqlite(conn, offset=2, limit=5)] == [3]
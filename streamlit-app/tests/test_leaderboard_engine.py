@@ -0,0 +1,144 @@
+import threading
+
+from src.data.leaderboard_engine import LeaderboardEngine
+
+ROWS = [
+    {"user_id": 1, "user_name": "alice", "total_steps": 500, "form_count": 2, "max_form_id": 4},
+    {"user_id": 2, "user_name": "bob", "total_steps": 900, "form_count": 3, "max_form_id": 6},
+    {"user_id": 3, "user_name": "carol", "total_steps": 500, "form_count": 1, "max_form_id": 5},
+]
+
+
+def loaded(rows=ROWS):
+    engine = LeaderboardEngine()
+    engine.load(rows)
+    return engine
+
+
+def ids(rows):
+    return [r["user_id"] for r in rows]
+
+
+def test_orders_by_steps_then_user_id():
+    engine = loaded()
+    assert ids(engine.top()) == [2, 1, 3]
+    assert [engine.rank(u) for u in (2, 1, 3)] == [1, 2, 3]
+    assert ids(engine.bottom(2)) == [3, 1]
+    assert engine.rank(99) is None
+
+
+def test_page_and_around():
+    engine = loaded()
+    first = engine.page(limit=2)
+    assert [(r["user_id"], r["rank"]) for r in first] == [(2, 1), (1, 2)]
+    after = (first[-1]["total_steps"], first[-1]["user_id"])
+    assert [(r["user_id"], r["rank"]) for r in engine.page(after=after, limit=2)] == [(3, 3)]
+
+    around = engine.around(1, radius=1)
+    assert ids(around) == [2, 1, 3]
+    assert all(r["total_users"] == 3 for r in around)
+    assert engine.around(99) == []
+
+
+def test_apply_moves_and_removes_users():
+    engine = loaded()
+    engine.apply(3, 1000, user_name="carol")
+    assert ids(engine.top()) == [3, 2, 1]
+    assert engine.top(1)[0]["total_steps"] == 1500
+
+    engine.apply(4, 200, user_name="dave")
+    assert engine.rank(4) == 4
+
+    # dave's only form is deleted: the user leaves the board rather than sitting at 0
+    engine.apply(4, -200, forms=-1)
+    assert engine.rank(4) is None
+    assert len(engine) == 3
+
+
+def test_apply_before_first_load_is_ignored():
+    engine = LeaderboardEngine()
+    engine.apply(1, 100, user_name="alice")
+    assert len(engine) == 0 and not engine.loaded
+
+
+def test_reconcile_reports_drift():
+    engine = loaded()
+    changed = [dict(r) for r in ROWS]
+    changed[0]["total_steps"] = 600
+    assert engine.reconcile(lambda: changed) == 1
+    assert engine.top(2)[1]["total_steps"] == 600
+
+
+def test_delta_the_snapshot_missed_is_replayed():
+    engine = loaded()
+
+    def loader():
+        # form 7 commits, and its delta arrives, after the snapshot was read
+        engine.apply(1, 1000, user_name="alice", form_id=7)
+        return ROWS
+
+    engine.reconcile(loader)
+    assert engine.top(1)[0] == {"user_id": 1, "user_name": "alice", "total_steps": 1500}
+
+
+def test_delta_the_snapshot_already_has_is_not_replayed():
+    engine = loaded()
+    with_form = [dict(ROWS[0], total_steps=1500, form_count=3, max_form_id=7), *ROWS[1:]]
+
+    def loader():
+        # form 7 committed before the snapshot was read, but its delta arrives during the reload
+        engine.apply(1, 1000, user_name="alice", form_id=7)
+        return with_form
+
+    engine.reconcile(loader)
+    assert engine.top(1)[0]["total_steps"] == 1500
+    # the count is right too, so deleting the three forms removes alice
+    engine.apply(1, -1500, forms=-3, form_id=7)
+    assert engine.rank(1) is None
+
+
+def test_delete_during_reload_forces_another_reload():
+    engine = loaded()
+    without_form = [dict(ROWS[1], total_steps=400, form_count=2), ROWS[0], ROWS[2]]
+    snapshots = [ROWS, without_form]
+
+    def loader():
+        if len(snapshots) == 2:
+            engine.apply(2, -500, forms=-1, form_id=6)  # not knowable whether the snapshot saw it
+        return snapshots.pop(0)
+
+    engine.reconcile(loader)
+    engine.ensure_fresh(loader)
+    assert snapshots == []
+    assert [r["total_steps"] for r in engine.top()] == [500, 500, 400]
+
+
+def test_reset_during_reload_wins():
+    engine = loaded()
+
+    def loader():
+        engine.reset()
+        return ROWS
+
+    engine.reconcile(loader)
+    assert len(engine) == 0
+
+
+def test_concurrent_stale_callers_load_once():
+    engine = LeaderboardEngine()
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(1)
+        return ROWS
+
+    threads = [threading.Thread(target=engine.ensure_fresh, args=(loader,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert ids(engine.top()) == [2, 1, 3]
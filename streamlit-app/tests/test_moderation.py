@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from PIL import Image
+
+from conftest import add_forms
+from src.data import moderation
+from src.data.evidence import EvidenceStore
+from src.data.leaderboard_engine import LeaderboardEngine
+from src.data.moderation import delete_forms, verify_forms
+from src.utils.images import dhash, encode_jpeg
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = EvidenceStore(str(tmp_path / "uploads"), str(tmp_path / "index.db"), str(tmp_path / "thumbnails"))
+    monkeypatch.setattr(moderation, "get_evidence_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = LeaderboardEngine()
+    monkeypatch.setattr(moderation, "leaderboard_engine", engine)
+    return engine
+
+
+def queue_rows(conn, store, specs):
+    """Forms with stored evidence; returns their queue rows."""
+    rows = []
+    for i, (user_id, steps) in enumerate(specs):
+        form_id, = add_forms(conn, [(user_id, steps, "2025-11-01")])
+        img = Image.new("RGB", (60, 120), (i * 40 % 256, 90, 200))
+        sid = f"sub-{form_id}"
+        filename = store.store(encode_jpeg(img), dhash(img), sid)
+        conn.execute("UPDATE forms SET form_submission_id = ?, form_filepath = ? WHERE form_id = ?",
+                     (sid, filename, form_id))
+        rows.append({"form_id": form_id, "form_submission_id": sid, "form_filepath": filename,
+                     "user_id": user_id, "form_stepcount": steps, "form_date": "2025-11-01"})
+    conn.commit()
+    return rows
+
+
+def test_verify_counts_only_rows_it_flipped(client, conn, store):
+    rows = queue_rows(conn, store, [(1, 12000), (2, 15000)])
+    conn.execute("UPDATE forms SET form_verified = 1 WHERE form_id = ?", (rows[1]["form_id"],))  # another admin
+
+    result = verify_forms(client, rows)
+    assert result.succeeded == [rows[0]["form_id"]]
+    assert result.failed == [rows[1]["form_id"]]
+    assert result.summary() == "1 of 2 submissions verified, 1 failed."
+    assert not os.path.exists(store.path_for(rows[0]["form_filepath"]))
+    # the other admin's verify already released that evidence; this one must not release it again
+    assert os.path.exists(store.path_for(rows[1]["form_filepath"]))
+
+
+def test_delete_updates_the_leaderboard_and_releases_evidence(client, conn, store, engine):
+    rows = queue_rows(conn, store, [(1, 12000), (2, 15000)])
+    engine.load([{"user_id": 1, "user_name": "alice", "total_steps": 12000, "form_count": 1},
+                 {"user_id": 2, "user_name": "bob", "total_steps": 15000, "form_count": 1}])
+    conn.execute("DELETE FROM forms WHERE form_id = ?", (rows[1]["form_id"],))  # already gone
+
+    result = delete_forms(client, rows)
+    assert result.succeeded == [rows[0]["form_id"]] and result.failed == [rows[1]["form_id"]]
+    assert [r["user_id"] for r in engine.top()] == [2]
+    assert not os.path.exists(store.path_for(rows[0]["form_filepath"]))
+
+
+def test_database_error_is_reported_not_raised(client, conn, store):
+    rows = queue_rows(conn, store, [(1, 12000)])
+    conn.execute("DROP TABLE forms")
+    result = verify_forms(client, rows)
+    assert result.error is not None and result.succeeded == []
+    assert os.path.exists(store.path_for(rows[0]["form_filepath"]))
+
+
+def test_empty_selection_makes_no_request(client):
+    assert verify_forms(client, []).succeeded == [] and client.calls == []
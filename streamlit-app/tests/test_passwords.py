@@ -0,0 +1,46 @@
+import threading
+import time
+
+import bcrypt
+
+from src.utils import passwords
+from src.utils.passwords import BcryptPool, check_password, decoy_hash
+
+STORED = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(4)).decode()
+
+
+def test_check_password():
+    assert check_password("correct horse", STORED)
+    assert not check_password("wrong", STORED)
+
+
+def test_unknown_user_is_checked_against_the_decoy():
+    assert not check_password("decoy-password", None)  # even the decoy's own password fails
+    assert decoy_hash() is decoy_hash()
+
+
+def test_pool_bounds_concurrent_checks(monkeypatch):
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow_check(password, hashed):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return True
+
+    monkeypatch.setattr(passwords.bcrypt, "checkpw", slow_check)
+    pool = BcryptPool(workers=2)
+    threads = [threading.Thread(target=pool.checkpw, args=(b"pw", b"hash")) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = pool.stats()
+    assert peak[0] == 2
+    assert stats["completed"] == 8 and stats["queue_depth"] == 0 and stats["running"] == 0
+    assert stats["peak_queue_depth"] > 2 and stats["max_wait_ms"] > 0
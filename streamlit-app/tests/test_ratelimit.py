@@ -0,0 +1,41 @@
+from src.utils.ratelimit import RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_window_blocks_then_allows():
+    clock = Clock()
+    limiter = RateLimiter(limit=1, window=60, clock=clock)
+
+    allowed, retry_after, token = limiter.try_acquire(1)
+    assert allowed and retry_after == 0 and token is not None
+
+    clock.now += 20
+    allowed, retry_after, token = limiter.try_acquire(1)
+    assert not allowed and token is None
+    assert retry_after == 40
+
+    clock.now += 40
+    assert limiter.try_acquire(1)[0]
+
+
+def test_limits_are_per_key():
+    limiter = RateLimiter(limit=1, window=60, clock=Clock())
+    assert limiter.try_acquire(1)[0]
+    assert limiter.try_acquire(2)[0]
+    assert not limiter.try_acquire(1)[0]
+
+
+def test_refund_gives_the_hit_back():
+    limiter = RateLimiter(limit=1, window=60, clock=Clock())
+    _, _, token = limiter.try_acquire(1)
+    limiter.refund(1, token)
+    assert limiter.try_acquire(1)[0]
+    limiter.refund(1, None)  # a refused attempt has nothing to refund
+    assert not limiter.try_acquire(1)[0]
@@ -0,0 +1,42 @@
+import pytest
+
+from conftest import add_forms
+from src.data.review_queue import fetch_review_page_sqlite
+
+
+@pytest.fixture
+def queue(conn):
+    rows = [(1 + i % 3, 10000 + (i * 7919) % 5000, f"2025-11-{1 + i % 5:02d}") for i in range(23)]
+    rows += [(1, 20000, "2025-11-01", 1), (2, 500, "2025-11-01")]  # verified, and below the minimum
+    add_forms(conn, rows)
+    return conn
+
+
+def walk(conn, order, limit=5):
+    rows, after = [], None
+    while True:
+        page = fetch_review_page_sqlite(conn, order=order, after=after, limit=limit)
+        rows += page
+        if len(page) < limit:
+            return rows
+        after = (page[-1]["sort_key"], page[-1]["form_id"])
+
+
+@pytest.mark.parametrize("order", ["oldest", "steps", "suspicious"])
+def test_pages_cover_the_queue_once(queue, order):
+    rows = walk(queue, order)
+    assert sorted(r["form_id"] for r in rows) == list(range(1, 24))
+
+
+def test_orders(queue):
+    steps = [(r["form_stepcount"], r["form_id"]) for r in walk(queue, "steps")]
+    assert steps == sorted(steps, reverse=True)
+    suspicion = [(r["suspicion"], r["form_id"]) for r in walk(queue, "suspicious")]
+    assert suspicion == sorted(suspicion, reverse=True)
+
+
+def test_suspicion_is_scored_on_insert(conn):
+    add_forms(conn, [(1, 10000, "2025-11-01"), (1, 10000, "2025-11-02"), (1, 30000, "2025-11-02")])
+    scores = [r["suspicion"] for r in walk(conn, "oldest")]
+    # steps / running average + same-day repeats + steps / 50000
+    assert scores == [1.2, 1.2, round(30000 / (50000 / 3) + 1 + 0.6, 3)]
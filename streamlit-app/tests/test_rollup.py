@@ -0,0 +1,107 @@
+from datetime import date
+
+from conftest import add_forms
+from src.data import rollup as rollup_module
+from src.data.rollup import DailyRollup, apply_rollup_delta, fetch_daily_totals_sqlite, period_bounds
+
+ROWS = [
+    {"user_id": 1, "user_name": "alice", "form_date": "2025-11-01", "total_steps": 100},
+    {"user_id": 1, "user_name": "alice", "form_date": "2025-11-03", "total_steps": 300},
+    {"user_id": 2, "user_name": "bob", "form_date": "2025-11-02", "total_steps": 250},
+    {"user_id": 3, "user_name": "carol", "form_date": "2025-11-03", "total_steps": 150},
+]
+
+
+def test_period_bounds():
+    wednesday = date(2025, 11, 12)
+    assert period_bounds("This week", wednesday) == (date(2025, 11, 10), wednesday)
+    assert period_bounds("Last 7 days", wednesday) == (date(2025, 11, 6), wednesday)
+    assert period_bounds("This month", wednesday) == (date(2025, 11, 1), wednesday)
+    assert period_bounds("All time", wednesday) is None
+
+
+def test_totals_for_a_range():
+    rollup = DailyRollup.from_rows(ROWS)
+    assert list(rollup.totals("2025-11-01", "2025-11-03")) == [400, 250, 150]
+    assert list(rollup.totals("2025-11-02", "2025-11-02")) == [0, 250, 0]
+    # ranges past either end are clamped to the data
+    assert list(rollup.totals("2025-10-01", "2025-12-31")) == [400, 250, 150]
+
+
+def test_ranked_orders_and_skips_users_without_steps():
+    rollup = DailyRollup.from_rows(ROWS)
+    ranked = rollup.ranked("2025-11-03", "2025-11-03")
+    assert [(r["rank"], r["user_id"], r["total_steps"]) for r in ranked.top(10)] == [(1, 1, 300), (2, 3, 150)]
+    assert [r["user_id"] for r in ranked.bottom(1)] == [3]
+
+    everything = rollup.ranked("2025-11-01", "2025-11-03")
+    first = everything.page(limit=1)
+    after = (first[0]["total_steps"], first[0]["user_id"])
+    assert [r["user_id"] for r in everything.page(after=after, limit=5)] == [2, 3]
+    assert [r["user_id"] for r in everything.around(2, radius=1)] == [1, 2, 3]
+
+
+def test_apply_updates_in_place_and_refreshes_ranking():
+    rollup = DailyRollup.from_rows(ROWS)
+    before = rollup.ranked("2025-11-01", "2025-11-03")
+    assert rollup.apply(3, "2025-11-02", 500)
+    after = rollup.ranked("2025-11-01", "2025-11-03")
+    assert after is not before
+    assert after.top(1)[0] == {"rank": 1, "user_id": 3, "user_name": "carol", "total_steps": 650}
+
+    # an unknown user or a day outside the matrix needs a reload
+    assert not rollup.apply(9, "2025-11-02", 10)
+    assert not rollup.apply(1, "2025-11-20", 10)
+
+
+def test_rows_outside_the_window_do_not_widen_the_matrix():
+    stray = {"user_id": 2, "user_name": "bob", "form_date": "2031-01-01", "total_steps": 70}
+    rollup = DailyRollup.from_rows(ROWS + [stray], first_day="2025-11-02", last_day="2025-11-05")
+    assert rollup.prefix.shape == (3, 5)  # four days plus the leading zero column
+
+    # rows before or after the window still count in the ranges that cover them
+    assert list(rollup.totals("2025-11-02", "2025-11-05")) == [300, 250, 150]
+    assert list(rollup.totals("2025-11-01", "2025-11-05")) == [400, 250, 150]
+    assert rollup.ranked("2025-10-01", "2031-12-31").top(1)[0]["total_steps"] == 400
+    assert rollup.ranked("2025-11-01", "2031-12-31").top(3)[1]["total_steps"] == 320
+
+    # days inside the window can be patched even without data yet
+    assert rollup.apply(3, "2025-11-05", 10)
+    assert not rollup.apply(3, "2025-11-06", 10)
+
+
+def test_empty_rollup():
+    rollup = DailyRollup.from_rows([])
+    assert len(rollup.ranked("2025-11-01", "2025-11-30")) == 0
+
+
+def test_delta_during_a_load_keeps_the_stale_result_out_of_the_cache(monkeypatch):
+    rollup_module.invalidate_rollup()
+    loads = []
+
+    def fetch(client):
+        loads.append(client)
+        if len(loads) == 1:
+            apply_rollup_delta(1, "2025-11-03", 999)  # a submit lands while the first load is reading
+        return ROWS
+
+    monkeypatch.setattr(rollup_module, "fetch_daily_totals", fetch)
+    rollup_module.get_rollup("client")
+    rollup_module.get_rollup("client")
+    assert len(loads) == 2
+    rollup_module.invalidate_rollup()
+
+
+def test_fetch_daily_totals_sqlite_pages(conn):
+    add_forms(conn, [(1, 100, "2025-11-01"), (1, 50, "2025-11-01"), (1, 300, "2025-11-03"),
+                     (2, 250, "2025-11-02"), (3, 150, "2025-11-03")])
+    rows, after = [], None
+    while True:
+        page = fetch_daily_totals_sqlite(conn, after=after, limit=2)
+        rows += page
+        if len(page) < 2:
+            break
+        after = (page[-1]["user_id"], page[-1]["form_date"])
+    assert [(r["user_id"], r["form_date"], r["total_steps"]) for r in rows] == [
+        (1, "2025-11-01", 150), (1, "2025-11-03", 300), (2, "2025-11-02", 250), (3, "2025-11-03", 150),
+    ]
@@ -0,0 +1,102 @@
+import os
+import tarfile
+import time
+from datetime import date
+
+import pytest
+
+from conftest import SQLiteClient, add_forms
+from src.data import seasons, submissions
+from src.data.evidence import EvidenceStore
+from src.data.identity import invalidate_directory
+from src.data.leaderboard import fetch_leaderboard_sqlite
+from src.data.leaderboard_engine import LeaderboardEngine
+from src.data.seasons import (
+    START_SEASON_RPC, cached_seasons, check_season, invalidate_season, start_new_season, start_season_sqlite,
+)
+from src.data.submissions import build_form_row
+
+ALICE = {"user_id": 1, "user_name": "alice", "total_steps": 900, "form_count": 2}
+
+
+@pytest.fixture
+def client(conn):
+    return SQLiteClient(conn, {START_SEASON_RPC: lambda p_name: start_season_sqlite(conn, p_name)})
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """A loaded engine standing in for this process's shared one."""
+    engine = LeaderboardEngine()
+    engine.load([ALICE])
+    monkeypatch.setattr(seasons, "leaderboard_engine", engine)
+    monkeypatch.setattr(submissions, "leaderboard_engine", engine)
+    monkeypatch.setattr(seasons, "_seen_season", None)
+    invalidate_season()
+    invalidate_directory()
+    yield engine
+    invalidate_season()
+
+
+def test_new_season_starts_empty_and_keeps_explicit_seasons(conn):
+    add_forms(conn, [(1, 500, "2025-11-01"), (2, 900, "2025-11-01")])
+    start_season_sqlite(conn, "Season 2")
+    assert fetch_leaderboard_sqlite(conn) == []
+
+    # a row journaled before the switch keeps its season; new rows join the active one
+    conn.execute("INSERT INTO forms (user_id, form_stepcount, form_date, season_id) VALUES (1, 50, '2025-11-03', 1)")
+    add_forms(conn, [(2, 70, "2025-11-03")])
+    assert [(r["user_id"], r["total_steps"]) for r in fetch_leaderboard_sqlite(conn)] == [(2, 70)]
+
+
+def test_form_rows_carry_their_season():
+    assert build_form_row(1, 500, date(2025, 11, 1), season_id=4)["season_id"] == 4
+    assert "season_id" not in build_form_row(1, 500, date(2025, 11, 1))
+
+
+def test_season_started_elsewhere_resets_this_process(client, conn, engine):
+    assert check_season(client) == 1
+    assert len(engine) == 1
+
+    start_season_sqlite(conn, "Season 2")  # another replica switched
+    assert check_season(client) == 1  # not noticed until the cached id expires
+    invalidate_season()
+    assert check_season(client) == 2
+    assert len(engine) == 0
+
+
+def test_stragglers_from_the_old_season_skip_the_live_totals(client, engine):
+    check_season(client)
+    submissions._apply_inserted([
+        {"user_id": 1, "form_stepcount": 100, "form_date": "2025-11-01", "season_id": 1},
+        {"user_id": 1, "form_stepcount": 5000, "form_date": "2025-11-01", "season_id": 0},
+    ])
+    assert engine.top()[0]["total_steps"] == 1000
+
+
+def test_seasons_list_is_cached(client, engine):
+    assert [s["season_name"] for s in cached_seasons(client)] == ["Season 1"]
+    assert [s["season_name"] for s in cached_seasons(client)] == ["Season 1"]
+    assert client.calls.count(("seasons", "select")) == 1
+
+
+def test_start_new_season_archives_the_old_one(client, conn, engine, tmp_path, monkeypatch):
+    store = EvidenceStore(str(tmp_path / "uploads"), str(tmp_path / "index.db"), str(tmp_path / "thumbnails"))
+    monkeypatch.setattr(seasons, "get_evidence_store", lambda: store)
+    form_id, = add_forms(conn, [(1, 12000, "2025-11-01")])
+    filename = store.store(b"jpeg bytes", 0, "sub-1")
+    conn.execute("UPDATE forms SET form_submission_id = 'sub-1', form_filepath = ? WHERE form_id = ?",
+                 (filename, form_id))
+    cached_seasons(client)
+
+    job = start_new_season(client, "Season 2", folder=str(tmp_path / "archives"))
+    deadline = time.monotonic() + 10
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert job.error is None and job.phase == "Archived"
+    assert len(engine) == 0 and check_season(client) == 2
+    with tarfile.open(os.path.join(job.archive_path, "evidence.tar")) as tar:
+        assert tar.getnames() == [f"alice/2025-11-01_{form_id}.jpg"]
+    assert not os.path.exists(store.path_for(filename))
+    assert cached_seasons(client)[1]["archive_path"] == job.archive_path
@@ -0,0 +1,55 @@
+from datetime import date
+
+import numpy as np
+
+from src.utils.stats import all_user_stats, current_streak, daily_totals, longest_streak, user_stats
+
+TODAY = date(2025, 11, 10)
+
+
+def days(*values):
+    return np.array(values, dtype="datetime64[D]")
+
+
+def test_daily_totals_sums_each_day():
+    unique_days, totals = daily_totals(["2025-11-02", "2025-11-01", "2025-11-02T09:00:00"], [100, 50, 25])
+    assert list(unique_days.astype(str)) == ["2025-11-01", "2025-11-02"]
+    assert list(totals) == [50, 125]
+
+
+def test_current_streak_needs_today():
+    assert current_streak(days("2025-11-08", "2025-11-09", "2025-11-10"), TODAY) == 3
+    assert current_streak(days("2025-11-08", "2025-11-09"), TODAY) == 0
+    assert current_streak(days(), TODAY) == 0
+
+
+def test_longest_streak():
+    assert longest_streak(days("2025-11-01", "2025-11-02", "2025-11-03", "2025-11-05", "2025-11-06")) == 3
+    assert longest_streak(days()) == 0
+
+
+def test_user_stats():
+    stats = user_stats(
+        ["2025-11-08", "2025-11-09", "2025-11-10", "2025-11-10"], [10000, 20000, 15000, 5000], today=TODAY
+    )
+    assert stats["total_steps"] == 50000
+    assert stats["today_steps"] == 20000
+    assert stats["days_participated"] == 3
+    assert stats["current_streak"] == 3
+    assert stats["level"] == "💪 Mo’ Pro"
+    assert stats["badges"] == ["10K Steps", "50K Steps"]
+
+
+def test_all_user_stats_matches_user_stats():
+    user_ids = [1, 1, 1, 2, 2]
+    dates = ["2025-11-09", "2025-11-10", "2025-11-05", "2025-11-01", "2025-11-02"]
+    steps = [1000, 2000, 3000, 4000, 5000]
+    frame = all_user_stats(user_ids, dates, steps, today=TODAY).set_index("user_id")
+
+    for user_id in (1, 2):
+        mine = [i for i, u in enumerate(user_ids) if u == user_id]
+        single = user_stats([dates[i] for i in mine], [steps[i] for i in mine], today=TODAY)
+        row = frame.loc[user_id]
+        assert row["total_steps"] == single["total_steps"]
+        assert row["current_streak"] == single["current_streak"]
+        assert row["longest_streak"] == single["longest_streak"]
@@ -0,0 +1,105 @@
+import os
+import threading
+from datetime import date
+
+import pytest
+from PIL import Image
+
+from src.data import submissions
+from src.data.evidence import EvidenceStore
+from src.data.submissions import (
+    EVIDENCE_MIN_STEPS, MAX_PENDING_SUBMISSIONS, SubmissionQueueFull, build_form_row, needs_evidence, submit,
+    valid_form_date,
+)
+
+
+def test_only_large_submissions_keep_evidence():
+    assert needs_evidence(EVIDENCE_MIN_STEPS)
+    assert not needs_evidence(EVIDENCE_MIN_STEPS - 1)
+
+
+def test_form_row_without_evidence():
+    row = build_form_row(1, 5000, date(2025, 11, 1))
+    assert row["form_filepath"] is None
+    assert row["form_date"] == "2025-11-01"
+    assert row["form_verified"] is False
+    assert row["form_submission_id"] != build_form_row(1, 5000, date(2025, 11, 1))["form_submission_id"]
+
+
+def test_form_dates_must_be_in_the_season_and_not_ahead():
+    today, start = date(2025, 11, 12), date(2025, 11, 1)
+    assert valid_form_date(today, start, today)
+    assert valid_form_date(date(2025, 11, 13), start, today)  # already tomorrow in some timezones
+    assert not valid_form_date(date(2025, 11, 14), start, today)
+    assert not valid_form_date(date(2025, 10, 31), start, today)
+    assert valid_form_date(date(2025, 10, 31), None, today)
+
+
+class FakeJournal:
+    def __init__(self, error=None):
+        self.rows = []
+        self.error = error
+
+    def append(self, row, user_name=None):
+        if self.error:
+            raise self.error
+        self.rows.append((row, user_name))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = EvidenceStore(str(tmp_path / "uploads"), str(tmp_path / "index.db"), str(tmp_path / "thumbnails"))
+    monkeypatch.setattr(submissions, "get_evidence_store", lambda: store)
+    return store
+
+
+def permits_free():
+    """Whether every pending-submission slot is free again."""
+    taken = 0
+    while taken < MAX_PENDING_SUBMISSIONS and submissions._pending.acquire(blocking=False):
+        taken += 1
+    for _ in range(taken):
+        submissions._pending.release()
+    return taken == MAX_PENDING_SUBMISSIONS
+
+
+def screenshot():
+    return Image.new("RGB", (300, 600), (40, 120, 200))
+
+
+def test_submit_stores_evidence_and_journals_the_row(store, monkeypatch):
+    journal = FakeJournal()
+    monkeypatch.setattr(submissions, "_journal", journal)
+    handle = submit(build_form_row(1, 12000, date(2025, 11, 1)), screenshot(), user_name="alice")
+    row = handle.row()
+    assert os.path.isfile(store.path_for(row["form_filepath"]))
+    assert journal.rows == [(row, "alice")]
+    assert handle.steps == 12000 and permits_free()
+
+
+def test_failed_journal_write_releases_evidence_and_slot(store, monkeypatch):
+    monkeypatch.setattr(submissions, "_journal", FakeJournal(error=OSError("disk full")))
+    handle = submit(build_form_row(1, 12000, date(2025, 11, 1)), screenshot())
+    with pytest.raises(OSError):
+        handle.row()
+    assert isinstance(handle.error(), OSError)
+    assert os.listdir(store.folder) == []
+    assert permits_free()
+
+
+def test_submit_without_evidence_never_touches_the_store(monkeypatch):
+    journal = FakeJournal()
+    monkeypatch.setattr(submissions, "_journal", journal)
+    monkeypatch.setattr(submissions, "get_evidence_store", lambda: pytest.fail("store used"))
+    row = submit(build_form_row(1, 5000, date(2025, 11, 1))).row()
+    assert row["form_filepath"] is None and journal.rows == [(row, None)]
+    assert permits_free()
+
+
+def test_full_queue_is_refused(monkeypatch):
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(submissions, "_pending", full)
+    monkeypatch.setattr(submissions, "PENDING_WAIT_SECONDS", 0.01)
+    with pytest.raises(SubmissionQueueFull):
+        submit(build_form_row(1, 5000, date(2025, 11, 1)))